@@ -3,14 +3,38 @@ Agente Generador de Propuestas Técnicas
 Sin necesidad de API key externo - usa templates predefinidos
 """
 
+import random
 import re
+import threading
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
-
-from templates import TEMPLATES, detectar_area, listar_areas, obtener_template
+from functools import lru_cache
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from taxonomia import (
+    area_desde_coincidencias_jerarquica,
+    detectar_area_jerarquica,
+    existe_area,
+    obtener_template,
+)
+from templates import (
+    TEMPLATES,
+    CoincidenciaPalabra,
+    listar_areas,
+)
 
 
 class EstadoEjecucion(Enum):
@@ -28,7 +52,7 @@ class EstadoEjecucion(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class Trazabilidad:
     """Clase para registrar la trazabilidad de la ejecución"""
 
@@ -37,6 +61,8 @@ class Trazabilidad:
     inicio: Optional[datetime] = None
     fin: Optional[datetime] = None
     duracion_ms: int = 0
+    inicio_ns: int = 0
+    fin_ns: int = 0
 
     def agregar_paso(
         self, estado: EstadoEjecucion, detalle: str, metadata: Optional[Dict] = None
@@ -47,6 +73,7 @@ class Trazabilidad:
                 "estado": estado.value,
                 "detalle": detalle,
                 "timestamp": datetime.now().isoformat(),
+                "timestamp_ns": time.time_ns(),
                 "metadata": metadata or {},
             }
         )
@@ -65,10 +92,12 @@ class Trazabilidad:
     def iniciar(self):
         """Marca el inicio de la ejecución"""
         self.inicio = datetime.now()
+        self.inicio_ns = time.time_ns()
 
     def finalizar(self):
         """Marca el fin de la ejecución"""
         self.fin = datetime.now()
+        self.fin_ns = time.time_ns()
         if self.inicio:
             self.duracion_ms = int((self.fin - self.inicio).total_seconds() * 1000)
 
@@ -84,7 +113,7 @@ class Trazabilidad:
         }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ResultadoPropuesta:
     """Resultado de la generación de propuesta"""
 
@@ -95,55 +124,321 @@ class ResultadoPropuesta:
     exitoso: bool
     trazabilidad: Optional[Trazabilidad] = None
     error: Optional[str] = None
+    etapas_reutilizadas: List[str] = field(default_factory=list)
+    resumen_trazabilidad: Optional[Dict[str, Any]] = None
+    # Palabras clave que decidieron el área, con su posición en la necesidad
+    posiciones_coincidencias: Tuple[CoincidenciaPalabra, ...] = ()
+
+
+SECCIONES: Tuple[str, ...] = ("problema", "solucion", "arquitectura", "riesgos")
+SEPARADOR_BLOQUES = "\n---\n\n"
+
+
+@dataclass(frozen=True, slots=True)
+class EtapaPropuesta:
+    """Nodo del grafo de etapas que componen una propuesta"""
+
+    nombre: str
+    estado: EstadoEjecucion
+    detalle: str
+    dependencias: Tuple[str, ...] = ()
+    entradas: Tuple[str, ...] = ("necesidad", "area")
+
+
+ETAPAS: Mapping[str, EtapaPropuesta] = MappingProxyType(
+    {
+        "palabras_clave": EtapaPropuesta(
+            "palabras_clave",
+            EstadoEjecucion.ANALIZANDO_ENTRADA,
+            "Extrayendo palabras clave",
+            entradas=("necesidad",),
+        ),
+        "problema": EtapaPropuesta(
+            "problema",
+            EstadoEjecucion.IDENTIFICANDO_PROBLEMA,
+            "Identificando problema específico",
+            ("palabras_clave",),
+        ),
+        "solucion": EtapaPropuesta(
+            "solucion",
+            EstadoEjecucion.GENERANDO_SOLUCION,
+            "Generando solución técnica",
+            entradas=("area",),
+        ),
+        "arquitectura": EtapaPropuesta(
+            "arquitectura",
+            EstadoEjecucion.DISEÑANDO_ARQUITECTURA,
+            "Diseñando arquitectura de alto nivel",
+            entradas=("area",),
+        ),
+        "riesgos": EtapaPropuesta(
+            "riesgos",
+            EstadoEjecucion.ANALIZANDO_RIESGOS,
+            "Analizando principales riesgos",
+            entradas=("area",),
+        ),
+    }
+)
+
+
+PALABRAS_VACIAS = frozenset(
+    {
+        "el",
+        "la",
+        "los",
+        "las",
+        "un",
+        "una",
+        "de",
+        "del",
+        "en",
+        "con",
+        "para",
+        "por",
+        "que",
+        "y",
+        "o",
+        "a",
+        "se",
+        "son",
+        "es",
+        "esta",
+        "esto",
+        "necesitamos",
+        "necesito",
+        "queremos",
+    }
+)
+PATRON_PALABRA = re.compile(r"\b[a-záéíóúñ]{4,}\b")
+
+# Necesidades más largas (caracteres) se analizan por fragmentos
+UMBRAL_EXTENSO = 200_000
+
+
+@lru_cache(maxsize=None)
+def planificar_etapas(secciones: Tuple[str, ...]) -> Tuple[Tuple[str, ...], ...]:
+    """
+    Resuelve las etapas necesarias para las secciones pedidas y las agrupa
+    en niveles: las etapas de un mismo nivel no dependen entre sí.
+    """
+    necesarias = set()
+    pendientes = list(secciones)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in necesarias:
+            necesarias.add(nombre)
+            pendientes.extend(ETAPAS[nombre].dependencias)
+
+    niveles = []
+    resueltas: set = set()
+    while len(resueltas) < len(necesarias):
+        nivel = tuple(
+            nombre
+            for nombre, etapa in ETAPAS.items()
+            if nombre in necesarias
+            and nombre not in resueltas
+            and all(dep in resueltas for dep in etapa.dependencias)
+        )
+        niveles.append(nivel)
+        resueltas.update(nivel)
+
+    return tuple(niveles)
+
+
+COMPONENTES_POR_AREA: Mapping[str, str] = MappingProxyType(
+    {
+        "fintech": "- Procesador de pagos en tiempo real\n- Módulo de KYC/AML\n- Dashboard de análisis financiero",
+        "app_moviles": "- App móvil nativa/multiplataforma\n- Backend API REST/GraphQL\n- Sistema de notificaciones push",
+        "blockchain": "- Smart contracts para automatización\n- Sistema de tokens\n- Oráculos para datos externos",
+        "arquitectura": "- Contenedores y orquestación\n- API Gateway\n- Sistema de observabilidad",
+        "seguros": "- Motor de tarificación\n- Workflow de reclamos\n- Portal de autoservicio",
+        "medica": "- Sistema de historial clínico (EHR)\n- Módulo de telemedicina\n- Portal de pacientes",
+        "telecomunicaciones": "- OSS/BSS integrado\n- Sistema de provisioning\n- Analytics en tiempo real",
+        "transporte": "- TMS con optimización de rutas\n- Tracking GPS\n- Gestión de flotas",
+        "almacenamiento": "- WMS con RFID\n- Optimización de ubicaciones\n- Sistema de picking automatizado",
+        "combustibles": "- Monitoreo de tanques (ATG)\n- Control de dispensarios\n- Gestión de inventario",
+    }
+)
+
+RIESGOS_POR_AREA: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+    {
+        "fintech": (
+            "Adaptación al mercado crypto - Mitigación: Monitoreo de tendencias y regulación",
+        ),
+        "app_moviles": (
+            "Retención de usuarios - Mitigación: Analytics y engagement features",
+        ),
+        "blockchain": (
+            "Adopción por usuarios - Mitigación: UX simplificada y onboarding guiado",
+        ),
+    }
+)
+
+
+@dataclass
+class CacheIncremental:
+    """
+    Valores derivados de la última generación junto con la huella de las
+    entradas de las que dependen. Permite regenerar solo lo que cambió.
+    """
+
+    huellas: Dict[str, Tuple] = field(default_factory=dict)
+    valores: Dict[str, Any] = field(default_factory=dict)
+
+    def obtener(self, nombre: str, huella: Tuple) -> Tuple[bool, Any]:
+        """Retorna (True, valor) si la huella coincide con la memorizada"""
+        if self.huellas.get(nombre) == huella:
+            return True, self.valores[nombre]
+        return False, None
+
+    def guardar(self, nombre: str, huella: Tuple, valor: Any):
+        """Memoriza un valor derivado con la huella de sus entradas"""
+        self.huellas[nombre] = huella
+        self.valores[nombre] = valor
+
+    def limpiar(self):
+        """Descarta todos los valores memorizados"""
+        self.huellas.clear()
+        self.valores.clear()
+
+
+@dataclass
+class PoliticaMuestreo:
+    """
+    Decide qué trazas completas se conservan.
+    - Cabecera: al iniciar, se conserva con probabilidad `tasa`.
+    - Cola: al terminar, se rescatan siempre las que fallaron (si
+      `conservar_errores`) y las más lentas que `umbral_lento_ms`.
+    Las trazas descartadas solo dejan el resumen de obtener_resumen().
+    """
+
+    tasa: float = 0.1
+    umbral_lento_ms: Optional[float] = 500.0
+    conservar_errores: bool = True
+    semilla: Optional[int] = None
+    _aleatorio: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+    _contadores: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if not 0.0 <= self.tasa <= 1.0:
+            raise ValueError(f"La tasa de muestreo debe estar entre 0 y 1: {self.tasa}")
+        self._aleatorio = random.Random(self.semilla)
+        self._contadores = dict.fromkeys(
+            (
+                "cabecera_conservadas",
+                "cabecera_descartadas",
+                "error_conservadas",
+                "lenta_conservadas",
+                "conservadas",
+                "descartadas",
+            ),
+            0,
+        )
+
+    def decidir_cabecera(self) -> bool:
+        """Decisión probabilística al inicio de la petición"""
+        with self._lock:
+            conservar = self.tasa >= 1.0 or self._aleatorio.random() < self.tasa
+            clave = "cabecera_conservadas" if conservar else "cabecera_descartadas"
+            self._contadores[clave] += 1
+        return conservar
+
+    def decidir_cola(self, trazabilidad: Trazabilidad, cabecera: bool) -> bool:
+        """Decisión final con la traza terminada (errores y latencia)"""
+        politica = None
+        if not cabecera:
+            if self.conservar_errores and trazabilidad.errores:
+                politica = "error_conservadas"
+            elif (
+                self.umbral_lento_ms is not None
+                and (trazabilidad.fin_ns - trazabilidad.inicio_ns) / 1e6
+                >= self.umbral_lento_ms
+            ):
+                politica = "lenta_conservadas"
+
+        conservar = cabecera or politica is not None
+        with self._lock:
+            if politica is not None:
+                self._contadores[politica] += 1
+            self._contadores["conservadas" if conservar else "descartadas"] += 1
+        return conservar
+
+    def obtener_contadores(self) -> Dict[str, int]:
+        """Trazas conservadas y descartadas por cada política"""
+        with self._lock:
+            return dict(self._contadores)
 
 
 class GeneradorPropuestas:
     """
     Generador de Propuestas Técnicas sin API key.
     Usa templates predefinidos por área con personalización basada en la entrada.
+
+    Una instancia se puede compartir entre hilos (también sin GIL): después
+    de construirla su estado es de solo lectura y cada generación trabaja
+    sobre objetos propios. El CacheIncremental es del llamador y no debe
+    compartirse entre hilos.
+
+    Con max_workers > 1 las etapas corren en un pool de hilos propio que se
+    libera con cerrar() (o al salir de un bloque with); después de cerrar
+    las etapas se ejecutan en serie.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: int = 1,
+        exportador=None,
+        muestreo: Optional[PoliticaMuestreo] = None,
+        umbral_extenso: int = UMBRAL_EXTENSO,
+        auditoria=None,
+    ):
         self.templates = TEMPLATES
-        self.areas = listar_areas()
+        self.umbral_extenso = umbral_extenso
+        self.exportador = exportador
+        self.auditoria = auditoria
+        self.muestreo = muestreo
+        self.areas = tuple(listar_areas())
+        self._executor = None
+        if max_workers > 1:
+            # Import diferido: concurrent.futures pesa en el arranque de cli.py
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="etapa"
+            )
+        self._etapas = MappingProxyType(
+            {
+                "palabras_clave": lambda nec, tpl, res: self._extraer_palabras_clave(
+                    nec
+                ),
+                "problema": lambda nec, tpl, res: self._identificar_problema(
+                    nec, tpl, res["palabras_clave"]
+                ),
+                "solucion": lambda nec, tpl, res: self._generar_solucion(nec, tpl),
+                "arquitectura": lambda nec, tpl, res: self._disenar_arquitectura(
+                    nec, tpl
+                ),
+                "riesgos": lambda nec, tpl, res: self._analizar_riesgos(nec, tpl),
+            }
+        )
 
     def _extraer_palabras_clave(self, necesidad: str) -> List[str]:
         """Extrae palabras clave de la necesidad"""
-        stop_words = {
-            "el",
-            "la",
-            "los",
-            "las",
-            "un",
-            "una",
-            "de",
-            "del",
-            "en",
-            "con",
-            "para",
-            "por",
-            "que",
-            "y",
-            "o",
-            "a",
-            "se",
-            "son",
-            "es",
-            "esta",
-            "esto",
-            "necesitamos",
-            "necesito",
-            "queremos",
-        }
-        palabras = re.findall(r"\b[a-záéíóúñ]{4,}\b", necesidad.lower())
-        return [p for p in palabras if p not in stop_words]
+        palabras = PATRON_PALABRA.findall(necesidad.lower())
+        return [p for p in palabras if p not in PALABRAS_VACIAS]
 
-    def _identificar_problema(self, necesidad: str, template) -> str:
+    def _identificar_problema(
+        self, necesidad: str, template, palabras_clave: Optional[List[str]] = None
+    ) -> str:
         """
         Identifica el problema específico basándose en la necesidad.
         Combina el problema base del template con la necesidad específica.
         """
-        palabras_clave = self._extraer_palabras_clave(necesidad)
+        if palabras_clave is None:
+            palabras_clave = self._extraer_palabras_clave(necesidad)
 
         problema = template.problema_base + "\n\n"
         problema += f"**Necesidad específica identificada:** {necesidad}\n\n"
@@ -153,25 +448,10 @@ class GeneradorPropuestas:
 
     def _generar_solucion(self, necesidad: str, template) -> str:
         """Genera la solución técnica personalizada"""
-        palabras_clave = self._extraer_palabras_clave(necesidad)
-
         solucion = template.solucion_base + "\n\n"
         solucion += "**Componentes específicos sugeridos:**\n"
 
-        componentes = {
-            "fintech": "- Procesador de pagos en tiempo real\n- Módulo de KYC/AML\n- Dashboard de análisis financiero",
-            "app_moviles": "- App móvil nativa/multiplataforma\n- Backend API REST/GraphQL\n- Sistema de notificaciones push",
-            "blockchain": "- Smart contracts para automatización\n- Sistema de tokens\n- Oráculos para datos externos",
-            "arquitectura": "- Contenedores y orquestación\n- API Gateway\n- Sistema de observabilidad",
-            "seguros": "- Motor de tarificación\n- Workflow de reclamos\n- Portal de autoservicio",
-            "medica": "- Sistema de historial clínico (EHR)\n- Módulo de telemedicina\n- Portal de pacientes",
-            "telecomunicaciones": "- OSS/BSS integrado\n- Sistema de provisioning\n- Analytics en tiempo real",
-            "transporte": "- TMS con optimización de rutas\n- Tracking GPS\n- Gestión de flotas",
-            "almacenamiento": "- WMS con RFID\n- Optimización de ubicaciones\n- Sistema de picking automatizado",
-            "combustibles": "- Monitoreo de tanques (ATG)\n- Control de dispensarios\n- Gestión de inventario",
-        }
-
-        solucion += componentes.get(template.area, "- Módulos personalizados")
+        solucion += COMPONENTES_POR_AREA.get(template.area, "- Módulos personalizados")
 
         return solucion
 
@@ -179,34 +459,121 @@ class GeneradorPropuestas:
         """Diseña la arquitectura de alto nivel"""
         return template.arquitectura_base
 
-    def _analizar_riesgos(self, necesidad: str, template) -> List[str]:
+    def _analizar_riesgos(self, necesidad: str, template) -> Sequence[str]:
         """Analiza los riesgos específicos"""
-        palabras_clave = self._extraer_palabras_clave(necesidad)
-
-        riesgos = template.riesgos_base.copy()
-
-        riesgos_personalizados = {
-            "fintech": [
-                "Adaptación al mercado crypto - Mitigación: Monitoreo de tendencias y regulación",
-            ],
-            "app_moviles": [
-                "Retención de usuarios - Mitigación: Analytics y engagement features",
-            ],
-            "blockchain": [
-                "Adopción por usuarios - Mitigación: UX simplificada y onboarding guiado",
-            ],
-        }
+        adicionales = RIESGOS_POR_AREA.get(template.area)
+        if not adicionales:
+            return template.riesgos_base
 
-        if template.area in riesgos_personalizados:
-            riesgos.extend(riesgos_personalizados[template.area])
+        return list(template.riesgos_base) + list(adicionales)
 
-        return riesgos
+    def _medir_etapa(
+        self, nombre: str, necesidad: str, template, resultados: Dict[str, Any]
+    ) -> Tuple[Any, int, int]:
+        """Ejecuta una etapa y retorna (valor, inicio_ns, fin_ns)"""
+        inicio_ns = time.time_ns()
+        valor = self._etapas[nombre](necesidad, template, resultados)
+        return valor, inicio_ns, time.time_ns()
+
+    def _ejecutar_etapas(
+        self,
+        necesidad: str,
+        template,
+        secciones: Tuple[str, ...],
+        trazabilidad: Trazabilidad,
+        entradas: Dict[str, Any],
+        cache: Optional[CacheIncremental] = None,
+        reutilizadas: Optional[List[str]] = None,
+        precalculadas: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta el grafo de etapas nivel a nivel, en paralelo si hay executor.
+        Con un CacheIncremental solo se recalculan las etapas cuyas entradas
+        (o las de sus dependencias) cambiaron desde la generación anterior.
+        Las etapas en `precalculadas` toman ese valor sin ejecutarse.
+        """
+        resultados: Dict[str, Any] = {}
+        huellas: Dict[str, Tuple] = {}
+        metadatas: Dict[str, Dict[str, Any]] = {}
+
+        for nivel in planificar_etapas(secciones):
+            pendientes = []
+            for nombre in nivel:
+                etapa = ETAPAS[nombre]
+                huellas[nombre] = tuple(entradas[e] for e in etapa.entradas) + tuple(
+                    huellas[dep] for dep in etapa.dependencias
+                )
+                reutilizada = False
+                if precalculadas and nombre in precalculadas:
+                    resultados[nombre] = precalculadas[nombre]
+                    metadatas[nombre] = {"etapa": nombre, "precalculada": True}
+                    trazabilidad.agregar_paso(
+                        etapa.estado, etapa.detalle, metadatas[nombre]
+                    )
+                    continue
+                if cache is not None:
+                    reutilizada, valor = cache.obtener(nombre, huellas[nombre])
+                if reutilizada:
+                    resultados[nombre] = valor
+                    if reutilizadas is not None:
+                        reutilizadas.append(nombre)
+                else:
+                    pendientes.append(nombre)
+                metadatas[nombre] = {"etapa": nombre, "reutilizada": reutilizada}
+                trazabilidad.agregar_paso(
+                    etapa.estado, etapa.detalle, metadatas[nombre]
+                )
+
+            executor = self._executor
+            if executor is not None and len(pendientes) > 1:
+                futuros = {
+                    nombre: executor.submit(
+                        self._medir_etapa, nombre, necesidad, template, resultados
+                    )
+                    for nombre in pendientes
+                }
+                medidas = {
+                    nombre: futuro.result() for nombre, futuro in futuros.items()
+                }
+            else:
+                medidas = {
+                    nombre: self._medir_etapa(nombre, necesidad, template, resultados)
+                    for nombre in pendientes
+                }
+
+            for nombre, (valor, inicio_ns, fin_ns) in medidas.items():
+                resultados[nombre] = valor
+                metadatas[nombre]["inicio_ns"] = inicio_ns
+                metadatas[nombre]["fin_ns"] = fin_ns
+
+            if cache is not None:
+                for nombre in pendientes:
+                    cache.guardar(nombre, huellas[nombre], resultados[nombre])
+
+        return resultados
+
+    def cerrar(self):
+        """Detiene el pool de hilos de las etapas (idempotente)"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
 
     def generar_propuesta(
         self,
         necesidad: str,
         area_especifica: Optional[str] = None,
         incluir_trazabilidad: bool = True,
+        secciones: Optional[Sequence[str]] = None,
+        cache: Optional[CacheIncremental] = None,
+        tenant: Optional[str] = None,
+        deteccion: Optional[Tuple[str, Tuple[CoincidenciaPalabra, ...]]] = None,
+        auditar: bool = True,
     ) -> ResultadoPropuesta:
         """
         Genera una propuesta técnica estructurada.
@@ -215,34 +582,131 @@ class GeneradorPropuestas:
             necesidad: Descripción corta de la necesidad de negocio
             area_especifica: Fuerza un área específica (opcional)
             incluir_trazabilidad: Si incluye trazabilidad en el resultado
+            secciones: Secciones a generar (por defecto todas las de SECCIONES)
+            cache: Cache de la generación anterior para regenerar solo lo que cambió
+            tenant: Cliente cuyos overlays de template se aplican (opcional)
+            deteccion: (área, posiciones) ya detectadas para esta necesidad,
+                p. ej. por la vista previa, para no volver a detectar
+            auditar: False si el llamador registra él mismo el resultado
+                final (p. ej. el enrutador, que le agrega el nivel)
 
         Returns:
             ResultadoPropuesta con la propuesta generada
         """
+        if len(necesidad) > self.umbral_extenso:
+            return self.generar_propuesta_extensa(
+                necesidad,
+                area_especifica,
+                incluir_trazabilidad,
+                secciones,
+                cache,
+                tenant,
+                deteccion=deteccion,
+                auditar=auditar,
+            )
+        resultado = self._generar(
+            necesidad,
+            area_especifica,
+            incluir_trazabilidad,
+            secciones,
+            cache,
+            tenant,
+            deteccion=deteccion,
+        )
+        return self.registrar_en_auditoria(resultado) if auditar else resultado
+
+    def generar_propuesta_extensa(
+        self,
+        fuente: Union[str, Iterable[str]],
+        area_especifica: Optional[str] = None,
+        incluir_trazabilidad: bool = True,
+        secciones: Optional[Sequence[str]] = None,
+        cache: Optional[CacheIncremental] = None,
+        tenant: Optional[str] = None,
+        referencia: Optional[str] = None,
+        deteccion: Optional[Tuple[str, Tuple[CoincidenciaPalabra, ...]]] = None,
+        auditar: bool = True,
+    ) -> ResultadoPropuesta:
+        """
+        Genera la propuesta de un documento largo (p. ej. un RFP completo)
+        analizándolo por fragmentos. `fuente` puede ser el texto, un
+        iterable de fragmentos (ver analisis_extenso.fragmentar_archivo) o
+        un AnalisisNecesidad ya calculado. El resultado guarda un extracto,
+        el digest y la referencia del documento en lugar del texto completo.
+        """
+        from analisis_extenso import AnalisisNecesidad, analizar_en_fragmentos
+
+        analisis = (
+            fuente
+            if isinstance(fuente, AnalisisNecesidad)
+            else analizar_en_fragmentos(fuente, referencia)
+        )
+        resultado = self._generar(
+            analisis.extracto,
+            area_especifica,
+            incluir_trazabilidad,
+            secciones,
+            cache,
+            tenant,
+            analisis,
+            deteccion,
+        )
+        return self.registrar_en_auditoria(resultado) if auditar else resultado
+
+    def _generar(
+        self,
+        necesidad: str,
+        area_especifica: Optional[str],
+        incluir_trazabilidad: bool,
+        secciones: Optional[Sequence[str]],
+        cache: Optional[CacheIncremental],
+        tenant: Optional[str],
+        analisis=None,
+        deteccion: Optional[Tuple[str, Tuple[CoincidenciaPalabra, ...]]] = None,
+    ) -> ResultadoPropuesta:
+        """
+        Flujo de generación; con `analisis` usa el resultado por fragmentos y
+        con `deteccion` el área ya detectada por el llamador
+        """
         trazabilidad = Trazabilidad()
+        reutilizadas: List[str] = []
+        cabecera = self.muestreo.decidir_cabecera() if self.muestreo else True
 
         try:
             trazabilidad.iniciar()
             trazabilidad.agregar_paso(
                 EstadoEjecucion.INICIADO,
                 "Inicialización del agente generador",
-                {"necesidad_length": len(necesidad)},
+                {"necesidad_length": analisis.longitud if analisis else len(necesidad)},
             )
 
             if not necesidad or len(necesidad.strip()) < 10:
                 raise ValueError("La descripción debe tener al menos 10 caracteres")
 
+            secciones = SECCIONES if secciones is None else tuple(secciones)
+            desconocidas = [s for s in secciones if s not in SECCIONES]
+            if desconocidas or not secciones:
+                raise ValueError(
+                    f"Secciones no válidas: {', '.join(desconocidas) or 'ninguna'}. "
+                    f"Disponibles: {', '.join(SECCIONES)}"
+                )
+            secciones = tuple(s for s in SECCIONES if s in secciones)
+
             trazabilidad.agregar_paso(
                 EstadoEjecucion.ANALIZANDO_ENTRADA,
                 "Analizando entrada del usuario",
-                {"necesidad": necesidad[:100] + "..."},
+                {"necesidad": necesidad[:100] + "...", "secciones": list(secciones)},
             )
 
             trazabilidad.agregar_paso(
                 EstadoEjecucion.DETECTANDO_AREA, "Detectando área de negocio", {}
             )
 
-            if area_especifica and area_especifica in self.areas:
+            # Con análisis por fragmentos la huella es el digest del documento
+            huella_necesidad = analisis.digest if analisis else necesidad
+            posiciones: Tuple[CoincidenciaPalabra, ...] = ()
+
+            if area_especifica and existe_area(area_especifica):
                 area = area_especifica
                 trazabilidad.agregar_paso(
                     EstadoEjecucion.DETECTANDO_AREA,
@@ -250,46 +714,53 @@ class GeneradorPropuestas:
                     {"area": area},
                 )
             else:
-                area = detectar_area(necesidad)
+                huella_area = (huella_necesidad,)
+                reutilizada, guardada = (
+                    cache.obtener("area", huella_area) if cache else (False, None)
+                )
+                if reutilizada:
+                    reutilizadas.append("area")
+                    area, posiciones = guardada
+                else:
+                    if deteccion is not None:
+                        area, posiciones = deteccion
+                    elif analisis:
+                        area, _ = area_desde_coincidencias_jerarquica(
+                            analisis.coincidencias
+                        )
+                    else:
+                        area, _, posiciones = detectar_area_jerarquica(necesidad)
+                    if cache is not None:
+                        cache.guardar("area", huella_area, (area, posiciones))
                 trazabilidad.agregar_paso(
                     EstadoEjecucion.DETECTANDO_AREA,
                     f"Área detectada automáticamente: {area}",
-                    {"area": area},
+                    {"area": area, "reutilizada": reutilizada},
                 )
 
-            template = obtener_template(area)
-
-            trazabilidad.agregar_paso(
-                EstadoEjecucion.IDENTIFICANDO_PROBLEMA,
-                "Identificando problema específico",
-                {"template": area},
+            template = obtener_template(area, tenant)
+            precalculadas = (
+                {"palabras_clave": list(analisis.palabras_clave)} if analisis else None
             )
-            problema = self._identificar_problema(necesidad, template)
 
-            trazabilidad.agregar_paso(
-                EstadoEjecucion.GENERANDO_SOLUCION, "Generando solución técnica", {}
-            )
-            solucion = self._generar_solucion(necesidad, template)
-
-            trazabilidad.agregar_paso(
-                EstadoEjecucion.DISEÑANDO_ARQUITECTURA,
-                "Diseñando arquitectura de alto nivel",
-                {},
+            # La huella "area" es el template resuelto: cambia con el área,
+            # con el tenant y con cualquier cambio en sus overlays.
+            resultados = self._ejecutar_etapas(
+                necesidad,
+                template,
+                secciones,
+                trazabilidad,
+                {"necesidad": huella_necesidad, "area": template},
+                cache,
+                reutilizadas,
+                precalculadas,
             )
-            arquitectura = self._disenar_arquitectura(necesidad, template)
-
-            trazabilidad.agregar_paso(
-                EstadoEjecucion.ANALIZANDO_RIESGOS, "Analizando principales riesgos", {}
-            )
-            riesgos = self._analizar_riesgos(necesidad, template)
 
             trazabilidad.agregar_paso(
                 EstadoEjecucion.GENERANDO_OUTPUT, "Generando propuesta final", {}
             )
 
-            propuesta_final = self._formatear_propuesta(
-                problema, solucion, arquitectura, riesgos, template
-            )
+            propuesta_final = self._formatear_propuesta(resultados, template)
 
             trazabilidad.finalizar()
             trazabilidad.agregar_paso(
@@ -297,91 +768,158 @@ class GeneradorPropuestas:
                 "Propuesta generada exitosamente",
                 {"duracion_ms": trazabilidad.duracion_ms},
             )
+            conservada = self._conservar_traza(
+                trazabilidad, cabecera, {"propuesta.area": area}
+            )
+
+            outputs = {nombre: resultados[nombre] for nombre in secciones}
+            outputs["tecnologias"] = template.tecnologias
 
             return ResultadoPropuesta(
                 propuesta=propuesta_final,
                 area_detectada=area,
-                inputs={"necesidad": necesidad, "area_especifica": area_especifica},
-                outputs={
-                    "problema": problema,
-                    "solucion": solucion,
-                    "arquitectura": arquitectura,
-                    "riesgos": riesgos,
-                    "tecnologias": template.tecnologias,
-                },
-                trazabilidad=trazabilidad if incluir_trazabilidad else None,
+                inputs=self._inputs_resultado(
+                    necesidad,
+                    analisis,
+                    area_especifica=area_especifica,
+                    secciones=list(secciones),
+                    tenant=tenant,
+                ),
+                outputs=outputs,
+                trazabilidad=(
+                    trazabilidad if incluir_trazabilidad and conservada else None
+                ),
                 exitoso=True,
+                etapas_reutilizadas=reutilizadas,
+                resumen_trazabilidad=(
+                    None if conservada else trazabilidad.obtener_resumen()
+                ),
+                posiciones_coincidencias=posiciones,
             )
 
         except ValueError as e:
             trazabilidad.finalizar()
             trazabilidad.agregar_error("ValueError", str(e), "Validación de entrada")
+            conservada = self._conservar_traza(trazabilidad, cabecera)
             return ResultadoPropuesta(
                 propuesta="",
                 area_detectada="",
-                inputs={"necesidad": necesidad},
+                inputs=self._inputs_resultado(necesidad, analisis),
                 outputs={},
-                trazabilidad=trazabilidad,
+                trazabilidad=trazabilidad if conservada else None,
                 exitoso=False,
                 error=str(e),
+                resumen_trazabilidad=(
+                    None if conservada else trazabilidad.obtener_resumen()
+                ),
             )
         except Exception as e:
             trazabilidad.finalizar()
             trazabilidad.agregar_error("Exception", str(e), "Ejecución del agente")
+            conservada = self._conservar_traza(trazabilidad, cabecera)
             return ResultadoPropuesta(
                 propuesta="",
                 area_detectada="",
-                inputs={"necesidad": necesidad},
+                inputs=self._inputs_resultado(necesidad, analisis),
                 outputs={},
-                trazabilidad=trazabilidad,
+                trazabilidad=trazabilidad if conservada else None,
                 exitoso=False,
                 error=f"Error inesperado: {str(e)}",
+                resumen_trazabilidad=(
+                    None if conservada else trazabilidad.obtener_resumen()
+                ),
             )
 
-    def _formatear_propuesta(
+    def generar_propuestas(
         self,
-        problema: str,
-        solucion: str,
-        arquitectura: str,
-        riesgos: List[str],
-        template,
-    ) -> str:
-        """Formatea la propuesta en markdown estructurado"""
-        return f"""# PROPUESTA TÉCNICA
-
-## Área: {template.area}
-
----
-
-## 1. PROBLEMA IDENTIFICADO
-
-{problema}
-
----
-
-## 2. SOLUCIÓN TÉCNICA SUGERIDA
-
-{solucion}
-
----
+        necesidades: Sequence[str],
+        areas_especificas: Optional[Sequence[Optional[str]]] = None,
+        **opciones,
+    ) -> List[ResultadoPropuesta]:
+        """
+        Genera un lote de propuestas en una sola llamada (p. ej. el lote que
+        arma la cola de Gradio). Las opciones se pasan a generar_propuesta.
+        """
+        if areas_especificas is None:
+            areas_especificas = [None] * len(necesidades)
+        if len(areas_especificas) != len(necesidades):
+            raise ValueError(
+                "necesidades y areas_especificas deben tener el mismo largo"
+            )
 
-## 3. ARQUITECTURA GENERAL (ALTO NIVEL)
+        return [
+            self.generar_propuesta(necesidad, area, **opciones)
+            for necesidad, area in zip(necesidades, areas_especificas)
+        ]
+
+    @staticmethod
+    def _inputs_resultado(necesidad: str, analisis=None, **otros) -> Dict[str, Any]:
+        """Entradas del resultado; un documento extenso se guarda por referencia"""
+        inputs: Dict[str, Any] = {"necesidad": necesidad, **otros}
+        if analisis is not None:
+            inputs["necesidad_sha256"] = analisis.digest
+            inputs["necesidad_referencia"] = analisis.referencia
+            inputs["necesidad_longitud"] = analisis.longitud
+        return inputs
+
+    def registrar_en_auditoria(
+        self, resultado: ResultadoPropuesta
+    ) -> ResultadoPropuesta:
+        """Entrega el resultado al registro de auditoría (no bloqueante)"""
+        if self.auditoria is not None:
+            self.auditoria.registrar(resultado)
+        return resultado
 
-{arquitectura}
+    def _conservar_traza(
+        self,
+        trazabilidad: Trazabilidad,
+        cabecera: bool,
+        atributos: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Aplica la política de muestreo y exporta la traza si se conserva"""
+        if self.muestreo is not None and not self.muestreo.decidir_cola(
+            trazabilidad, cabecera
+        ):
+            return False
+        self._exportar_traza(trazabilidad, atributos)
+        return True
+
+    def _exportar_traza(
+        self, trazabilidad: Trazabilidad, atributos: Optional[Dict[str, Any]] = None
+    ):
+        """Entrega la traza al exportador configurado (no bloqueante)"""
+        if self.exportador is not None:
+            self.exportador.exportar(trazabilidad, atributos)
 
-### Tecnologías Recomendadas
-{", ".join(template.tecnologias)}
+    def _formatear_propuesta(self, resultados: Dict[str, Any], template) -> str:
+        """Formatea en markdown estructurado las secciones generadas"""
+        bloques = [f"# PROPUESTA TÉCNICA\n\n## Área: {template.area}\n"]
 
----
+        if "problema" in resultados:
+            bloques.append(f"## 1. PROBLEMA IDENTIFICADO\n\n{resultados['problema']}\n")
 
-## 4. PRINCIPALES RIESGOS
+        if "solucion" in resultados:
+            bloques.append(
+                f"## 2. SOLUCIÓN TÉCNICA SUGERIDA\n\n{resultados['solucion']}\n"
+            )
 
-{chr(10).join(f"- **{riesgo.split(' - ')[0]}**: {riesgo.split(' - ')[1] if ' - ' in riesgo else ''}" for riesgo in riesgos)}
+        if "arquitectura" in resultados:
+            bloques.append(
+                f"## 3. ARQUITECTURA GENERAL (ALTO NIVEL)\n\n{resultados['arquitectura']}\n\n"
+                f"### Tecnologías Recomendadas\n{', '.join(template.tecnologias)}\n"
+            )
 
----
+        if "riesgos" in resultados:
+            riesgos = "\n".join(
+                f"- **{riesgo.split(' - ')[0]}**: {riesgo.split(' - ')[1] if ' - ' in riesgo else ''}"
+                for riesgo in resultados["riesgos"]
+            )
+            bloques.append(f"## 4. PRINCIPALES RIESGOS\n\n{riesgos}\n")
 
-*Propuesta generada automáticamente - Revisar y personalizar según requisitos específicos*
-"""
+        bloques.append(
+            "*Propuesta generada automáticamente - Revisar y personalizar según requisitos específicos*\n"
+        )
+        return SEPARADOR_BLOQUES.join(bloques)
 
 
 def crear_agente() -> GeneradorPropuestas:
@@ -0,0 +1,148 @@
+"""
+Análisis por fragmentos de necesidades muy largas (RFPs completos)
+Recorre la entrada en fragmentos con memoria acotada: detecta las palabras
+clave de cada área y subárea (también las que cruzan el borde entre
+fragmentos), cuenta las palabras más frecuentes y calcula un digest del texto.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from agent import PALABRAS_VACIAS, PATRON_PALABRA
+from taxonomia import palabras_clave_subareas
+from templates import palabras_clave_por_area
+
+TAMANO_FRAGMENTO = 64 * 1024
+LARGO_EXTRACTO = 500
+CAPACIDAD_CONTEO = 2_000
+_PATRON_SEPARADOR = re.compile(r"\W")
+
+
+@dataclass(frozen=True, slots=True)
+class AnalisisNecesidad:
+    """Resultado del análisis por fragmentos (sin copia del texto completo)"""
+
+    digest: str
+    referencia: str
+    longitud: int
+    extracto: str
+    # Por sector, en el orden de TEMPLATES, y luego por ruta de subárea
+    coincidencias: Dict[str, List[str]]
+    palabras_clave: Tuple[str, ...]
+    frecuencias: Tuple[int, ...] = ()
+
+
+def fragmentar_texto(texto: str, tamano: int = TAMANO_FRAGMENTO) -> Iterator[str]:
+    """Recorre un str ya cargado en fragmentos de `tamano` caracteres"""
+    for inicio in range(0, len(texto), tamano):
+        yield texto[inicio : inicio + tamano]
+
+
+def fragmentar_archivo(ruta: str, tamano: int = TAMANO_FRAGMENTO) -> Iterator[str]:
+    """Lee un archivo de texto en fragmentos sin cargarlo completo"""
+    with open(ruta, "r", encoding="utf-8", errors="replace") as archivo:
+        while True:
+            fragmento = archivo.read(tamano)
+            if not fragmento:
+                return
+            yield fragmento
+
+
+def _ultimo_separador(texto: str) -> int:
+    """Posición siguiente al último carácter que no es de palabra (0 si no hay)"""
+    for i in range(len(texto) - 1, -1, -1):
+        if _PATRON_SEPARADOR.match(texto, i):
+            return i + 1
+    return 0
+
+
+def analizar_en_fragmentos(
+    fuente: Union[str, Iterable[str]],
+    referencia: Optional[str] = None,
+    tamano_fragmento: int = TAMANO_FRAGMENTO,
+    max_palabras: int = 10,
+    capacidad_conteo: int = CAPACIDAD_CONTEO,
+) -> AnalisisNecesidad:
+    """
+    Analiza un texto (str o iterable de fragmentos) con memoria acotada.
+
+    - Las palabras clave de área se buscan sobre cada fragmento más una cola
+      del anterior, de modo que las coincidencias pueden cruzar el borde.
+    - Las palabras se cortan en el último separador de cada fragmento y el
+      resto pasa al siguiente, para no partir ninguna palabra.
+    - El conteo de palabras guarda a lo sumo 2 * capacidad_conteo entradas;
+      al superarlo se conservan las capacidad_conteo más frecuentes, por lo
+      que el top es aproximado en textos con vocabulario muy grande.
+    """
+    fragmentos = (
+        fragmentar_texto(fuente, tamano_fragmento)
+        if isinstance(fuente, str)
+        else fuente
+    )
+    palabras_por_area = palabras_clave_por_area() + palabras_clave_subareas()
+    buscadas = {p for _, palabras in palabras_por_area for p in palabras}
+    largo_cola = max((len(p) for p in buscadas), default=1) - 1
+
+    digest = hashlib.sha256()
+    encontradas: set = set()
+    conteo: Counter = Counter()
+    longitud = 0
+    extracto: List[str] = []
+    cola = ""
+    pendiente = ""
+
+    def procesar(texto: str):
+        nonlocal cola, conteo
+        minusculas = texto.lower()
+        ventana = cola + minusculas
+        for palabra in buscadas - encontradas:
+            if palabra in ventana:
+                encontradas.add(palabra)
+        cola = ventana[-largo_cola:] if largo_cola else ""
+
+        conteo.update(
+            p for p in PATRON_PALABRA.findall(minusculas) if p not in PALABRAS_VACIAS
+        )
+        if len(conteo) > 2 * capacidad_conteo:
+            conteo = Counter(dict(conteo.most_common(capacidad_conteo)))
+
+    for fragmento in fragmentos:
+        digest.update(fragmento.encode("utf-8"))
+        if longitud < LARGO_EXTRACTO:
+            extracto.append(fragmento[: LARGO_EXTRACTO - longitud])
+        longitud += len(fragmento)
+
+        texto = pendiente + fragmento
+        corte = _ultimo_separador(texto)
+        if corte == 0 and len(texto) < tamano_fragmento * 4:
+            pendiente = texto
+            continue
+        corte = corte or len(texto)
+        procesar(texto[:corte])
+        pendiente = texto[corte:]
+
+    if pendiente:
+        procesar(pendiente)
+
+    mas_frecuentes = conteo.most_common(max_palabras)
+    hexdigest = digest.hexdigest()
+    texto_extracto = "".join(extracto)
+    if longitud > LARGO_EXTRACTO:
+        texto_extracto += " [...]"
+
+    return AnalisisNecesidad(
+        digest=hexdigest,
+        referencia=referencia or f"sha256:{hexdigest}",
+        longitud=longitud,
+        extracto=texto_extracto,
+        coincidencias={
+            area: [p for p in palabras if p in encontradas]
+            for area, palabras in palabras_por_area
+            if any(p in encontradas for p in palabras)
+        },
+        palabras_clave=tuple(p for p, _ in mas_frecuentes),
+        frecuencias=tuple(n for _, n in mas_frecuentes),
+    )
@@ -1,102 +1,153 @@
-import gradio as gr
-from agent import crear_agente
+"""
+Interfaz Gradio del Generador de Propuestas Técnicas
+Las peticiones concurrentes pasan por la cola de Gradio y se agrupan en
+lotes (batch=True) que se resuelven con una sola llamada al generador.
+Las necesidades idénticas en curso (p. ej. el mismo ejemplo enviado por
+muchos usuarios a la vez) se calculan una sola vez.
+"""
 
-agente = None
+import argparse
+from typing import List
 
+import gradio as gr
 
-def inicializar_agente(modelo: str, temperatura: float):
-    global agente
-    try:
-        agente = crear_agente(model_name=modelo, temperature=temperatura)
-        return "Agente inicializado correctamente"
-    except Exception as e:
-        return f"Error al inicializar: {str(e)}"
+from agent import GeneradorPropuestas, listar_areas_disponibles
+from coalescencia import CoalescedorPropuestas
+
+AREA_AUTOMATICA = "Detección automática"
+CONCURRENCIA_POR_DEFECTO = 4
+MAX_LOTE_POR_DEFECTO = 16
 
+generador = CoalescedorPropuestas(GeneradorPropuestas())
 
-def generar_propuesta(necesidad: str, modelo: str, temperatura: float):
-    global agente
 
-    if not necesidad or len(necesidad.strip()) < 10:
-        return "Por favor, proporciona una descripción más detallada de la necesidad de negocio (mínimo 10 caracteres)."
+def generar_lote(necesidades: List[str], areas: List[str]) -> List[List[str]]:
+    """
+    Función por lotes para la cola de Gradio: recibe una lista por input y
+    retorna una lista por output, en el mismo orden.
+    """
+    propuestas = [""] * len(necesidades)
+    indices, validas, areas_validas = [], [], []
 
-    if agente is None:
-        try:
-            agente = crear_agente(model_name=modelo, temperature=temperatura)
-        except Exception as e:
-            return f"Error al inicializar el agente: {str(e)}\n\nAsegúrate de tener la variable de entorno OPENAI_API_KEY configurada."
+    for i, (necesidad, area) in enumerate(zip(necesidades, areas)):
+        if not necesidad or len(necesidad.strip()) < 10:
+            propuestas[i] = (
+                "Por favor, proporciona una descripción más detallada de la "
+                "necesidad de negocio (mínimo 10 caracteres)."
+            )
+            continue
+        indices.append(i)
+        validas.append(necesidad)
+        areas_validas.append(None if area == AREA_AUTOMATICA else area)
 
     try:
-        propuesta = agente.generar_propuesta(necesidad_negocio=necesidad)
-        return propuesta
+        resultados = generador.generar_propuestas(
+            validas, areas_validas, incluir_trazabilidad=False
+        )
     except Exception as e:
-        return f"Error al generar la propuesta: {str(e)}"
-
-
-with gr.Blocks(title="Generador de Propuestas Técnicas", theme=gr.themes.Soft()) as app:
-    gr.Markdown("# 📝 Generador de Propuestas Técnicas")
-    gr.Markdown(
-        "Transforma necesidades de negocio ambiguas en propuestas técnicas estructuradas y profesionales."
+        for i in indices:
+            propuestas[i] = f"Error al generar la propuesta: {str(e)}"
+        return [propuestas]
+
+    for i, resultado in zip(indices, resultados):
+        propuestas[i] = (
+            resultado.propuesta
+            if resultado.exitoso
+            else f"Error al generar la propuesta: {resultado.error}"
+        )
+    return [propuestas]
+
+
+def crear_app(
+    concurrencia: int = CONCURRENCIA_POR_DEFECTO,
+    max_lote: int = MAX_LOTE_POR_DEFECTO,
+) -> gr.Blocks:
+    """Construye la interfaz con la cola por lotes configurada"""
+    with gr.Blocks(
+        title="Generador de Propuestas Técnicas", theme=gr.themes.Soft()
+    ) as app:
+        gr.Markdown("# 📝 Generador de Propuestas Técnicas")
+        gr.Markdown(
+            "Transforma necesidades de negocio ambiguas en propuestas técnicas estructuradas y profesionales."
+        )
+
+        with gr.Row():
+            with gr.Column(scale=1):
+                gr.Markdown("### Configuración")
+                area = gr.Dropdown(
+                    choices=[AREA_AUTOMATICA] + listar_areas_disponibles(),
+                    value=AREA_AUTOMATICA,
+                    label="Área",
+                    info="Fuerza un área o deja que se detecte automáticamente",
+                )
+
+            with gr.Column(scale=2):
+                gr.Markdown("### Descripción de la Necesidad")
+                necesidad_input = gr.Textbox(
+                    label="Necesidad de Negocio",
+                    placeholder="Ejemplo: Nuestra empresa necesita optimizar el proceso de atención al cliente que actualmente toma demasiado tiempo...",
+                    lines=5,
+                    info="Describe brevemente la necesidad o problema de negocio",
+                )
+
+                btn_generar = gr.Button("🚀 Generar Propuesta", variant="primary")
+
+        gr.Markdown("---")
+
+        with gr.Row():
+            gr.Markdown("### Propuesta Técnica Generada")
+
+        propuesta_output = gr.Markdown(
+            value="*La propuesta técnica aparecerá aquí después de generar...*",
+            elem_id="propuesta-output",
+        )
+
+        btn_generar.click(
+            fn=generar_lote,
+            inputs=[necesidad_input, area],
+            outputs=propuesta_output,
+            api_name="generar_propuesta",
+            batch=True,
+            max_batch_size=max_lote,
+            concurrency_limit=concurrencia,
+        )
+
+        gr.Markdown("---")
+        gr.Markdown("""
+        ### Estructura de la Propuesta
+        La propuesta generada incluye:
+        1. **Problema Identificado** - Análisis del gap entre situación actual y deseada
+        2. **Solución Técnica Sugerida** - Componentes, tecnologías y flujo de datos
+        3. **Arquitectura General** - Componentes, interacciones y capas
+        4. **Principales Riesgos** - Riesgos técnicos e implementaciones con mitigaciones
+        """)
+
+    app.queue(default_concurrency_limit=concurrencia)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interfaz Gradio del generador")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--puerto", type=int, default=7860)
+    parser.add_argument(
+        "--concurrencia",
+        type=int,
+        default=CONCURRENCIA_POR_DEFECTO,
+        help="Lotes que se procesan a la vez",
     )
-
-    with gr.Row():
-        with gr.Column(scale=1):
-            gr.Markdown("### Configuración")
-            modelo = gr.Dropdown(
-                choices=["gpt-4o-mini", "gpt-4o", "gpt-3.5-turbo"],
-                value="gpt-4o-mini",
-                label="Modelo",
-                info="Modelo de OpenAI a utilizar",
-            )
-            temperatura = gr.Slider(
-                minimum=0.0,
-                maximum=1.0,
-                value=0.7,
-                step=0.1,
-                label="Temperatura",
-                info="Controla la creatividad de las respuestas",
-            )
-            btn_init = gr.Button("Inicializar Agente", variant="secondary")
-            status_init = gr.Textbox(label="Estado", interactive=False)
-
-            btn_init.click(
-                fn=inicializar_agente, inputs=[modelo, temperatura], outputs=status_init
-            )
-
-        with gr.Column(scale=2):
-            gr.Markdown("### Descripción de la Necesidad")
-            necesidad_input = gr.Textbox(
-                label="Necesidad de Negocio",
-                placeholder="Ejemplo: Nuestra empresa necesita optimizar el proceso de atención al cliente que actualmente toma demasiado tiempo...",
-                lines=5,
-                info="Describe brevemente la necesidad o problema de negocio",
-            )
-
-            btn_generar = gr.Button("🚀 Generar Propuesta", variant="primary")
-
-    gr.Markdown("---")
-
-    with gr.Row():
-        gr.Markdown("### Propuesta Técnica Generada")
-
-    propuesta_output = gr.Markdown(
-        value="*La propuesta técnica aparecerá aquí después de generar...*",
-        elem_id="propuesta-output",
+    parser.add_argument(
+        "--max-lote",
+        type=int,
+        default=MAX_LOTE_POR_DEFECTO,
+        help="Máximo de peticiones agrupadas en una llamada al generador",
     )
+    args = parser.parse_args()
 
-    btn_generar.click(
-        fn=generar_propuesta,
-        inputs=[necesidad_input, modelo, temperatura],
-        outputs=propuesta_output,
+    crear_app(args.concurrencia, args.max_lote).launch(
+        server_name=args.host, server_port=args.puerto
     )
 
-    gr.Markdown("---")
-    gr.Markdown("""
-    ### Estructura de la Propuesta
-    La propuesta generada incluye:
-    1. **Pro - Análisis del gap entre situación actual y deseada
-    2blema Identificado**. **Solución Técnica Sugerida** - Componentes, tecnologías y flujo de datos
-    3. **Arquitectura General** - Componentes, interacciones y capas
-    4. **Principales Riesgos** - Riesgos técnicos e implementaciones con mitigaciones
-    """)
-
-app.launch(server_name="0.0.0.0", server_port=7860)
+
+if __name__ == "__main__":
+    main()
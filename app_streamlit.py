@@ -3,9 +3,15 @@ Generador de Propuestas Técnicas - App Streamlit
 Sin API key - Usa templates predefinidos + LangChain Skills
 """
 
+import re
+import uuid
+from datetime import datetime
+from typing import Sequence
+
 import streamlit as st
 
 from agent import (
+    CacheIncremental,
     EstadoEjecucion,
     GeneradorPropuestas,
     crear_agente,
@@ -17,6 +23,59 @@ from langchain_skills import (
     PatronOrquestacion,
     crear_skills,
 )
+from ejemplos import EJEMPLOS, cargar_snapshot, propuesta_de_ejemplo
+from historial_db import HistorialPropuestas
+from historial_sesion import HistorialSesion
+from indice_vectorial import IndiceVectorial
+from previsualizacion import Previsualizador
+from templates import CoincidenciaPalabra
+
+_PATRON_MARKDOWN = re.compile(r"([\\`*_{}\[\]()#+\-.!|~<>$:])")
+
+
+@st.cache_resource
+def obtener_previsualizador() -> Previsualizador:
+    """Previsualizador compartido por todas las sesiones del proceso"""
+    return Previsualizador()
+
+
+@st.cache_resource
+def obtener_snapshot() -> dict:
+    """Ejemplos, diagramas y planes precalculados (una lectura por worker)"""
+    return cargar_snapshot()
+
+
+@st.cache_resource
+def obtener_historial_db() -> HistorialPropuestas:
+    """Historial persistente compartido por todas las sesiones del proceso"""
+    return HistorialPropuestas()
+
+
+@st.cache_resource
+def obtener_indice_similares() -> IndiceVectorial:
+    """Índice vectorial de las necesidades del historial persistente"""
+    indice = IndiceVectorial()
+    for lote in obtener_historial_db().iterar_necesidades():
+        ids, necesidades = zip(*lote)
+        indice.agregar_varios(necesidades, ids)
+    return indice
+
+
+def mostrar_similares(necesidad: str, k: int = 3):
+    """Muestra las propuestas pasadas más parecidas a la necesidad"""
+    similares = obtener_indice_similares().buscar(necesidad, k=k)
+    if not similares:
+        return
+
+    with st.expander("🔁 Propuestas similares anteriores", expanded=False):
+        for id_propuesta, similitud in similares:
+            detalle = obtener_historial_db().obtener(id_propuesta)
+            if detalle:
+                st.markdown(
+                    f"- **#{id_propuesta}** · {detalle['area'].upper()} · "
+                    f"similitud {similitud:.2f}: {detalle['necesidad'][:120]}"
+                )
+
 
 if "agente" not in st.session_state:
     st.session_state.agente = crear_agente()
@@ -24,52 +83,17 @@ if "agente" not in st.session_state:
 if "skills" not in st.session_state:
     st.session_state.skills = crear_skills()
 
+if "cache_incremental" not in st.session_state:
+    st.session_state.cache_incremental = CacheIncremental()
+
+if "sesion_id" not in st.session_state:
+    st.session_state.sesion_id = uuid.uuid4().hex
+
 if "historial" not in st.session_state:
-    st.session_state.historial = []
-
-
-EJEMPLOS = {
-    "fintech": {
-        "input": "Nuestra fintech necesita procesar pagos en tiempo real con cumplimiento PCI-DSS, detección de fraude y soporte para múltiples métodos de pago.",
-        "area": "fintech",
-    },
-    "app_moviles": {
-        "input": "Queremos desarrollar una aplicación móvil para que nuestros clientes puedan gestionar sus cuentas y hacer transferencias.",
-        "area": "app_moviles",
-    },
-    "blockchain": {
-        "input": "Necesitamos crear un sistema de trazabilidad para productos agrícolas que certifique el origen.",
-        "area": "blockchain",
-    },
-    "arquitectura": {
-        "input": "Tenemos un monolito legacy que queremos migrar a microservicios para escalar mejor.",
-        "area": "arquitectura",
-    },
-    "seguros": {
-        "input": "Nuestra aseguradora quiere digitalizar el proceso de cotización y emisión de pólizas.",
-        "area": "seguros",
-    },
-    "medica": {
-        "input": "Necesitamos un sistema integral para gestionar pacientes, citas y historiales clínicos.",
-        "area": "medica",
-    },
-    "telecomunicaciones": {
-        "input": "Como operador necesitamos monitorear la red en tiempo real y automatizar provisioning.",
-        "area": "telecomunicaciones",
-    },
-    "transporte": {
-        "input": "Tenemos una flota de 50 camiones y necesitamos optimizar rutas y tracking en tiempo real.",
-        "area": "transporte",
-    },
-    "almacenamiento": {
-        "input": "Nuestra bodega tiene problemas con el inventario y queremos optimizar ubicaciones.",
-        "area": "almacenamiento",
-    },
-    "combustibles": {
-        "input": "Gestionamos 20 estaciones de servicio y necesitamos monitorear niveles de tanques.",
-        "area": "combustibles",
-    },
-}
+    st.session_state.historial = HistorialSesion()
+
+# Precalienta el snapshot de ejemplos al iniciar el worker
+obtener_snapshot()
 
 
 def mostrar_trazabilidad(trazabilidad):
@@ -90,9 +114,7 @@ def mostrar_trazabilidad(trazabilidad):
             icon = (
                 "✅"
                 if paso["estado"] == "completado"
-                else "⏳"
-                if paso["estado"] != "error"
-                else "❌"
+                else "⏳" if paso["estado"] != "error" else "❌"
             )
             st.markdown(f"{icon} **{i}. {paso['estado'].replace('_', ' ').title()}**")
             st.markdown(f"   - {paso['detalle']}")
@@ -103,6 +125,80 @@ def mostrar_trazabilidad(trazabilidad):
                 st.markdown(f"- **{error['tipo']}**: {error['mensaje']}")
 
 
+def _escapar_markdown(texto: str) -> str:
+    return _PATRON_MARKDOWN.sub(r"\\\1", texto)
+
+
+def resaltar_coincidencias(
+    texto: str, posiciones: Sequence[CoincidenciaPalabra], area: str
+) -> str:
+    """
+    Markdown del texto con las palabras clave resaltadas a partir de las
+    posiciones de la detección (sin volver a buscarlas). Las del área
+    elegida y de sus ancestros van en naranja y las de otras áreas en gris.
+    """
+    ruta = area + "/"
+    partes = []
+    cursor = 0
+    for coincidencia in posiciones:
+        if coincidencia.inicio < cursor:
+            continue  # solapada con una anterior (p. ej. "app" dentro de "apps")
+        elegida = ruta.startswith(coincidencia.area + "/")
+        color = "orange" if elegida else "gray"
+        fragmento = texto[coincidencia.inicio : coincidencia.fin]
+        partes.append(_escapar_markdown(texto[cursor : coincidencia.inicio]))
+        partes.append(f":{color}[**{_escapar_markdown(fragmento)}**]")
+        cursor = coincidencia.fin
+    partes.append(_escapar_markdown(texto[cursor:]))
+    return "".join(partes)
+
+
+def mostrar_vista_previa(sesion_id: str, necesidad: str):
+    """Muestra el área detectada y las palabras clave encontradas en vivo"""
+    vista = obtener_previsualizador().obtener(sesion_id)
+
+    if vista is None or vista.necesidad != necesidad:
+        st.caption("⏳ Analizando entrada...")
+        return
+
+    estado = "⚡ propuesta lista" if vista.resultado else "⏳ pre-generando"
+    st.caption(f"🔎 Área detectada: **{vista.area.upper()}** · {estado}")
+    if vista.posiciones:
+        st.markdown(resaltar_coincidencias(necesidad, vista.posiciones, vista.area))
+    for area, palabras in vista.coincidencias.items():
+        st.caption(f"- {area}: {', '.join(palabras)}")
+
+
+if hasattr(st, "fragment"):
+    mostrar_vista_previa = st.fragment(run_every=1.0)(mostrar_vista_previa)
+
+
+def mostrar_historial_persistente(por_pagina: int = 10):
+    """Historial persistente con búsqueda de texto completo y paginación"""
+    historial_db = obtener_historial_db()
+
+    st.markdown("### 🗄️ Historial Persistente")
+    col_busqueda, col_pagina = st.columns([3, 1])
+    busqueda = col_busqueda.text_input(
+        "Buscar en propuestas anteriores",
+        placeholder="pagos, inventario, telemedicina...",
+    )
+    total = historial_db.contar(busqueda)
+    paginas = max(1, (total + por_pagina - 1) // por_pagina)
+    pagina = col_pagina.number_input(
+        f"Página (de {paginas})", min_value=1, max_value=paginas, value=1
+    )
+    st.caption(f"{total} propuestas encontradas")
+
+    for entrada in historial_db.listar(int(pagina), por_pagina, busqueda):
+        fecha = datetime.fromtimestamp(entrada.creado).strftime("%Y-%m-%d %H:%M")
+        with st.expander(f"#{entrada.id} · {entrada.area.upper()} · {fecha}"):
+            st.markdown(f"**Input:** {entrada.necesidad}")
+            detalle = historial_db.obtener(entrada.id)
+            if detalle:
+                st.markdown(detalle["propuesta"])
+
+
 def mostrar_documentacion():
     """Muestra la documentación del sistema"""
     with st.expander("📚 Documentación del Sistema", expanded=False):
@@ -181,6 +277,12 @@ with tab1:
             help="Muestra el flujo de ejecución del agente",
         )
 
+        vista_previa = st.toggle(
+            "Vista previa en vivo",
+            value=False,
+            help="Detecta el área mientras escribes y pre-genera la propuesta",
+        )
+
         st.divider()
 
         st.markdown("### 📋 Cargar Ejemplo")
@@ -207,6 +309,16 @@ with tab1:
             help="Describe brevemente la necesidad de negocio (mínimo 10 caracteres)",
         )
 
+        area_elegida = (
+            None if area_seleccionada == "Auto-detectar" else area_seleccionada
+        )
+
+        if vista_previa and len(necesidad_input.strip()) >= 10:
+            obtener_previsualizador().solicitar(
+                st.session_state.sesion_id, necesidad_input, area_elegida
+            )
+            mostrar_vista_previa(st.session_state.sesion_id, necesidad_input)
+
         generar = st.button(
             "🚀 Generar Propuesta",
             type="primary",
@@ -221,32 +333,56 @@ with tab1:
             if len(necesidad_input.strip()) < 10:
                 st.error("La descripción debe tener al menos 10 caracteres")
             else:
-                area = (
-                    None if area_seleccionada == "Auto-detectar" else area_seleccionada
+                resultado = propuesta_de_ejemplo(
+                    obtener_snapshot(),
+                    necesidad_input,
+                    area_elegida,
+                    incluir_trazabilidad=ver_trazabilidad,
                 )
+                desde_snapshot = resultado is not None
+                if resultado is None and vista_previa:
+                    resultado = obtener_previsualizador().resultado_para(
+                        st.session_state.sesion_id, necesidad_input, area_elegida
+                    )
+
+                mostrar_similares(necesidad_input)
 
                 with st.spinner("Generando propuesta..."):
-                    resultado = st.session_state.agente.generar_propuesta(
-                        necesidad=necesidad_input,
-                        area_especifica=area,
-                        incluir_trazabilidad=ver_trazabilidad,
-                    )
+                    especulativa = resultado is not None and not desde_snapshot
+                    if resultado is None:
+                        resultado = st.session_state.agente.generar_propuesta(
+                            necesidad=necesidad_input,
+                            area_especifica=area_elegida,
+                            incluir_trazabilidad=ver_trazabilidad,
+                            cache=st.session_state.cache_incremental,
+                        )
 
                     if resultado.exitoso:
                         st.success(
                             f"✅ Propuesta generada - Área: **{resultado.area_detectada.upper()}**"
                         )
+                        if especulativa:
+                            st.caption("⚡ Servida desde la pre-generación en vivo")
+                        if desde_snapshot:
+                            st.caption("📦 Ejemplo precalculado")
+                        if resultado.etapas_reutilizadas:
+                            st.caption(
+                                "♻️ Etapas reutilizadas de la generación anterior: "
+                                + ", ".join(resultado.etapas_reutilizadas)
+                            )
                         st.markdown(resultado.propuesta)
 
                         if ver_trazabilidad and resultado.trazabilidad:
+                            if desde_snapshot:
+                                st.caption("Traza de la generación precalculada")
                             mostrar_trazabilidad(resultado.trazabilidad)
 
-                        st.session_state.historial.append(
-                            {
-                                "necesidad": necesidad_input,
-                                "area": resultado.area_detectada,
-                                "propuesta": resultado.propuesta,
-                            }
+                        id_guardado = obtener_historial_db().guardar(resultado)
+                        obtener_indice_similares().agregar(necesidad_input, id_guardado)
+                        st.session_state.historial.agregar(
+                            necesidad_input,
+                            resultado.area_detectada,
+                            resultado.propuesta,
                         )
                     else:
                         st.error(f"❌ Error: {resultado.error}")
@@ -260,13 +396,22 @@ with tab1:
         st.divider()
         st.markdown("### 📜 Historial de Propuestas")
 
-        for i, item in enumerate(reversed(st.session_state.historial[-5:]), 1):
+        for item in st.session_state.historial.entradas(ultimas=5):
             with st.expander(
-                f"Propuesta {len(st.session_state.historial) - i + 1}: {item['area'].upper()}",
+                f"Propuesta {item.id}: {item.area.upper()}",
                 expanded=False,
             ):
-                st.markdown(f"**Input:** {item['necesidad'][:100]}...")
-                st.markdown(item["propuesta"])
+                st.markdown(f"**Input:** {item.necesidad[:100]}...")
+                # Solo se descomprime (o se lee de disco) al abrir la entrada
+                if st.toggle("Ver propuesta", key=f"ver_historial_{item.id}"):
+                    propuesta = st.session_state.historial.obtener_propuesta(item.id)
+                    if propuesta is None:
+                        st.caption("Entrada descartada del historial de la sesión")
+                    else:
+                        st.markdown(propuesta)
+
+    st.divider()
+    mostrar_historial_persistente()
 
 
 with tab2:
@@ -306,9 +451,12 @@ with tab2:
             servicios = [s.strip() for s in servicios_input.split(",") if s.strip()]
 
             with st.spinner("Generando arquitectura..."):
-                resultado = st.session_state.skills.generar_arquitectura_completa(
-                    tipo=tipo_enum, contexto=contexto, servicios=servicios
-                )
+                if servicios:
+                    resultado = st.session_state.skills.generar_arquitectura_completa(
+                        tipo=tipo_enum, contexto=contexto, servicios=servicios
+                    )
+                else:
+                    resultado = obtener_snapshot()["arquitecturas"][tipo_enum.value]
 
                 st.success("✅ Arquitectura generada")
 
@@ -366,11 +514,7 @@ with tab3:
             patron_enum = PatronOrquestacion(patron)
 
             with st.spinner("Generando plan de orquestación..."):
-                resultado_orq = (
-                    st.session_state.skills.orquestacion.generar_plan_ejecucion(
-                        necesidad=necesidad_orquestacion, patron=patron_enum
-                    )
-                )
+                resultado_orq = obtener_snapshot()["planes"][patron_enum.value]
 
                 st.success("✅ Plan de orquestación generado")
 
@@ -412,11 +556,7 @@ with tab3:
                         else TipoArquitectura.SERVERLESS
                     )
 
-                    resultado_arq = (
-                        st.session_state.skills.generar_arquitectura_completa(
-                            tipo=tipo_arq, contexto=necesidad_orquestacion, servicios=[]
-                        )
-                    )
+                    resultado_arq = obtener_snapshot()["arquitecturas"][tipo_arq.value]
 
                     st.markdown(resultado_arq["diagrama"])
 
@@ -0,0 +1,271 @@
+"""
+Registro de auditoría JSONL en segundo plano
+Cada ResultadoPropuesta (con su Trazabilidad) y cada traza exportada se
+agrega como una línea JSON a un archivo de solo anexado. La petición solo
+encola el objeto; un hilo de fondo serializa por lotes, hace fsync cada
+`intervalo_fsync_s`, rota el archivo por tamaño y vacía la cola al cerrar.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from agent import ResultadoPropuesta, Trazabilidad
+
+POLITICAS = ("descartar", "bloquear")
+_FIN = object()
+
+
+def trazabilidad_a_dict(trazabilidad: Trazabilidad) -> Dict[str, Any]:
+    """Traza completa en tipos JSON"""
+    return {
+        **trazabilidad.obtener_resumen(),
+        "inicio_ns": trazabilidad.inicio_ns,
+        "fin_ns": trazabilidad.fin_ns,
+        "pasos": trazabilidad.pasos,
+        "errores": trazabilidad.errores,
+    }
+
+
+def resultado_a_registro(resultado: ResultadoPropuesta) -> Dict[str, Any]:
+    """Registro de auditoría de un resultado"""
+    return {
+        "tipo": "resultado",
+        "exitoso": resultado.exitoso,
+        "area_detectada": resultado.area_detectada,
+        "error": resultado.error,
+        "inputs": resultado.inputs,
+        "outputs": resultado.outputs,
+        "propuesta": resultado.propuesta,
+        "etapas_reutilizadas": resultado.etapas_reutilizadas,
+        "trazabilidad": (
+            trazabilidad_a_dict(resultado.trazabilidad)
+            if resultado.trazabilidad
+            else resultado.resumen_trazabilidad
+        ),
+    }
+
+
+class RegistroAuditoria:
+    """
+    Escritor JSONL de fondo alimentado por una cola acotada.
+
+    - politica="descartar": si la cola está llena el registro se descarta y
+      se cuenta en `descartados`; la petición nunca espera.
+    - politica="bloquear": la petición espera hasta `timeout_bloqueo_s`
+      (None: sin límite) y solo entonces descarta.
+    - Al superar `max_bytes_archivo` el archivo pasa a `ruta.1` (y así hasta
+      `max_archivos`); los más antiguos se borran.
+    - cerrar() (también al salir del intérprete) escribe lo pendiente y hace
+      fsync.
+
+    Se puede pasar como `auditoria` y como `exportador` de GeneradorPropuestas.
+    """
+
+    def __init__(
+        self,
+        ruta: str,
+        politica: str = "descartar",
+        capacidad: int = 10_000,
+        tamano_lote: int = 256,
+        intervalo_escritura_s: float = 0.2,
+        intervalo_fsync_s: float = 1.0,
+        max_bytes_archivo: int = 50_000_000,
+        max_archivos: int = 10,
+        timeout_bloqueo_s: Optional[float] = None,
+    ):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política no soportada: {politica}. Usa {POLITICAS}")
+        self.ruta = ruta
+        self.politica = politica
+        self.tamano_lote = tamano_lote
+        self.intervalo_escritura_s = intervalo_escritura_s
+        self.intervalo_fsync_s = intervalo_fsync_s
+        self.max_bytes_archivo = max_bytes_archivo
+        self.max_archivos = max_archivos
+        self.timeout_bloqueo_s = timeout_bloqueo_s
+        self._estadisticas = dict.fromkeys(
+            ("encolados", "escritos", "descartados", "errores", "rotaciones", "fsyncs"),
+            0,
+        )
+        self._lock = threading.Lock()
+        self._cola: "queue.Queue" = queue.Queue(maxsize=capacidad)
+        self._archivo = None
+        # cerrar() espera a los put() en curso antes de encolar _FIN, así
+        # nada aceptado queda detrás del fin y se pierde
+        self._cierre = threading.Condition()
+        self._cerrado = False
+        self._en_curso = 0
+        self._hilo = threading.Thread(target=self._bucle, name="auditoria", daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def _contar(self, clave: str, cantidad: int = 1):
+        with self._lock:
+            self._estadisticas[clave] += cantidad
+
+    def _encolar(self, item: tuple) -> bool:
+        with self._cierre:
+            if self._cerrado:
+                self._contar("descartados")
+                return False
+            self._en_curso += 1
+        try:
+            if self.politica == "bloquear":
+                self._cola.put(item, timeout=self.timeout_bloqueo_s)
+            else:
+                self._cola.put_nowait(item)
+        except queue.Full:
+            self._contar("descartados")
+            return False
+        finally:
+            with self._cierre:
+                self._en_curso -= 1
+                if not self._en_curso:
+                    self._cierre.notify_all()
+        self._contar("encolados")
+        return True
+
+    def registrar(self, resultado: ResultadoPropuesta) -> bool:
+        """Encola un resultado; retorna False si se descartó"""
+        return self._encolar(("resultado", resultado, None, time.time_ns()))
+
+    def exportar(
+        self, trazabilidad: Trazabilidad, atributos: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Encola una traza (interfaz de exportador de GeneradorPropuestas)"""
+        return self._encolar(("traza", trazabilidad, atributos, time.time_ns()))
+
+    def forzar_envio(self):
+        """Bloquea hasta que todo lo encolado se haya escrito"""
+        self._cola.join()
+
+    def cerrar(self):
+        """Escribe lo pendiente, hace fsync y detiene el hilo (idempotente)"""
+        with self._cierre:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            self._cierre.wait_for(lambda: not self._en_curso)
+        self._cola.put(_FIN)
+        self._hilo.join()
+        atexit.unregister(self.cerrar)
+
+    def obtener_estadisticas(self) -> Dict[str, int]:
+        """Registros encolados, escritos, descartados, errores, rotaciones y fsyncs"""
+        with self._lock:
+            return {**self._estadisticas, "en_cola": self._cola.qsize()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _bucle(self):
+        ultimo_fsync = time.monotonic()
+        pendiente_fsync = False
+        fin = False
+        while not fin:
+            lote: List[tuple] = []
+            try:
+                item = self._cola.get(timeout=self.intervalo_escritura_s)
+                while True:
+                    if item is _FIN:
+                        fin = True
+                        break
+                    lote.append(item)
+                    if len(lote) >= self.tamano_lote:
+                        break
+                    item = self._cola.get_nowait()
+            except queue.Empty:
+                pass
+
+            if lote:
+                try:
+                    self._escribir(lote)
+                    pendiente_fsync = True
+                except Exception:
+                    self._contar("errores", len(lote))
+
+            if pendiente_fsync and (
+                fin or time.monotonic() - ultimo_fsync >= self.intervalo_fsync_s
+            ):
+                self._sincronizar()
+                ultimo_fsync = time.monotonic()
+                pendiente_fsync = False
+
+            for _ in range(len(lote) + fin):
+                self._cola.task_done()
+
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def _serializar(self, item: tuple) -> bytes:
+        tipo, objeto, atributos, ts_ns = item
+        if tipo == "resultado":
+            registro = resultado_a_registro(objeto)
+        else:
+            registro = {
+                "tipo": "traza",
+                "atributos": atributos or {},
+                "trazabilidad": trazabilidad_a_dict(objeto),
+            }
+        registro = {
+            "ts": datetime.fromtimestamp(ts_ns / 1e9).isoformat(),
+            "ts_ns": ts_ns,
+            "pid": os.getpid(),
+            **registro,
+        }
+        linea = json.dumps(registro, ensure_ascii=False, default=str)
+        return (linea + "\n").encode("utf-8")
+
+    def _escribir(self, lote: List[tuple]):
+        lineas = [self._serializar(item) for item in lote]
+        if self._archivo is None:
+            self._archivo = open(self.ruta, "ab")
+        # El límite se revisa por línea: un lote puede rotar varias veces.
+        # Solo una línea más grande que el límite queda sola en su archivo.
+        tamano = self._archivo.tell()
+        pendientes: List[bytes] = []
+        for linea in lineas:
+            if tamano and tamano + len(linea) > self.max_bytes_archivo:
+                self._archivo.write(b"".join(pendientes))
+                pendientes.clear()
+                self._rotar()
+                tamano = 0
+            pendientes.append(linea)
+            tamano += len(linea)
+        self._archivo.write(b"".join(pendientes))
+        self._archivo.flush()
+        self._contar("escritos", len(lote))
+
+    def _sincronizar(self):
+        if self._archivo is not None:
+            os.fsync(self._archivo.fileno())
+            self._contar("fsyncs")
+
+    def _rotar(self):
+        """ruta -> ruta.1 -> ruta.2 ...; el más antiguo se elimina"""
+        self._archivo.flush()
+        self._sincronizar()
+        self._archivo.close()
+        for n in range(self.max_archivos - 1, 0, -1):
+            origen = f"{self.ruta}.{n}"
+            if os.path.exists(origen):
+                if n + 1 >= self.max_archivos:
+                    os.remove(origen)
+                else:
+                    os.replace(origen, f"{self.ruta}.{n + 1}")
+        if self.max_archivos > 1:
+            os.replace(self.ruta, f"{self.ruta}.1")
+        else:
+            os.remove(self.ruta)
+        self._archivo = open(self.ruta, "ab")
+        self._contar("rotaciones")
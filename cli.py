@@ -0,0 +1,169 @@
+"""
+Línea de comandos del generador de propuestas
+Genera propuestas desde scripts sin levantar Streamlit ni Gradio. Solo
+importa agent y templates para arrancar rápido. Uso:
+
+    python cli.py "Nuestra fintech necesita procesar pagos en tiempo real"
+    python cli.py --area medica --formato json "Telemedicina para clínicas"
+    python cli.py --lote necesidades.txt --formato json > propuestas.jsonl
+    python cli.py --areas
+    python cli.py --profile "Migrar el monolito a microservicios"
+
+En --lote cada línea es una necesidad, o un objeto JSON con "necesidad" y
+opcionalmente "area"; "-" lee de stdin. Una línea JSON inválida se reporta
+en stderr con su número, cuenta como fallida y el lote sigue. La salida va
+a stdout y el perfil de --profile a stderr.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agent import SECCIONES, SEPARADOR_BLOQUES, GeneradorPropuestas, Trazabilidad
+from templates import TEMPLATES, listar_areas
+
+
+def leer_lote(ruta: str) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    """
+    (necesidad, área) por cada línea no vacía del archivo o de stdin. Las
+    líneas JSON mal formadas o sin "necesidad" se reportan en stderr y
+    producen (None, None) para que el llamador las cuente como fallidas.
+    """
+    archivo = sys.stdin if ruta == "-" else open(ruta, encoding="utf-8")
+    try:
+        for numero, linea in enumerate(archivo, 1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            if linea.startswith("{"):
+                try:
+                    datos = json.loads(linea)
+                    necesidad = datos["necesidad"]
+                except json.JSONDecodeError as e:
+                    print(f"Línea {numero}: JSON inválido ({e.msg})", file=sys.stderr)
+                    yield None, None
+                except KeyError:
+                    print(f'Línea {numero}: falta "necesidad"', file=sys.stderr)
+                    yield None, None
+                else:
+                    yield necesidad, datos.get("area")
+            else:
+                yield linea, None
+    finally:
+        if archivo is not sys.stdin:
+            archivo.close()
+
+
+def perfil_etapas(trazabilidad: Trazabilidad) -> List[Tuple[str, float]]:
+    """
+    (paso, ms) de cada paso de la traza. Las etapas con inicio_ns/fin_ns
+    usan su duración medida; el resto, el tiempo hasta el paso siguiente.
+    """
+    pasos = trazabilidad.pasos
+    perfil = []
+    for i, paso in enumerate(pasos):
+        metadata = paso["metadata"]
+        nombre = metadata.get("etapa") or paso["estado"]
+        if "inicio_ns" in metadata:
+            duracion_ns = metadata["fin_ns"] - metadata["inicio_ns"]
+        elif i + 1 < len(pasos):
+            duracion_ns = pasos[i + 1]["timestamp_ns"] - paso["timestamp_ns"]
+        else:
+            duracion_ns = max(0, trazabilidad.fin_ns - paso["timestamp_ns"])
+        perfil.append((nombre, duracion_ns / 1e6))
+    return perfil
+
+
+def imprimir_perfil(trazabilidad: Optional[Trazabilidad], necesidad: str):
+    if trazabilidad is None:
+        return
+    total_ms = (trazabilidad.fin_ns - trazabilidad.inicio_ns) / 1e6
+    print(f"\n# perfil: {necesidad[:60]}", file=sys.stderr)
+    for nombre, ms in perfil_etapas(trazabilidad):
+        print(f"  {nombre:28s} {ms:9.3f} ms", file=sys.stderr)
+    print(f"  {'total':28s} {total_ms:9.3f} ms", file=sys.stderr)
+
+
+def resultado_a_dict(resultado) -> Dict[str, Any]:
+    """Campos serializables del resultado para la salida JSON"""
+    return {
+        "exitoso": resultado.exitoso,
+        "area_detectada": resultado.area_detectada,
+        "propuesta": resultado.propuesta,
+        "error": resultado.error,
+        "inputs": resultado.inputs,
+        "outputs": resultado.outputs,
+        "trazabilidad": (
+            resultado.trazabilidad.obtener_resumen()
+            if resultado.trazabilidad
+            else resultado.resumen_trazabilidad
+        ),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generador de propuestas técnicas")
+    parser.add_argument("necesidad", nargs="?", help="Necesidad de negocio")
+    parser.add_argument("--area", choices=listar_areas(), help="Fuerza un área")
+    parser.add_argument(
+        "--lote", help="Archivo con una necesidad por línea ('-': stdin)"
+    )
+    parser.add_argument("--areas", action="store_true", help="Lista las áreas")
+    parser.add_argument("--formato", choices=("md", "json"), default="md")
+    parser.add_argument(
+        "--secciones", help=f"Subconjunto separado por comas de {','.join(SECCIONES)}"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="Tiempo por etapa en stderr"
+    )
+    args = parser.parse_args(argv)
+
+    if args.areas:
+        if args.formato == "json":
+            areas = {area: t.descripcion for area, t in TEMPLATES.items()}
+            print(json.dumps(areas, ensure_ascii=False, indent=2))
+        else:
+            for area, template in TEMPLATES.items():
+                print(f"{area:20s} {template.descripcion}")
+        return 0
+
+    if args.lote:
+        entradas = leer_lote(args.lote)
+    elif args.necesidad:
+        entradas = iter([(args.necesidad, args.area)])
+    else:
+        parser.error("indica una necesidad, --lote o --areas")
+
+    secciones = args.secciones.split(",") if args.secciones else None
+    generador = GeneradorPropuestas()
+    fallidas = 0
+    impresas = 0
+    for necesidad, area in entradas:
+        if necesidad is None:
+            fallidas += 1
+            continue
+        resultado = generador.generar_propuesta(
+            necesidad,
+            area or args.area,
+            incluir_trazabilidad=args.profile or args.formato == "json",
+            secciones=secciones,
+        )
+        fallidas += not resultado.exitoso
+
+        if args.formato == "json":
+            print(json.dumps(resultado_a_dict(resultado), ensure_ascii=False))
+        elif resultado.exitoso:
+            print((SEPARADOR_BLOQUES if impresas else "") + resultado.propuesta)
+            impresas += 1
+        else:
+            print(f"Error: {resultado.error}", file=sys.stderr)
+
+        if args.profile:
+            imprimir_perfil(resultado.trazabilidad, necesidad)
+
+    return 1 if fallidas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Coalescencia de peticiones idénticas (single-flight)
+Mientras una propuesta se está calculando para una necesidad normalizada,
+área y opciones dadas, las peticiones idénticas que llegan esperan ese mismo
+cálculo y comparten su resultado. Funciona con hilos y con asyncio, y ambos
+comparten la misma tabla de cálculos en curso.
+"""
+
+import asyncio
+import re
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from agent import GeneradorPropuestas, ResultadoPropuesta
+
+_PATRON_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_necesidad(necesidad: str) -> str:
+    """Colapsa espacios y saltos de línea; conserva mayúsculas (van a la propuesta)"""
+    return _PATRON_ESPACIOS.sub(" ", necesidad).strip()
+
+
+class CoalescedorPropuestas:
+    """
+    Envuelve un GeneradorPropuestas y agrupa las peticiones idénticas en curso.
+
+    - La clave es (necesidad normalizada, área, todas las opciones); la
+      propuesta se genera con la necesidad normalizada para que todos
+      reciban lo mismo. Con `deteccion` la necesidad no se normaliza: sus
+      posiciones apuntan al texto original.
+    - Las peticiones con `cache` (CacheIncremental de una sesión) no se
+      agrupan: su resultado depende del estado de esa sesión. Tampoco las
+      que traen opciones no hashables.
+    - El ResultadoPropuesta se comparte entre quienes esperaban, incluida su
+      trazabilidad; no debe modificarse.
+    """
+
+    def __init__(
+        self,
+        generador: Optional[GeneradorPropuestas] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self.generador = generador or GeneradorPropuestas()
+        # Executor de asyncio para el cálculo (None: el del event loop)
+        self.executor = executor
+        self._en_curso: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._contadores = {"peticiones": 0, "calculadas": 0, "coalescidas": 0}
+
+    @staticmethod
+    def _clave(
+        necesidad: str, area_especifica: Optional[str], opciones: Dict
+    ) -> Optional[Tuple]:
+        """Clave de agrupación, o None si la petición debe calcularse aparte"""
+        if opciones.get("cache") is not None:
+            return None
+        valores = {"incluir_trazabilidad": True, **opciones}
+        if valores.get("secciones") is not None:
+            valores["secciones"] = tuple(valores["secciones"])
+        clave = (necesidad, area_especifica, tuple(sorted(valores.items())))
+        try:
+            hash(clave)
+        except TypeError:
+            return None
+        return clave
+
+    @staticmethod
+    def _normalizar(necesidad: str, opciones: Dict) -> str:
+        if opciones.get("deteccion") is not None:
+            return necesidad
+        return normalizar_necesidad(necesidad)
+
+    def _contar_directa(self):
+        with self._lock:
+            self._contadores["peticiones"] += 1
+            self._contadores["calculadas"] += 1
+
+    def _reservar(self, clave: Hashable) -> Tuple[Future, bool]:
+        """Retorna (future, es_lider); el líder es quien debe calcular"""
+        with self._lock:
+            self._contadores["peticiones"] += 1
+            futuro = self._en_curso.get(clave)
+            if futuro is not None:
+                self._contadores["coalescidas"] += 1
+                return futuro, False
+            futuro = Future()
+            self._en_curso[clave] = futuro
+            self._contadores["calculadas"] += 1
+            return futuro, True
+
+    def _calcular(
+        self,
+        clave: Hashable,
+        futuro: Future,
+        necesidad: str,
+        area_especifica: Optional[str],
+        opciones: Dict[str, Any],
+    ):
+        try:
+            resultado = self.generador.generar_propuesta(
+                necesidad, area_especifica, **opciones
+            )
+        except BaseException as e:
+            futuro.set_exception(e)
+        else:
+            futuro.set_result(resultado)
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+
+    def generar_propuesta(
+        self, necesidad: str, area_especifica: Optional[str] = None, **opciones
+    ) -> ResultadoPropuesta:
+        """Como GeneradorPropuestas.generar_propuesta, agrupando las idénticas"""
+        necesidad = self._normalizar(necesidad, opciones)
+        clave = self._clave(necesidad, area_especifica, opciones)
+        if clave is None:
+            self._contar_directa()
+            return self.generador.generar_propuesta(
+                necesidad, area_especifica, **opciones
+            )
+
+        futuro, lider = self._reservar(clave)
+        if lider:
+            self._calcular(clave, futuro, necesidad, area_especifica, opciones)
+        return futuro.result()
+
+    async def generar_propuesta_async(
+        self, necesidad: str, area_especifica: Optional[str] = None, **opciones
+    ) -> ResultadoPropuesta:
+        """Versión asyncio: el cálculo corre en el executor, sin bloquear el loop"""
+        loop = asyncio.get_running_loop()
+        necesidad = self._normalizar(necesidad, opciones)
+        clave = self._clave(necesidad, area_especifica, opciones)
+        if clave is None:
+            self._contar_directa()
+            return await loop.run_in_executor(
+                self.executor,
+                lambda: self.generador.generar_propuesta(
+                    necesidad, area_especifica, **opciones
+                ),
+            )
+
+        futuro, lider = self._reservar(clave)
+        if lider:
+            loop.run_in_executor(
+                self.executor,
+                self._calcular,
+                clave,
+                futuro,
+                necesidad,
+                area_especifica,
+                opciones,
+            )
+        # shield: cancelar a un cliente no cancela el cálculo que otros esperan
+        return await asyncio.shield(asyncio.wrap_future(futuro))
+
+    def generar_propuestas(
+        self,
+        necesidades: Sequence[str],
+        areas_especificas: Optional[Sequence[Optional[str]]] = None,
+        **opciones,
+    ) -> List[ResultadoPropuesta]:
+        """Lote: las repetidas en el lote y las ya en curso se calculan una vez"""
+        if areas_especificas is None:
+            areas_especificas = [None] * len(necesidades)
+        if len(areas_especificas) != len(necesidades):
+            raise ValueError(
+                "necesidades y areas_especificas deben tener el mismo largo"
+            )
+
+        futuros: Dict[Hashable, Future] = {}
+        orden = []
+        for i, (necesidad, area) in enumerate(zip(necesidades, areas_especificas)):
+            necesidad = self._normalizar(necesidad, opciones)
+            clave = self._clave(necesidad, area, opciones)
+            if clave is None:
+                # Sin agrupar: un future propio ya resuelto, fuera de _en_curso
+                self._contar_directa()
+                futuro = Future()
+                futuro.set_result(
+                    self.generador.generar_propuesta(necesidad, area, **opciones)
+                )
+                futuros[("directa", i)] = futuro
+                orden.append(("directa", i))
+                continue
+            orden.append(clave)
+            if clave in futuros:
+                with self._lock:
+                    self._contadores["peticiones"] += 1
+                    self._contadores["coalescidas"] += 1
+                continue
+            futuro, lider = self._reservar(clave)
+            futuros[clave] = futuro
+            if lider:
+                self._calcular(clave, futuro, necesidad, area, opciones)
+
+        return [futuros[clave].result() for clave in orden]
+
+    def obtener_contadores(self) -> Dict[str, int]:
+        """Peticiones recibidas, calculadas, coalescidas y cálculos en curso"""
+        with self._lock:
+            return {**self._contadores, "en_curso": len(self._en_curso)}
@@ -0,0 +1,257 @@
+"""
+Ejemplos de la interfaz y snapshot precalculado
+Las propuestas de EJEMPLOS, los diagramas de arquitectura y los planes de
+orquestación son deterministas: se calculan una vez (al construir o al
+iniciar el worker) y se sirven desde un archivo JSON leído de una sola vez.
+Uso en build:
+
+    python ejemplos.py --salida ejemplos_snapshot.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import agent
+import langchain_skills
+import taxonomia
+import templates
+from agent import GeneradorPropuestas, ResultadoPropuesta, Trazabilidad
+from langchain_skills import LangChainSkills, PatronOrquestacion, TipoArquitectura
+from taxonomia import instantanea_taxonomia, version_taxonomia
+from templates import TEMPLATES, listar_tenants, version_catalogo
+
+RUTA_SNAPSHOT = os.path.join(os.path.dirname(__file__), "ejemplos_snapshot.json")
+
+
+def _huella_fuentes() -> str:
+    """Huella del código que da formato a las salidas del snapshot"""
+    digest = hashlib.sha256()
+    for modulo in (agent, langchain_skills, taxonomia, templates):
+        with open(modulo.__file__, "rb") as archivo:
+            digest.update(archivo.read())
+    return digest.hexdigest()
+
+
+# El código no cambia en ejecución: se lee una sola vez
+HUELLA_FUENTES = _huella_fuentes()
+
+EJEMPLOS = {
+    "fintech": {
+        "input": "Nuestra fintech necesita procesar pagos en tiempo real con cumplimiento PCI-DSS, detección de fraude y soporte para múltiples métodos de pago.",
+        "area": "fintech",
+    },
+    "app_moviles": {
+        "input": "Queremos desarrollar una aplicación móvil para que nuestros clientes puedan gestionar sus cuentas y hacer transferencias.",
+        "area": "app_moviles",
+    },
+    "blockchain": {
+        "input": "Necesitamos crear un sistema de trazabilidad para productos agrícolas que certifique el origen.",
+        "area": "blockchain",
+    },
+    "arquitectura": {
+        "input": "Tenemos un monolito legacy que queremos migrar a microservicios para escalar mejor.",
+        "area": "arquitectura",
+    },
+    "seguros": {
+        "input": "Nuestra aseguradora quiere digitalizar el proceso de cotización y emisión de pólizas.",
+        "area": "seguros",
+    },
+    "medica": {
+        "input": "Necesitamos un sistema integral para gestionar pacientes, citas y historiales clínicos.",
+        "area": "medica",
+    },
+    "telecomunicaciones": {
+        "input": "Como operador necesitamos monitorear la red en tiempo real y automatizar provisioning.",
+        "area": "telecomunicaciones",
+    },
+    "transporte": {
+        "input": "Tenemos una flota de 50 camiones y necesitamos optimizar rutas y tracking en tiempo real.",
+        "area": "transporte",
+    },
+    "almacenamiento": {
+        "input": "Nuestra bodega tiene problemas con el inventario y queremos optimizar ubicaciones.",
+        "area": "almacenamiento",
+    },
+    "combustibles": {
+        "input": "Gestionamos 20 estaciones de servicio y necesitamos monitorear niveles de tanques.",
+        "area": "combustibles",
+    },
+}
+
+
+# ((versión del catálogo, versión de la taxonomía), huella)
+_HUELLA_CACHEADA: Optional[Tuple[Tuple[int, int], str]] = None
+
+
+def huella_snapshot() -> str:
+    """
+    Huella de las entradas del snapshot (ejemplos, templates, subáreas y
+    código del generador y de las skills); si cambia, el archivo está
+    obsoleto. Se recalcula solo cuando cambian templates o subáreas.
+    """
+    global _HUELLA_CACHEADA
+    # Versiones leídas antes de serializar: si un escritor se cruza, la
+    # huella queda guardada con la versión vieja y se recalcula después
+    versiones = (version_catalogo(), version_taxonomia())
+    cacheada = _HUELLA_CACHEADA
+    if cacheada is not None and cacheada[0] == versiones:
+        return cacheada[1]
+
+    contenido = json.dumps(
+        {
+            "fuentes": HUELLA_FUENTES,
+            "ejemplos": EJEMPLOS,
+            "templates": {k: asdict(t) for k, t in TEMPLATES.items()},
+            "subareas": instantanea_taxonomia(),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    huella = hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+    _HUELLA_CACHEADA = (versiones, huella)
+    return huella
+
+
+def _trazabilidad_a_dict(trazabilidad: Trazabilidad) -> Dict[str, Any]:
+    return {
+        "pasos": trazabilidad.pasos,
+        "errores": trazabilidad.errores,
+        "inicio": trazabilidad.inicio.isoformat() if trazabilidad.inicio else None,
+        "fin": trazabilidad.fin.isoformat() if trazabilidad.fin else None,
+        "duracion_ms": trazabilidad.duracion_ms,
+        "inicio_ns": trazabilidad.inicio_ns,
+        "fin_ns": trazabilidad.fin_ns,
+    }
+
+
+def _trazabilidad_desde_dict(datos: Dict[str, Any]) -> Trazabilidad:
+    return Trazabilidad(
+        pasos=[dict(paso) for paso in datos["pasos"]],
+        errores=[dict(error) for error in datos["errores"]],
+        inicio=datetime.fromisoformat(datos["inicio"]) if datos["inicio"] else None,
+        fin=datetime.fromisoformat(datos["fin"]) if datos["fin"] else None,
+        duracion_ms=datos["duracion_ms"],
+        inicio_ns=datos["inicio_ns"],
+        fin_ns=datos["fin_ns"],
+    )
+
+
+def construir_snapshot() -> Dict[str, Any]:
+    """Calcula todas las salidas deterministas de la interfaz"""
+    generador = GeneradorPropuestas()
+    skills = LangChainSkills()
+
+    propuestas = {}
+    for nombre, ejemplo in EJEMPLOS.items():
+        resultado = generador.generar_propuesta(
+            ejemplo["input"], incluir_trazabilidad=True
+        )
+        propuestas[nombre] = {
+            "propuesta": resultado.propuesta,
+            "area_detectada": resultado.area_detectada,
+            "inputs": resultado.inputs,
+            "outputs": resultado.outputs,
+            "trazabilidad": _trazabilidad_a_dict(resultado.trazabilidad),
+        }
+
+    arquitecturas = {}
+    for tipo in TipoArquitectura:
+        arquitectura = skills.generar_arquitectura_completa(tipo, "", [])
+        arquitecturas[tipo.value] = {
+            "diagrama": arquitectura["diagrama"],
+            "resumen": arquitectura["resumen"],
+        }
+
+    return {
+        "huella": huella_snapshot(),
+        "propuestas": propuestas,
+        "arquitecturas": arquitecturas,
+        "planes": {
+            patron.value: skills.orquestacion.generar_plan_ejecucion("", patron)
+            for patron in PatronOrquestacion
+        },
+    }
+
+
+def guardar_snapshot(ruta: str = RUTA_SNAPSHOT) -> Dict[str, Any]:
+    """Construye el snapshot y lo escribe en disco"""
+    snapshot = construir_snapshot()
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(snapshot, archivo, ensure_ascii=False)
+    os.replace(temporal, ruta)
+    return snapshot
+
+
+def cargar_snapshot(ruta: str = RUTA_SNAPSHOT) -> Dict[str, Any]:
+    """
+    Lee el snapshot con una sola lectura. Si no existe o quedó obsoleto
+    respecto a EJEMPLOS / TEMPLATES, se recalcula en memoria.
+    """
+    try:
+        with open(ruta, "rb") as archivo:
+            snapshot = json.loads(archivo.read())
+        if snapshot.get("huella") == huella_snapshot():
+            return snapshot
+    except (OSError, ValueError):
+        pass
+    return construir_snapshot()
+
+
+def propuesta_de_ejemplo(
+    snapshot: Dict[str, Any],
+    necesidad: str,
+    area_especifica: Optional[str] = None,
+    tenant: Optional[str] = None,
+    incluir_trazabilidad: bool = False,
+) -> Optional[ResultadoPropuesta]:
+    """
+    ResultadoPropuesta precalculado si la entrada es un ejemplo sin área
+    forzada. Con `incluir_trazabilidad` trae la traza de la generación
+    precalculada; sin ella, solo su resumen, como GeneradorPropuestas. No se
+    usa si el tenant tiene overlays o si el catálogo cambió desde que se
+    cargó el snapshot.
+    """
+    if area_especifica is not None:
+        return None
+    if tenant is not None and tenant in listar_tenants():
+        return None
+    if snapshot.get("huella") != huella_snapshot():
+        return None
+    for datos in snapshot["propuestas"].values():
+        if datos["inputs"]["necesidad"] == necesidad:
+            trazabilidad = _trazabilidad_desde_dict(datos["trazabilidad"])
+            return ResultadoPropuesta(
+                propuesta=datos["propuesta"],
+                area_detectada=datos["area_detectada"],
+                inputs=dict(datos["inputs"]),
+                outputs=dict(datos["outputs"]),
+                exitoso=True,
+                trazabilidad=trazabilidad if incluir_trazabilidad else None,
+                resumen_trazabilidad=(
+                    None if incluir_trazabilidad else trazabilidad.obtener_resumen()
+                ),
+            )
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el snapshot de ejemplos")
+    parser.add_argument("--salida", default=RUTA_SNAPSHOT)
+    args = parser.parse_args()
+
+    snapshot = guardar_snapshot(args.salida)
+    print(
+        f"Snapshot en {args.salida}: {len(snapshot['propuestas'])} propuestas, "
+        f"{len(snapshot['arquitecturas'])} arquitecturas, {len(snapshot['planes'])} planes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Enrutador híbrido entre el motor de templates y un backend LLM
+Responde desde templates cuando la detección de área es confiable y escala
+al LLM solo para entradas ambiguas (empates o sin coincidencias).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Protocol
+
+from agent import GeneradorPropuestas, ResultadoPropuesta
+from analisis_extenso import analizar_en_fragmentos
+from taxonomia import (
+    SEPARADOR_RUTA,
+    area_desde_coincidencias_jerarquica,
+    detectar_area_jerarquica,
+)
+from templates import area_desde_coincidencias
+
+
+class AgenteTexto(Protocol):
+    """Cualquier agente que genere una propuesta en markdown (p. ej. AgenteLLM)"""
+
+    def generar_propuesta(self, necesidad: str) -> str: ...
+
+
+@dataclass(frozen=True)
+class Confianza:
+    """Confianza de la detección de área"""
+
+    area: str
+    coincidencias: int
+    segunda: int
+
+    @property
+    def valor(self) -> float:
+        """Margen relativo entre la mejor área y la segunda (0 a 1)"""
+        if self.coincidencias == 0:
+            return 0.0
+        return (self.coincidencias - self.segunda) / self.coincidencias
+
+
+def calcular_confianza(
+    coincidencias: Dict[str, List[str]], area: Optional[str] = None
+) -> Confianza:
+    """
+    Calcula la confianza a partir de las coincidencias por área. El margen
+    se mide entre sectores; las subáreas (rutas) solo afinan `area`, que por
+    defecto es el sector con más coincidencias.
+    """
+    sectores = {a: p for a, p in coincidencias.items() if SEPARADOR_RUTA not in a}
+    conteos = sorted((len(p) for p in sectores.values()), reverse=True)
+    return Confianza(
+        area=area or area_desde_coincidencias(sectores),
+        coincidencias=conteos[0] if conteos else 0,
+        segunda=conteos[1] if len(conteos) > 1 else 0,
+    )
+
+
+class EnrutadorPropuestas:
+    """
+    Enruta cada necesidad al nivel más barato que la resuelve:
+    - "template": detección confiable, responde el GeneradorPropuestas
+    - "llm": entrada ambigua, se escala al agente LLM dentro del presupuesto
+      de latencia; si se excede o falla, se responde con el template.
+
+    A lo sumo `max_pendientes_llm` llamadas al LLM quedan en curso o en cola
+    (por defecto, max_concurrencia_llm): con el cupo lleno la petición no se
+    escala y responde con el template de inmediato. Al vencer el presupuesto
+    la llamada se cancela si aún no empezó.
+
+    Las entradas de más de `umbral_extenso` caracteres del generador se
+    analizan por fragmentos, como en GeneradorPropuestas. cerrar() (o usarlo
+    con `with`) detiene el pool del LLM.
+    """
+
+    def __init__(
+        self,
+        generador: Optional[GeneradorPropuestas] = None,
+        agente_llm: Optional[AgenteTexto] = None,
+        umbral_confianza: float = 0.5,
+        presupuesto_ms: float = 2000.0,
+        max_concurrencia_llm: int = 4,
+        max_pendientes_llm: Optional[int] = None,
+    ):
+        self._generador_propio = generador is None
+        self.generador = generador or GeneradorPropuestas()
+        self.agente_llm = agente_llm
+        self.umbral_confianza = umbral_confianza
+        self.presupuesto_ms = presupuesto_ms
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrencia_llm, thread_name_prefix="enrutador_llm"
+        )
+        self._cupo_llm = threading.BoundedSemaphore(
+            max_pendientes_llm or max_concurrencia_llm
+        )
+        self._lock = threading.Lock()
+        self._contadores = {
+            "template": 0,
+            "llm": 0,
+            "llm_presupuesto_excedido": 0,
+            "llm_error": 0,
+            "llm_saturado": 0,
+        }
+        self._latencia_ms = {"template": 0.0, "llm": 0.0}
+
+    def es_ambigua(self, confianza: Confianza) -> bool:
+        """True si la entrada debe escalarse al LLM"""
+        return (
+            confianza.coincidencias == 0
+            or confianza.coincidencias == confianza.segunda
+            or confianza.valor < self.umbral_confianza
+        )
+
+    def generar_propuesta(
+        self, necesidad: str, presupuesto_ms: Optional[float] = None
+    ) -> ResultadoPropuesta:
+        """Genera la propuesta en el nivel adecuado según la confianza"""
+        inicio = time.perf_counter()
+        if len(necesidad) > self.generador.umbral_extenso:
+            analisis = analizar_en_fragmentos(necesidad)
+            area, coincidencias = area_desde_coincidencias_jerarquica(
+                analisis.coincidencias
+            )
+            confianza = calcular_confianza(coincidencias, area)
+            resultado = self.generador.generar_propuesta_extensa(
+                analisis, deteccion=(area, ()), auditar=False
+            )
+        else:
+            area, coincidencias, posiciones = detectar_area_jerarquica(necesidad)
+            confianza = calcular_confianza(coincidencias, area)
+            resultado = self.generador.generar_propuesta(
+                necesidad, deteccion=(area, posiciones), auditar=False
+            )
+
+        nivel = "template"
+        propuesta = resultado.propuesta
+        if (
+            resultado.exitoso
+            and self.agente_llm is not None
+            and self.es_ambigua(confianza)
+        ):
+            propuesta_llm = self._escalar(necesidad, presupuesto_ms, inicio)
+            if propuesta_llm is not None:
+                nivel = "llm"
+                propuesta = propuesta_llm
+
+        # Se audita el resultado que se entrega, con su nivel y su propuesta
+        resultado = self.generador.registrar_en_auditoria(
+            replace(
+                resultado,
+                propuesta=propuesta,
+                outputs={
+                    **resultado.outputs,
+                    "nivel": nivel,
+                    "confianza": round(confianza.valor, 3),
+                },
+            )
+        )
+
+        with self._lock:
+            self._contadores[nivel] += 1
+            self._latencia_ms[nivel] += (time.perf_counter() - inicio) * 1000
+
+        return resultado
+
+    def _escalar(
+        self, necesidad: str, presupuesto_ms: Optional[float], inicio: float
+    ) -> Optional[str]:
+        """Propuesta del LLM, o None si excede el presupuesto o falla"""
+        presupuesto = self.presupuesto_ms if presupuesto_ms is None else presupuesto_ms
+        restante_s = max(0.0, presupuesto / 1000 - (time.perf_counter() - inicio))
+        if not self._cupo_llm.acquire(blocking=False):
+            with self._lock:
+                self._contadores["llm_saturado"] += 1
+            return None
+        futuro = self._executor.submit(self.agente_llm.generar_propuesta, necesidad)
+        # El cupo se libera al terminar, fallar o cancelarse la llamada
+        futuro.add_done_callback(lambda _: self._cupo_llm.release())
+
+        try:
+            return futuro.result(timeout=restante_s)
+        except FuturesTimeoutError:
+            futuro.cancel()
+            with self._lock:
+                self._contadores["llm_presupuesto_excedido"] += 1
+        except Exception:
+            with self._lock:
+                self._contadores["llm_error"] += 1
+        return None
+
+    def cerrar(self):
+        """
+        Cancela las llamadas al LLM en cola, espera las que están en curso y
+        cierra el generador si lo creó el enrutador (idempotente)
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._generador_propio:
+            self.generador.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def obtener_contadores(self) -> Dict[str, float]:
+        """Reparto del tráfico entre niveles y latencia media por nivel"""
+        with self._lock:
+            contadores: Dict[str, float] = dict(self._contadores)
+            total = contadores["template"] + contadores["llm"]
+            for nivel, acumulado in self._latencia_ms.items():
+                contadores[f"latencia_media_ms_{nivel}"] = (
+                    acumulado / contadores[nivel] if contadores[nivel] else 0.0
+                )
+            contadores["fraccion_llm"] = contadores["llm"] / total if total else 0.0
+        return contadores
@@ -0,0 +1,265 @@
+"""
+Prueba de estrés multihilo del generador compartido
+Una sola instancia de GeneradorPropuestas (y de LangChainSkills) atiende a
+1..N hilos a la vez. Verifica que cada resultado sea idéntico al obtenido
+en un solo hilo y mide cómo escala el throughput. En un CPython sin GIL
+(3.13t+) puede repetir la medición con y sin GIL. Con --escritores, en
+cambio, lectores del catálogo y de la taxonomía compiten con
+eliminar_overlay, actualizar_template, restaurar_catalogo,
+registrar_subarea y restaurar_taxonomia. Uso:
+
+    python estres_hilos.py --hilos 1,2,4,8 --necesidades 2000
+    python3.13t estres_hilos.py --comparar-gil
+    python estres_hilos.py --escritores --segundos 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Dict, List, Tuple
+
+import taxonomia
+import templates
+from agent import GeneradorPropuestas
+from langchain_skills import PatronOrquestacion, TipoArquitectura, crear_skills
+from prueba_carga import GeneradorTrafico
+from taxonomia import detectar_area_jerarquica
+
+TENANT_ESTRES = "tenant-estres"
+AREA_TEMPORAL = "estres-temporal"
+PALABRA_SUBAREA = "estres-subarea"
+SUBAREAS_RELLENO = 500
+
+
+def gil_activo() -> bool:
+    """True si el intérprete corre con GIL (siempre en builds normales)"""
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def _huella(generador: GeneradorPropuestas, skills, necesidad: str) -> Tuple:
+    resultado = generador.generar_propuesta(necesidad, incluir_trazabilidad=False)
+    plan = skills.crear_agente_hibrido(
+        necesidad, TipoArquitectura.MICROSERVICIOS, PatronOrquestacion.PARALELO
+    )
+    return (
+        resultado.exitoso,
+        resultado.area_detectada,
+        resultado.propuesta,
+        plan["arquitectura"]["resumen"],
+    )
+
+
+def medir(hilos: List[int], cantidad: int, repeticiones: int) -> Dict[str, object]:
+    """Throughput por cantidad de hilos y resultados distintos a la referencia"""
+    trafico = GeneradorTrafico(semilla=0, tasa_duplicados=0.0)
+    necesidades = [trafico.siguiente() for _ in range(cantidad)]
+
+    generador = GeneradorPropuestas()
+    skills = crear_skills()
+    referencia = [_huella(generador, skills, n) for n in necesidades]
+
+    filas = []
+    for n in hilos:
+        barrera = threading.Barrier(n)
+        diferencias = [0] * n
+
+        def trabajar(numero: int):
+            barrera.wait()
+            # Cada hilo recorre la lista desde un desfase distinto
+            desfase = numero * len(necesidades) // n
+            for _ in range(repeticiones):
+                for k in range(len(necesidades)):
+                    i = (desfase + k) % len(necesidades)
+                    if _huella(generador, skills, necesidades[i]) != referencia[i]:
+                        diferencias[numero] += 1
+
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            inicio = time.perf_counter()
+            list(pool.map(trabajar, range(n)))
+            segundos = time.perf_counter() - inicio
+
+        total = n * repeticiones * len(necesidades)
+        filas.append(
+            {
+                "hilos": n,
+                "propuestas": total,
+                "por_segundo": total / segundos,
+                "diferencias": sum(diferencias),
+            }
+        )
+
+    base = filas[0]["por_segundo"] / filas[0]["hilos"]
+    for fila in filas:
+        fila["aceleracion"] = fila["por_segundo"] / base
+    return {"gil": gil_activo(), "filas": filas}
+
+
+def verificar_escritores(lectores: int, segundos: float) -> Dict[str, int]:
+    """
+    Lectores de obtener_template y de la detección contra un escritor que
+    alterna overlays, templates base, restauraciones del catálogo (agrega y
+    quita un área) y de la taxonomía (con una subárea siempre presente).
+    Cuenta las lecturas que fallan o ven un estado imposible.
+    """
+    original = templates.instantanea_catalogo()
+    taxonomia_original = taxonomia.instantanea_taxonomia()
+    area = next(iter(original[0]))
+    subarea = f"{area}/estres"
+    # Relleno antes de la subárea vigilada: una restauración que vacía y
+    # rellena la taxonomía la deja ausente durante más tiempo
+    for i in range(SUBAREAS_RELLENO):
+        taxonomia.registrar_subarea(
+            f"{area}/relleno{i}", palabras_clave=(f"{PALABRA_SUBAREA}-{i}",)
+        )
+    taxonomia.registrar_subarea(
+        subarea, palabras_clave=(PALABRA_SUBAREA,), descripcion="subárea"
+    )
+    con_subarea = taxonomia.instantanea_taxonomia()
+    base = original[0][area]
+    modificado = replace(base, descripcion=base.descripcion + " (estrés)")
+    temporal = replace(base, area=AREA_TEMPORAL)
+    descripciones = {base.descripcion, modificado.descripcion, "overlay"}
+    necesidad = f"Plataforma con {' y '.join(base.palabras_clave)}"
+    necesidad_subarea = f"{necesidad} y {PALABRA_SUBAREA}"
+
+    activo = threading.Event()
+    activo.set()
+    lecturas = [0] * lectores
+    errores = [0] * lectores
+
+    def leer(numero: int):
+        while activo.is_set():
+            try:
+                for tenant in (None, TENANT_ESTRES):
+                    template = templates.obtener_template(area, tenant)
+                    if template.descripcion not in descripciones:
+                        raise AssertionError(template.descripcion)
+                if detectar_area_jerarquica(necesidad)[0] != area:
+                    raise AssertionError("detección")
+                if taxonomia.detectar_area(necesidad_subarea) != subarea:
+                    raise AssertionError("detección de la subárea")
+                if taxonomia.obtener_template(subarea).descripcion != "subárea":
+                    raise AssertionError("template de la subárea")
+                templates.detectar_coincidencias(necesidad)
+                templates.listar_areas()
+            except Exception:
+                errores[numero] += 1
+            lecturas[numero] += 1
+
+    escrituras = 0
+    hilos = [
+        threading.Thread(target=leer, args=(n,), daemon=True) for n in range(lectores)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    fin = time.monotonic() + segundos
+    try:
+        while time.monotonic() < fin:
+            templates.registrar_overlay(TENANT_ESTRES, area, descripcion="overlay")
+            templates.actualizar_template(area, modificado)
+            templates.actualizar_template(AREA_TEMPORAL, temporal)
+            templates.eliminar_overlay(TENANT_ESTRES, area)
+            templates.actualizar_template(area, base)
+            templates.restaurar_catalogo(*original)
+            taxonomia.restaurar_taxonomia(con_subarea)
+            taxonomia.registrar_subarea(
+                subarea, palabras_clave=(PALABRA_SUBAREA,), descripcion="subárea"
+            )
+            escrituras += 8
+    finally:
+        activo.clear()
+        for hilo in hilos:
+            hilo.join()
+        templates.restaurar_catalogo(*original)
+        taxonomia.restaurar_taxonomia(taxonomia_original)
+
+    return {
+        "lecturas": sum(lecturas),
+        "escrituras": escrituras,
+        "errores": sum(errores),
+    }
+
+
+def _imprimir(medida: Dict[str, object]):
+    print(f"GIL {'activo' if medida['gil'] else 'desactivado'}")
+    print(f"{'hilos':>6} {'propuestas':>11} {'prop/s':>10} {'acel.':>7} {'difs':>6}")
+    for fila in medida["filas"]:
+        print(
+            f"{fila['hilos']:6d} {fila['propuestas']:11d} {fila['por_segundo']:10.1f} "
+            f"{fila['aceleracion']:6.2f}x {fila['diferencias']:6d}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estrés multihilo del generador")
+    parser.add_argument("--hilos", default="1,2,4,8")
+    parser.add_argument("--necesidades", type=int, default=500)
+    parser.add_argument("--repeticiones", type=int, default=2)
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    parser.add_argument(
+        "--comparar-gil",
+        action="store_true",
+        help="Repite la medición con PYTHON_GIL=0 y PYTHON_GIL=1 (builds sin GIL)",
+    )
+    parser.add_argument(
+        "--escritores",
+        action="store_true",
+        help="Lectores del catálogo contra overlays, templates y restauraciones",
+    )
+    parser.add_argument("--segundos", type=float, default=3.0)
+    args = parser.parse_args()
+    hilos = [int(h) for h in args.hilos.split(",")]
+
+    if args.escritores:
+        medida = verificar_escritores(max(hilos), args.segundos)
+        for nombre, valor in medida.items():
+            print(f"{nombre:12s} {valor}")
+        sys.exit(1 if medida["errores"] else 0)
+
+    if args.comparar_gil:
+        if not sysconfig.get_config_var("Py_GIL_DISABLED"):
+            print("Este intérprete no soporta desactivar el GIL; se mide solo con GIL.")
+        else:
+            fallos = 0
+            for valor in ("0", "1"):
+                proceso = subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        "--hilos",
+                        args.hilos,
+                        "--necesidades",
+                        str(args.necesidades),
+                        "--repeticiones",
+                        str(args.repeticiones),
+                        "--json",
+                    ],
+                    env={**os.environ, "PYTHON_GIL": valor},
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                medida = json.loads(proceso.stdout)
+                _imprimir(medida)
+                fallos += sum(f["diferencias"] for f in medida["filas"])
+                print()
+            sys.exit(1 if fallos else 0)
+
+    medida = medir(hilos, args.necesidades, args.repeticiones)
+    if args.json:
+        print(json.dumps(medida))
+    else:
+        _imprimir(medida)
+    if any(f["diferencias"] for f in medida["filas"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
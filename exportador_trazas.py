@@ -0,0 +1,297 @@
+"""
+Exportación de Trazabilidad como spans
+Convierte cada ejecución de generar_propuesta en un span padre con un span
+hijo por etapa y los escribe en formato OTLP-JSON o Chrome trace-event desde
+un hilo de fondo, sin bloquear la ruta de la petición.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from agent import Trazabilidad
+
+FORMATOS = ("otlp", "chrome")
+_SIN_ITEM = object()
+
+
+def _atributo_simple(valor: Any) -> Union[str, int, float, bool]:
+    if isinstance(valor, (str, bool, int, float)):
+        return valor
+    return json.dumps(valor, ensure_ascii=False, default=str)
+
+
+def trazabilidad_a_spans(
+    trazabilidad: Trazabilidad,
+    nombre: str = "generar_propuesta",
+    atributos: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Convierte una Trazabilidad en spans neutrales (el primero es el padre).
+    Los pasos consecutivos con el mismo estado forman un solo span; las
+    etapas con inicio_ns/fin_ns en su metadata usan su tiempo real.
+    """
+    pasos = trazabilidad.pasos
+    trace_id = os.urandom(16).hex()
+    raiz_id = os.urandom(8).hex()
+    inicio_raiz = trazabilidad.inicio_ns or (pasos[0]["timestamp_ns"] if pasos else 0)
+    fin_raiz = trazabilidad.fin_ns or (
+        pasos[-1]["timestamp_ns"] if pasos else inicio_raiz
+    )
+
+    raiz = {
+        "trace_id": trace_id,
+        "span_id": raiz_id,
+        "parent_id": None,
+        "nombre": nombre,
+        "inicio_ns": inicio_raiz,
+        "fin_ns": max(fin_raiz, inicio_raiz),
+        "atributos": {
+            "propuesta.total_pasos": len(pasos),
+            "propuesta.total_errores": len(trazabilidad.errores),
+            **{k: _atributo_simple(v) for k, v in (atributos or {}).items()},
+        },
+        "error": bool(trazabilidad.errores),
+    }
+    if trazabilidad.errores:
+        raiz["atributos"]["error.mensaje"] = trazabilidad.errores[-1]["mensaje"]
+
+    hijos: List[Dict[str, Any]] = []
+    abierto: Optional[Dict[str, Any]] = None
+    for paso in pasos:
+        metadata = paso["metadata"]
+        inicio = paso["timestamp_ns"]
+        if abierto is not None:
+            abierto["fin_ns"] = max(abierto["inicio_ns"], min(inicio, fin_raiz))
+
+        if "inicio_ns" in metadata:
+            hijos.append(
+                {
+                    "nombre": f"{paso['estado']}:{metadata['etapa']}",
+                    "inicio_ns": metadata["inicio_ns"],
+                    "fin_ns": metadata["fin_ns"],
+                    "atributos": {"detalle": paso["detalle"]},
+                }
+            )
+            abierto = None
+            continue
+
+        if abierto is not None and abierto["nombre"] == paso["estado"]:
+            continue
+
+        abierto = {
+            "nombre": paso["estado"],
+            "inicio_ns": inicio,
+            "fin_ns": inicio,
+            "atributos": {"detalle": paso["detalle"]},
+        }
+        abierto["atributos"].update(
+            {f"metadata.{k}": _atributo_simple(v) for k, v in metadata.items()}
+        )
+        hijos.append(abierto)
+
+    for hijo in hijos:
+        hijo.update(
+            trace_id=trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_id=raiz_id,
+            error=False,
+        )
+    return [raiz] + hijos
+
+
+def _valor_otlp(valor: Union[str, int, float, bool]) -> Dict[str, Any]:
+    if isinstance(valor, bool):
+        return {"boolValue": valor}
+    if isinstance(valor, int):
+        return {"intValue": str(valor)}
+    if isinstance(valor, float):
+        return {"doubleValue": valor}
+    return {"stringValue": valor}
+
+
+def spans_a_otlp(spans: List[Dict[str, Any]], servicio: str) -> Dict[str, Any]:
+    """Arma un ExportTraceServiceRequest en OTLP-JSON"""
+    otlp_spans = []
+    for span in spans:
+        otlp = {
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "name": span["nombre"],
+            "kind": 1,
+            "startTimeUnixNano": str(span["inicio_ns"]),
+            "endTimeUnixNano": str(span["fin_ns"]),
+            "attributes": [
+                {"key": k, "value": _valor_otlp(v)}
+                for k, v in span["atributos"].items()
+            ],
+            "status": {"code": 2 if span["error"] else 1},
+        }
+        if span["parent_id"]:
+            otlp["parentSpanId"] = span["parent_id"]
+        otlp_spans.append(otlp)
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": servicio}}
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "agent"}, "spans": otlp_spans}],
+            }
+        ]
+    }
+
+
+def spans_a_chrome(
+    spans: List[Dict[str, Any]], pid: int, tid: int
+) -> List[Dict[str, Any]]:
+    """Eventos 'X' (complete) del formato Chrome trace-event"""
+    return [
+        {
+            "name": span["nombre"],
+            "cat": "propuesta",
+            "ph": "X",
+            "ts": span["inicio_ns"] / 1000,
+            "dur": max(0, span["fin_ns"] - span["inicio_ns"]) / 1000,
+            "pid": pid,
+            "tid": tid,
+            "args": span["atributos"],
+        }
+        for span in spans
+    ]
+
+
+class ColectorEnMemoria:
+    """Destino en proceso: acumula los registros exportados"""
+
+    def __init__(self):
+        self.registros: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def recibir(self, registros: List[Dict[str, Any]]):
+        with self._lock:
+            self.registros.extend(registros)
+
+
+class ExportadorTrazas:
+    """
+    Exportador por lotes no bloqueante. exportar() solo encola la
+    Trazabilidad; la conversión y la escritura ocurren en un hilo de fondo.
+    Si la cola está llena la traza se descarta y se cuenta en `descartadas`.
+    """
+
+    def __init__(
+        self,
+        destino: Union[str, ColectorEnMemoria],
+        formato: str = "otlp",
+        tamano_lote: int = 128,
+        intervalo_s: float = 1.0,
+        capacidad: int = 10_000,
+        servicio: str = "generador-propuestas",
+    ):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}. Usa {FORMATOS}")
+        self.destino = destino
+        self.formato = formato
+        self.tamano_lote = tamano_lote
+        self.intervalo_s = intervalo_s
+        self.servicio = servicio
+        self.exportadas = 0
+        self.descartadas = 0
+        self.errores = 0
+        # exportar() corre en los hilos de las peticiones y _escribir() en el
+        # de fondo: los contadores se actualizan bajo lock
+        self._lock = threading.Lock()
+        self._cola: "queue.Queue" = queue.Queue(maxsize=capacidad)
+        self._pid = os.getpid()
+        self._hilo = threading.Thread(
+            target=self._bucle, name="exportador_trazas", daemon=True
+        )
+        self._hilo.start()
+
+    def exportar(
+        self, trazabilidad: Trazabilidad, atributos: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Encola una traza para exportar; retorna False si se descartó"""
+        try:
+            self._cola.put_nowait((trazabilidad, atributos, threading.get_ident()))
+            return True
+        except queue.Full:
+            self._contar("descartadas")
+            return False
+
+    def _contar(self, contador: str, cantidad: int = 1):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + cantidad)
+
+    def forzar_envio(self):
+        """Bloquea hasta que todo lo encolado se haya escrito"""
+        self._cola.join()
+
+    def cerrar(self):
+        """Escribe lo pendiente y detiene el hilo de fondo"""
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _bucle(self):
+        lote = []
+        limite = time.monotonic() + self.intervalo_s
+        while True:
+            try:
+                item = self._cola.get(timeout=max(0.0, limite - time.monotonic()))
+            except queue.Empty:
+                item = _SIN_ITEM
+
+            fin = item is None
+            if item is not _SIN_ITEM and not fin:
+                lote.append(item)
+
+            vencido = time.monotonic() >= limite
+            if lote and (fin or vencido or len(lote) >= self.tamano_lote):
+                try:
+                    self._escribir(lote)
+                except Exception:
+                    self._contar("errores", len(lote))
+                for _ in lote:
+                    self._cola.task_done()
+                lote = []
+            if vencido:
+                limite = time.monotonic() + self.intervalo_s
+            if fin:
+                self._cola.task_done()
+                return
+
+    def _escribir(self, lote: List[tuple]):
+        registros: List[Dict[str, Any]] = []
+        if self.formato == "otlp":
+            spans = []
+            for trazabilidad, atributos, _ in lote:
+                spans.extend(trazabilidad_a_spans(trazabilidad, atributos=atributos))
+            registros.append(spans_a_otlp(spans, self.servicio))
+        else:
+            for trazabilidad, atributos, tid in lote:
+                spans = trazabilidad_a_spans(trazabilidad, atributos=atributos)
+                registros.extend(spans_a_chrome(spans, self._pid, tid))
+
+        if isinstance(self.destino, str):
+            self._escribir_archivo(registros)
+        else:
+            self.destino.recibir(registros)
+        self._contar("exportadas", len(lote))
+
+    def _escribir_archivo(self, registros: List[Dict[str, Any]]):
+        # OTLP: un ExportTraceServiceRequest por línea (JSON Lines).
+        # Chrome: arreglo JSON sin cerrar, aceptado por chrome://tracing y Perfetto.
+        nuevo = not os.path.exists(self.destino) or os.path.getsize(self.destino) == 0
+        with open(self.destino, "a", encoding="utf-8") as archivo:
+            if self.formato == "chrome" and nuevo:
+                archivo.write("[\n")
+            for registro in registros:
+                linea = json.dumps(registro, ensure_ascii=False)
+                archivo.write(linea + (",\n" if self.formato == "chrome" else "\n"))
@@ -0,0 +1,355 @@
+"""
+Historial persistente de propuestas en SQLite
+Modo WAL, índice de texto completo FTS5 y paginación que solo carga
+la página visible. Cada propuesta se guarda como una lista de referencias
+a bloques direccionados por contenido: los bloques que se repiten entre
+propuestas (solución, arquitectura, riesgos, pie) se almacenan una vez.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agent import SEPARADOR_BLOQUES, ResultadoPropuesta
+
+LARGO_HASH = 16
+CAPACIDAD_CACHE_BLOQUES = 4096
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS propuestas (
+    id INTEGER PRIMARY KEY,
+    creado REAL NOT NULL,
+    necesidad TEXT NOT NULL,
+    area TEXT NOT NULL,
+    referencias BLOB NOT NULL,
+    largo INTEGER NOT NULL,
+    secciones TEXT NOT NULL,
+    resumen_trazabilidad TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_propuestas_area ON propuestas (area, id);
+
+CREATE TABLE IF NOT EXISTS bloques (
+    hash BLOB PRIMARY KEY,
+    contenido TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS propuestas_fts USING fts5 (
+    necesidad,
+    area,
+    propuesta,
+    content = '',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+@dataclass
+class EntradaHistorial:
+    """Fila resumida del historial (sin la propuesta completa)"""
+
+    id: int
+    creado: float
+    area: str
+    necesidad: str
+
+
+def _consulta_fts(texto: str) -> str:
+    """Convierte texto libre en una consulta FTS5 segura (AND de prefijos)"""
+    terminos = [t.replace('"', '""') for t in texto.split()]
+    return " ".join(f'"{t}"*' for t in terminos)
+
+
+def dividir_en_bloques(propuesta: str) -> List[str]:
+    """Bloques de la propuesta; unirlos con SEPARADOR_BLOQUES la reconstruye"""
+    return propuesta.split(SEPARADOR_BLOQUES)
+
+
+class HistorialPropuestas:
+    """Almacén persistente y buscable de propuestas generadas"""
+
+    def __init__(
+        self,
+        ruta: str = "historial_propuestas.sqlite3",
+        capacidad_cache_bloques: int = CAPACIDAD_CACHE_BLOQUES,
+    ):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._capacidad_cache = capacidad_cache_bloques
+        self._cache_bloques: "OrderedDict[bytes, str]" = OrderedDict()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        if ruta != ":memory:":
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._migrar_esquema_texto_completo()
+        self._conexion.executescript(ESQUEMA)
+        self._conexion.commit()
+
+    def _migrar_esquema_texto_completo(self):
+        """Convierte un historial con la propuesta completa por fila a bloques"""
+        columnas = {
+            fila[1] for fila in self._conexion.execute("PRAGMA table_info(propuestas)")
+        }
+        if "propuesta" not in columnas:
+            return
+
+        # executescript confirma lo pendiente antes de ejecutar; el BEGIN
+        # dentro del script deja toda la migración en una sola transacción
+        self._conexion.executescript("""
+            BEGIN;
+            DROP TRIGGER IF EXISTS propuestas_ai;
+            DROP TRIGGER IF EXISTS propuestas_ad;
+            DROP TABLE IF EXISTS propuestas_fts;
+            DROP INDEX IF EXISTS idx_propuestas_area;
+            ALTER TABLE propuestas RENAME TO propuestas_texto;
+            """ + ESQUEMA)
+        try:
+            filas = self._conexion.execute(
+                "SELECT id, creado, necesidad, area, propuesta, secciones, "
+                "resumen_trazabilidad FROM propuestas_texto ORDER BY id"
+            )
+            for id_, creado, necesidad, area, propuesta, secciones, resumen in filas:
+                self._insertar(
+                    creado,
+                    necesidad,
+                    area,
+                    propuesta,
+                    json.loads(secciones),
+                    resumen,
+                    id_,
+                )
+            self._conexion.execute("DROP TABLE propuestas_texto")
+            self._conexion.commit()
+        except Exception:
+            self._conexion.rollback()
+            raise
+
+    def _guardar_bloques(self, contenidos: List[str]) -> Tuple[List[bytes], int]:
+        """Guarda los bloques que aún no existen; retorna (hashes, bytes lógicos)"""
+        codificados = [c.encode("utf-8") for c in contenidos]
+        # Dirección del bloque: prefijo de LARGO_HASH bytes de su SHA-256
+        hashes = [hashlib.sha256(c).digest()[:LARGO_HASH] for c in codificados]
+        self._conexion.executemany(
+            "INSERT OR IGNORE INTO bloques (hash, contenido) VALUES (?, ?)",
+            zip(hashes, contenidos),
+        )
+        return hashes, sum(map(len, codificados))
+
+    def _insertar(
+        self,
+        creado: float,
+        necesidad: str,
+        area: str,
+        propuesta: str,
+        secciones: Dict[str, Any],
+        resumen: Optional[str],
+        id_propuesta: Optional[int] = None,
+    ) -> int:
+        """Inserta una fila, sus bloques nuevos y su entrada FTS (sin commit)"""
+        bloques = dividir_en_bloques(propuesta)
+        hashes, largo = self._guardar_bloques(bloques)
+        largo += len(SEPARADOR_BLOQUES) * (len(bloques) - 1)
+
+        # Cada sección de outputs (solución, arquitectura, riesgos...) también
+        # es un bloque; la fila solo guarda nombre -> hash
+        nombres = list(secciones)
+        hashes_secciones, largo_secciones = self._guardar_bloques(
+            [json.dumps(secciones[n], ensure_ascii=False) for n in nombres]
+        )
+        cursor = self._conexion.execute(
+            "INSERT INTO propuestas (id, creado, necesidad, area, referencias, largo, secciones, resumen_trazabilidad) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                id_propuesta,
+                creado,
+                necesidad,
+                area,
+                b"".join(hashes),
+                largo + largo_secciones,
+                json.dumps({n: h.hex() for n, h in zip(nombres, hashes_secciones)}),
+                resumen,
+            ),
+        )
+        self._conexion.execute(
+            "INSERT INTO propuestas_fts (rowid, necesidad, area, propuesta) VALUES (?, ?, ?, ?)",
+            (cursor.lastrowid, necesidad, area, propuesta),
+        )
+        return cursor.lastrowid
+
+    def guardar(self, resultado: ResultadoPropuesta) -> int:
+        """Persiste una propuesta exitosa y retorna su id"""
+        return self.guardar_varios([resultado])[-1]
+
+    def guardar_varios(self, resultados: List[ResultadoPropuesta]) -> List[int]:
+        """Persiste varias propuestas en una sola transacción"""
+        ahora = time.time()
+        ids = []
+        with self._lock, self._conexion:
+            for resultado in resultados:
+                resumen = (
+                    resultado.trazabilidad.obtener_resumen()
+                    if resultado.trazabilidad
+                    else resultado.resumen_trazabilidad
+                )
+                ids.append(
+                    self._insertar(
+                        ahora,
+                        resultado.inputs.get("necesidad", ""),
+                        resultado.area_detectada,
+                        resultado.propuesta,
+                        resultado.outputs,
+                        json.dumps(resumen) if resumen else None,
+                    )
+                )
+        return ids
+
+    def contar(self, busqueda: str = "") -> int:
+        """Número de propuestas, opcionalmente filtradas por búsqueda"""
+        with self._lock:
+            if busqueda.strip():
+                fila = self._conexion.execute(
+                    "SELECT COUNT(*) FROM propuestas_fts WHERE propuestas_fts MATCH ?",
+                    (_consulta_fts(busqueda),),
+                ).fetchone()
+            else:
+                fila = self._conexion.execute(
+                    "SELECT COUNT(*) FROM propuestas"
+                ).fetchone()
+        return fila[0]
+
+    def listar(
+        self,
+        pagina: int = 1,
+        por_pagina: int = 10,
+        busqueda: str = "",
+        antes_de: Optional[int] = None,
+    ) -> List[EntradaHistorial]:
+        """
+        Página de resultados, de la más reciente a la más antigua.
+        Con antes_de (id de la última fila vista) se pagina por cursor y se
+        evita el coste de OFFSET en páginas profundas.
+        """
+        condiciones, parametros = [], []
+        if busqueda.strip():
+            condiciones.append("propuestas_fts MATCH ?")
+            parametros.append(_consulta_fts(busqueda))
+        if antes_de is not None:
+            condiciones.append("p.id < ?")
+            parametros.append(antes_de)
+            desplazamiento = 0
+        else:
+            desplazamiento = max(0, pagina - 1) * por_pagina
+
+        origen = "propuestas p"
+        if busqueda.strip():
+            origen = "propuestas_fts JOIN propuestas p ON p.id = propuestas_fts.rowid"
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        with self._lock:
+            filas = self._conexion.execute(
+                f"""
+                SELECT p.id, p.creado, p.area, substr(p.necesidad, 1, 200)
+                FROM {origen} {donde}
+                ORDER BY p.id DESC LIMIT ? OFFSET ?
+                """,
+                (*parametros, por_pagina, desplazamiento),
+            ).fetchall()
+        return [EntradaHistorial(*fila) for fila in filas]
+
+    def iterar_necesidades(self, lote: int = 10_000) -> Iterator[List[Tuple[int, str]]]:
+        """Recorre (id, necesidad) de todo el historial en lotes por id"""
+        ultimo = 0
+        while True:
+            with self._lock:
+                filas = self._conexion.execute(
+                    "SELECT id, necesidad FROM propuestas WHERE id > ? ORDER BY id LIMIT ?",
+                    (ultimo, lote),
+                ).fetchall()
+            if not filas:
+                return
+            yield filas
+            ultimo = filas[-1][0]
+
+    def obtener(self, id_propuesta: int) -> Optional[Dict[str, Any]]:
+        """Carga una propuesta completa por id"""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT id, creado, necesidad, area, referencias, secciones, resumen_trazabilidad "
+                "FROM propuestas WHERE id = ?",
+                (id_propuesta,),
+            ).fetchone()
+            if fila is None:
+                return None
+            referencias = fila[4]
+            bloques = self._cargar_bloques(
+                [
+                    referencias[i : i + LARGO_HASH]
+                    for i in range(0, len(referencias), LARGO_HASH)
+                ]
+            )
+            secciones = json.loads(fila[5])
+            valores = self._cargar_bloques(
+                [bytes.fromhex(h) for h in secciones.values()]
+            )
+        return {
+            "id": fila[0],
+            "creado": fila[1],
+            "necesidad": fila[2],
+            "area": fila[3],
+            "propuesta": SEPARADOR_BLOQUES.join(bloques),
+            "secciones": {n: json.loads(v) for n, v in zip(secciones, valores)},
+            "resumen_trazabilidad": json.loads(fila[6]) if fila[6] else None,
+        }
+
+    def _cargar_bloques(self, hashes: List[bytes]) -> List[str]:
+        """
+        Contenido de los bloques en el orden pedido. Los bloques compartidos
+        suelen estar en el cache LRU; solo los que faltan se piden a SQLite
+        en una consulta.
+        """
+        faltantes = list({h for h in hashes if h not in self._cache_bloques})
+        if faltantes:
+            marcadores = ",".join("?" * len(faltantes))
+            for hash_, contenido in self._conexion.execute(
+                f"SELECT hash, contenido FROM bloques WHERE hash IN ({marcadores})",
+                faltantes,
+            ):
+                self._cache_bloques[hash_] = contenido
+
+        bloques = []
+        for hash_ in hashes:
+            self._cache_bloques.move_to_end(hash_)
+            bloques.append(self._cache_bloques[hash_])
+        while len(self._cache_bloques) > self._capacidad_cache:
+            self._cache_bloques.popitem(last=False)
+        return bloques
+
+    def obtener_estadisticas(self) -> Dict[str, float]:
+        """Bytes lógicos de las propuestas frente a los bloques almacenados"""
+        with self._lock:
+            propuestas, largo, referencias = self._conexion.execute(
+                "SELECT COUNT(*), COALESCE(SUM(largo), 0), "
+                "COALESCE(SUM(length(referencias) + length(secciones)), 0) FROM propuestas"
+            ).fetchone()
+            bloques, bytes_bloques = self._conexion.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length(CAST(contenido AS BLOB))), 0) FROM bloques"
+            ).fetchone()
+        almacenado = bytes_bloques + referencias
+        return {
+            "propuestas": propuestas,
+            "bloques_unicos": bloques,
+            "bytes_referencias": referencias,
+            "bytes_logicos": largo,
+            "bytes_almacenados": almacenado,
+            "ahorro": 1 - almacenado / largo if largo else 0.0,
+        }
+
+    def cerrar(self):
+        """Cierra la conexión SQLite"""
+        with self._lock:
+            self._conexion.close()
@@ -0,0 +1,222 @@
+"""
+Historial de sesión acotado por bytes
+Las propuestas recientes se guardan tal cual, las anteriores comprimidas
+(zstd si está instalado, si no zlib) y, al superar el presupuesto de
+memoria, las más antiguas pasan a un archivo circular en disco. El texto
+solo se descomprime cuando se pide.
+"""
+
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+
+    CODEC = "zstd"
+    _compresor = zstandard.ZstdCompressor(level=3)
+    _descompresor = zstandard.ZstdDecompressor()
+
+    def comprimir(datos: bytes) -> bytes:
+        return _compresor.compress(datos)
+
+    def descomprimir(datos: bytes) -> bytes:
+        return _descompresor.decompress(datos)
+
+except ImportError:
+    CODEC = "zlib"
+
+    def comprimir(datos: bytes) -> bytes:
+        return zlib.compress(datos, 6)
+
+    def descomprimir(datos: bytes) -> bytes:
+        return zlib.decompress(datos)
+
+
+LARGO_VISTA_NECESIDAD = 200
+
+
+@dataclass(slots=True)
+class EntradaSesion:
+    """Metadatos de una entrada; el contenido vive en memoria, comprimido o en disco"""
+
+    id: int
+    necesidad: str
+    area: str
+    creado: float
+    estado: str = "memoria"
+    texto: Optional[str] = None
+    comprimido: Optional[bytes] = None
+    posicion_disco: Optional[Tuple[int, int]] = None
+    # Largo del texto codificado en UTF-8 (no en caracteres)
+    bytes_texto: int = 0
+
+    @property
+    def bytes_en_memoria(self) -> int:
+        if self.texto is not None:
+            return self.bytes_texto
+        if self.comprimido is not None:
+            return len(self.comprimido)
+        return 0
+
+
+class HistorialSesion:
+    """
+    Historial de propuestas de una sesión con memoria acotada.
+
+    - Las `recientes_sin_comprimir` últimas entradas quedan como texto.
+    - El resto se comprime; si aun así se supera `max_bytes_memoria`, las
+      más antiguas se escriben en un archivo circular de `max_bytes_disco`.
+      Las recientes también cuentan en el presupuesto (en bytes UTF-8): si
+      solas lo superan, se comprimen y desbordan como las demás.
+    - Al dar la vuelta, el archivo sobrescribe las entradas más antiguas,
+      que quedan como "descartada".
+    """
+
+    def __init__(
+        self,
+        max_bytes_memoria: int = 1_000_000,
+        max_bytes_disco: int = 50_000_000,
+        recientes_sin_comprimir: int = 2,
+        max_entradas: int = 1000,
+    ):
+        self.max_bytes_memoria = max_bytes_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self.recientes_sin_comprimir = recientes_sin_comprimir
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[int, EntradaSesion]" = OrderedDict()
+        self._bytes_memoria = 0
+        self._siguiente_id = 1
+        self._archivo = None
+        self._posicion_escritura = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def agregar(self, necesidad: str, area: str, propuesta: str) -> int:
+        """Agrega una propuesta y aplica compresión y desborde; retorna su id"""
+        with self._lock:
+            entrada = EntradaSesion(
+                id=self._siguiente_id,
+                necesidad=necesidad[:LARGO_VISTA_NECESIDAD],
+                area=area,
+                creado=time.time(),
+                texto=propuesta,
+                bytes_texto=len(propuesta.encode("utf-8")),
+            )
+            self._siguiente_id += 1
+            self._entradas[entrada.id] = entrada
+            self._bytes_memoria += entrada.bytes_en_memoria
+
+            while len(self._entradas) > self.max_entradas:
+                _, antigua = self._entradas.popitem(last=False)
+                self._bytes_memoria -= antigua.bytes_en_memoria
+
+            self._comprimir_antiguas()
+            self._desbordar()
+            return entrada.id
+
+    def _comprimir_antiguas(self):
+        recientes = 0
+        for entrada in reversed(self._entradas.values()):
+            if entrada.texto is None:
+                continue
+            recientes += 1
+            if recientes <= self.recientes_sin_comprimir:
+                continue
+            self._comprimir(entrada)
+
+    def _comprimir(self, entrada: EntradaSesion):
+        comprimido = comprimir(entrada.texto.encode("utf-8"))
+        self._bytes_memoria += len(comprimido) - entrada.bytes_texto
+        entrada.texto, entrada.comprimido = None, comprimido
+        entrada.estado = "comprimida"
+
+    def _desbordar(self):
+        for entrada in self._entradas.values():
+            if self._bytes_memoria <= self.max_bytes_memoria:
+                return
+            if entrada.texto is not None:
+                self._comprimir(entrada)
+            if entrada.comprimido is None:
+                continue
+            self._bytes_memoria -= len(entrada.comprimido)
+            entrada.posicion_disco = self._escribir_disco(entrada.comprimido)
+            entrada.comprimido = None
+            entrada.estado = (
+                "disco" if entrada.posicion_disco is not None else "descartada"
+            )
+
+    def _escribir_disco(self, datos: bytes) -> Optional[Tuple[int, int]]:
+        """Escribe en el archivo circular e invalida lo que se sobrescriba"""
+        if len(datos) > self.max_bytes_disco:
+            return None
+        if self._archivo is None:
+            self._archivo = tempfile.TemporaryFile(prefix="historial_sesion_")
+        if self._posicion_escritura + len(datos) > self.max_bytes_disco:
+            self._posicion_escritura = 0
+
+        inicio, fin = self._posicion_escritura, self._posicion_escritura + len(datos)
+        for entrada in self._entradas.values():
+            if entrada.posicion_disco is None:
+                continue
+            desde, largo = entrada.posicion_disco
+            if desde < fin and inicio < desde + largo:
+                entrada.posicion_disco = None
+                entrada.estado = "descartada"
+
+        self._archivo.seek(inicio)
+        self._archivo.write(datos)
+        self._posicion_escritura = fin
+        return inicio, len(datos)
+
+    def entradas(self, ultimas: Optional[int] = None) -> List[EntradaSesion]:
+        """Metadatos de las entradas, de la más reciente a la más antigua"""
+        with self._lock:
+            lista = list(reversed(self._entradas.values()))
+        return lista[:ultimas] if ultimas else lista
+
+    def obtener_propuesta(self, id_entrada: int) -> Optional[str]:
+        """Texto de la propuesta; descomprime o lee de disco solo esta entrada"""
+        with self._lock:
+            entrada = self._entradas.get(id_entrada)
+            if entrada is None:
+                return None
+            if entrada.texto is not None:
+                return entrada.texto
+            if entrada.comprimido is not None:
+                return descomprimir(entrada.comprimido).decode("utf-8")
+            if entrada.posicion_disco is not None:
+                inicio, largo = entrada.posicion_disco
+                self._archivo.seek(inicio)
+                return descomprimir(self._archivo.read(largo)).decode("utf-8")
+            return None
+
+    def obtener_estadisticas(self) -> Dict[str, int]:
+        """Bytes en memoria y en disco y entradas por estado"""
+        with self._lock:
+            estadisticas = {
+                "entradas": len(self._entradas),
+                "bytes_memoria": self._bytes_memoria,
+                "bytes_disco": sum(
+                    e.posicion_disco[1]
+                    for e in self._entradas.values()
+                    if e.posicion_disco is not None
+                ),
+            }
+            for entrada in self._entradas.values():
+                clave = f"estado_{entrada.estado}"
+                estadisticas[clave] = estadisticas.get(clave, 0) + 1
+        return estadisticas
+
+    def cerrar(self):
+        """Libera el archivo de desborde"""
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
@@ -0,0 +1,204 @@
+"""
+Índice vectorial en memoria para recuperar propuestas similares
+Vectores TF-IDF con hashing sobre las palabras clave del generador,
+búsqueda por fuerza bruta o por particiones tipo IVF.
+"""
+
+import math
+import threading
+import zlib
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agent import GeneradorPropuestas
+
+
+class IndiceVectorial:
+    """
+    Índice de necesidades con similitud coseno.
+
+    Cada necesidad se representa con sus palabras clave
+    (GeneradorPropuestas._extraer_palabras_clave) proyectadas por hashing a
+    un vector de `dimension` componentes con peso (1 + log tf) * idf. El idf
+    se actualiza con cada inserción; los vectores ya guardados conservan el
+    idf del momento en que se insertaron.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 256,
+        generador: Optional[GeneradorPropuestas] = None,
+        capacidad_inicial: int = 1024,
+    ):
+        self.dimension = dimension
+        self.generador = generador or GeneradorPropuestas()
+        self._lock = threading.RLock()
+        self._vectores = np.zeros((capacidad_inicial, dimension), dtype=np.float32)
+        self._ids = np.zeros(capacidad_inicial, dtype=np.int64)
+        self._n = 0
+        self._frecuencia_documentos = np.zeros(dimension, dtype=np.float64)
+        self._centroides: Optional[np.ndarray] = None
+        self._listas: List[List[int]] = []
+        self._listas_arrays: List[Optional[np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _hashear(self, necesidad: str) -> Counter:
+        """Cuenta las palabras clave por posición (con signo) en el vector"""
+        conteo: Counter = Counter()
+        for palabra in self.generador._extraer_palabras_clave(necesidad):
+            h = zlib.crc32(palabra.encode("utf-8"))
+            signo = -1 if h & 0x80000000 else 1
+            conteo[(h % self.dimension, signo)] += 1
+        return conteo
+
+    def _idf(self, n: Optional[int] = None) -> np.ndarray:
+        """idf con `n` documentos (por defecto los ya insertados); siempre >= 1"""
+        n = self._n if n is None else n
+        return np.log((1 + n) / (1 + self._frecuencia_documentos)) + 1
+
+    def _vector(self, conteo: Counter, idf: np.ndarray) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for (posicion, signo), tf in conteo.items():
+            vector[posicion] += signo * (1 + math.log(tf)) * idf[posicion]
+        norma = np.linalg.norm(vector)
+        return vector / norma if norma else vector
+
+    def vectorizar(self, necesidad: str) -> np.ndarray:
+        """Vector normalizado de una necesidad con el idf actual"""
+        with self._lock:
+            return self._vector(self._hashear(necesidad), self._idf())
+
+    def _asegurar_capacidad(self, adicionales: int):
+        requerida = self._n + adicionales
+        if requerida <= len(self._vectores):
+            return
+        capacidad = max(requerida, 2 * len(self._vectores))
+        vectores = np.zeros((capacidad, self.dimension), dtype=np.float32)
+        vectores[: self._n] = self._vectores[: self._n]
+        ids = np.zeros(capacidad, dtype=np.int64)
+        ids[: self._n] = self._ids[: self._n]
+        self._vectores, self._ids = vectores, ids
+
+    def agregar(self, necesidad: str, id_externo: Optional[int] = None) -> int:
+        """Inserta una necesidad y retorna su id"""
+        ids = None if id_externo is None else [id_externo]
+        return self.agregar_varios([necesidad], ids)[0]
+
+    def agregar_varios(
+        self, necesidades: Sequence[str], ids: Optional[Sequence[int]] = None
+    ) -> List[int]:
+        """Inserta varias necesidades (los ids por defecto son la posición)"""
+        conteos = [self._hashear(n) for n in necesidades]
+        with self._lock:
+            if ids is None:
+                ids = range(self._n, self._n + len(necesidades))
+            self._asegurar_capacidad(len(conteos))
+            for conteo in conteos:
+                for posicion in {posicion for posicion, _ in conteo}:
+                    self._frecuencia_documentos[posicion] += 1
+            # El lote ya cuenta en la frecuencia de documentos: también en n
+            idf = self._idf(self._n + len(conteos))
+
+            inicio = self._n
+            for i, conteo in enumerate(conteos):
+                self._vectores[inicio + i] = self._vector(conteo, idf)
+            self._ids[inicio : inicio + len(conteos)] = ids
+            self._n += len(conteos)
+
+            if self._centroides is not None:
+                self._asignar(np.arange(inicio, self._n))
+            return list(ids)
+
+    def entrenar_particiones(
+        self,
+        n_listas: int = 256,
+        iteraciones: int = 8,
+        muestra: int = 50_000,
+        semilla: int = 0,
+    ):
+        """
+        Agrupa los vectores en n_listas particiones con k-means esférico
+        (partición gruesa tipo IVF). Las inserciones posteriores se asignan
+        al centroide más cercano.
+        """
+        with self._lock:
+            if self._n == 0:
+                raise ValueError("El índice está vacío")
+            rng = np.random.default_rng(semilla)
+            n_listas = min(n_listas, self._n)
+            filas = rng.choice(self._n, size=min(muestra, self._n), replace=False)
+            datos = self._vectores[filas]
+            centroides = datos[rng.choice(len(datos), size=n_listas, replace=False)]
+
+            for _ in range(iteraciones):
+                asignacion = np.argmax(datos @ centroides.T, axis=1)
+                for c in range(n_listas):
+                    miembros = datos[asignacion == c]
+                    if len(miembros):
+                        centroide = miembros.sum(axis=0)
+                        norma = np.linalg.norm(centroide)
+                        centroides[c] = centroide / norma if norma else centroide
+
+            self._centroides = centroides.astype(np.float32)
+            self._listas = [[] for _ in range(n_listas)]
+            self._listas_arrays = [None] * n_listas
+            self._asignar(np.arange(self._n))
+
+    def _asignar(self, filas: np.ndarray, bloque: int = 65_536):
+        for i in range(0, len(filas), bloque):
+            parte = filas[i : i + bloque]
+            cercanos = np.argmax(self._vectores[parte] @ self._centroides.T, axis=1)
+            for fila, lista in zip(parte.tolist(), cercanos.tolist()):
+                self._listas[lista].append(fila)
+                self._listas_arrays[lista] = None
+
+    def _candidatos(self, consulta: np.ndarray, n_sondeos: int) -> np.ndarray:
+        puntajes = self._centroides @ consulta
+        elegidas = np.argpartition(-puntajes, min(n_sondeos, len(puntajes)) - 1)[
+            :n_sondeos
+        ]
+        partes = []
+        for lista in elegidas.tolist():
+            if self._listas_arrays[lista] is None:
+                self._listas_arrays[lista] = np.asarray(
+                    self._listas[lista], dtype=np.int64
+                )
+            partes.append(self._listas_arrays[lista])
+        return np.concatenate(partes) if partes else np.zeros(0, dtype=np.int64)
+
+    def buscar(
+        self, necesidad: str, k: int = 5, n_sondeos: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Retorna hasta k pares (id, similitud coseno) ordenados de mayor a menor.
+        Con n_sondeos y particiones entrenadas solo se revisan esas particiones.
+        """
+        with self._lock:
+            if self._n == 0:
+                return []
+            consulta = self._vector(self._hashear(necesidad), self._idf())
+            if not consulta.any():
+                return []
+
+            if n_sondeos and self._centroides is not None:
+                filas = self._candidatos(consulta, n_sondeos)
+                puntajes = self._vectores[filas] @ consulta
+            else:
+                filas = None
+                puntajes = self._vectores[: self._n] @ consulta
+
+            k = min(k, len(puntajes))
+            if k == 0:
+                return []
+            mejores = np.argpartition(-puntajes, k - 1)[:k]
+            mejores = mejores[np.argsort(-puntajes[mejores])]
+            posiciones = mejores if filas is None else filas[mejores]
+            return [
+                (int(self._ids[p]), float(puntajes[m]))
+                for p, m in zip(posiciones, mejores)
+                if puntajes[m] > 0
+            ]
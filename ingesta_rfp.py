@@ -0,0 +1,395 @@
+"""
+Ingesta de un directorio de RFPs (texto plano o markdown)
+Cada archivo se mapea en memoria (mmap), se divide en secciones por
+encabezado y cada sección se puntúa contra TEMPLATES. Se genera una
+propuesta por documento para el área (o subárea) detectada en todo el
+documento, con las demás áreas fuertes como complementarias. Los archivos se
+procesan en paralelo (procesos) con reporte de progreso y throughput. Uso:
+
+    python ingesta_rfp.py rfps/ --salida propuestas_rfp.jsonl --procesos 8
+"""
+
+import argparse
+import codecs
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import replace
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from agent import SEPARADOR_BLOQUES, GeneradorPropuestas
+from analisis_extenso import (
+    LARGO_EXTRACTO,
+    TAMANO_FRAGMENTO,
+    AnalisisNecesidad,
+    analizar_en_fragmentos,
+)
+from taxonomia import (
+    SEPARADOR_RUTA,
+    area_desde_coincidencias_jerarquica,
+    palabras_clave_subareas,
+)
+from templates import TEMPLATES, palabras_clave_por_area
+
+EXTENSIONES = (".txt", ".md", ".markdown")
+# Encabezados markdown ("## Alcance") o numerados ("2.1. Alcance", "3) Alcance")
+PATRON_ENCABEZADO = re.compile(
+    rb"^(?:#{1,6}[ \t]+[^\r\n]+|\d+(?:\.\d+)*[.)][ \t]+\S[^\r\n]{0,118})\r?$",
+    re.MULTILINE,
+)
+FRACCION_AREA_COMPLEMENTARIA = 0.5
+MAX_AREAS = 3
+
+_generador: Optional[GeneradorPropuestas] = None
+
+
+def listar_documentos(
+    directorio: str, extensiones: Tuple[str, ...] = EXTENSIONES
+) -> List[Tuple[str, int]]:
+    """Rutas y tamaños (bytes) de los documentos del directorio, recursivo"""
+    documentos = []
+    for raiz, carpetas, archivos in os.walk(directorio):
+        carpetas.sort()
+        for nombre in sorted(archivos):
+            if nombre.lower().endswith(extensiones):
+                ruta = os.path.join(raiz, nombre)
+                documentos.append((ruta, os.path.getsize(ruta)))
+    return documentos
+
+
+def dividir_secciones(datos: mmap.mmap) -> List[Tuple[str, int, int]]:
+    """(título, inicio, fin) de cada sección; el texto previo es el preámbulo"""
+    secciones = []
+    titulo, inicio = "(preámbulo)", 0
+    for encabezado in PATRON_ENCABEZADO.finditer(datos):
+        if encabezado.start() > inicio:
+            secciones.append((titulo, inicio, encabezado.start()))
+        titulo = (
+            encabezado.group()
+            .decode("utf-8", errors="replace")
+            .lstrip("#")
+            .strip()[:120]
+        )
+        inicio = encabezado.start()
+    if len(datos) > inicio:
+        secciones.append((titulo, inicio, len(datos)))
+    return secciones
+
+
+def fragmentos_mmap(
+    datos: mmap.mmap, inicio: int, fin: int, tamano: int = TAMANO_FRAGMENTO
+) -> Iterator[str]:
+    """Decodifica un rango del mmap en fragmentos sin copiar el rango completo"""
+    decodificador = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for posicion in range(inicio, fin, tamano):
+        fragmento = decodificador.decode(datos[posicion : min(posicion + tamano, fin)])
+        if fragmento:
+            yield fragmento
+    cola = decodificador.decode(b"", final=True)
+    if cola:
+        yield cola
+
+
+def puntuar_areas(
+    analisis_secciones: List[AnalisisNecesidad],
+) -> List[Tuple[str, int]]:
+    """Suma por área las palabras clave encontradas en cada sección"""
+    puntajes: Counter = Counter()
+    for analisis in analisis_secciones:
+        for area, encontradas in analisis.coincidencias.items():
+            puntajes[area] += len(encontradas)
+    return [(area, puntajes[area]) for area in TEMPLATES if puntajes[area]]
+
+
+def areas_mas_fuertes(puntajes: List[Tuple[str, int]]) -> List[str]:
+    """La mejor área más las que alcanzan FRACCION_AREA_COMPLEMENTARIA de ella"""
+    ordenadas = sorted(puntajes, key=lambda p: -p[1])
+    if not ordenadas:
+        return []
+    minimo = ordenadas[0][1] * FRACCION_AREA_COMPLEMENTARIA
+    return [area for area, puntaje in ordenadas[:MAX_AREAS] if puntaje >= minimo]
+
+
+def _analisis_documento(
+    datos: mmap.mmap, ruta: str, analisis_secciones: List[AnalisisNecesidad]
+) -> AnalisisNecesidad:
+    """
+    Combina los análisis de las secciones en uno del documento completo,
+    con las coincidencias por sector y por ruta de subárea
+    """
+    coincidencias: Dict[str, Set[str]] = {}
+    for analisis in analisis_secciones:
+        for area, encontradas in analisis.coincidencias.items():
+            coincidencias.setdefault(area, set()).update(encontradas)
+
+    frecuencias: Counter = Counter()
+    for analisis in analisis_secciones:
+        frecuencias.update(dict(zip(analisis.palabras_clave, analisis.frecuencias)))
+    mas_frecuentes = frecuencias.most_common(10)
+
+    inicio = datos[: LARGO_EXTRACTO * 4].decode("utf-8", errors="ignore")
+    longitud = sum(a.longitud for a in analisis_secciones)
+    extracto = inicio[:LARGO_EXTRACTO] + (" [...]" if longitud > LARGO_EXTRACTO else "")
+
+    return AnalisisNecesidad(
+        digest=hashlib.sha256(datos).hexdigest(),
+        referencia=ruta,
+        longitud=longitud,
+        extracto=extracto,
+        coincidencias={
+            ruta: [p for p in palabras if p in coincidencias[ruta]]
+            for ruta, palabras in palabras_clave_por_area() + palabras_clave_subareas()
+            if ruta in coincidencias
+        },
+        palabras_clave=tuple(p for p, _ in mas_frecuentes),
+        frecuencias=tuple(n for _, n in mas_frecuentes),
+    )
+
+
+def _agregar_areas_complementarias(
+    propuesta: str, areas: List[str], puntajes: Dict[str, int]
+) -> str:
+    """Inserta las áreas complementarias antes del pie de la propuesta"""
+    if not areas:
+        return propuesta
+    bloques = []
+    for area in areas:
+        template = TEMPLATES[area]
+        bloques.append(
+            f"### {template.area} (puntaje {puntajes[area]})\n\n"
+            f"{template.solucion_base}\n\n"
+            f"**Tecnologías:** {', '.join(template.tecnologias)}\n"
+        )
+    cuerpo, separador, pie = propuesta.rpartition(SEPARADOR_BLOQUES)
+    complementarias = "## 5. ÁREAS COMPLEMENTARIAS\n\n" + "\n".join(bloques)
+    return f"{cuerpo}{separador}{complementarias}{separador}{pie}"
+
+
+def procesar_documento(ruta: str) -> Dict[str, Any]:
+    """Analiza un documento y genera su propuesta (se ejecuta en un worker)"""
+    global _generador
+    if _generador is None:
+        _generador = GeneradorPropuestas()
+
+    registro: Dict[str, Any] = {"ruta": ruta, "bytes": 0, "exitoso": False}
+    try:
+        with open(ruta, "rb") as archivo:
+            registro["bytes"] = os.fstat(archivo.fileno()).st_size
+            if registro["bytes"] == 0:
+                raise ValueError("Archivo vacío")
+            with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+                secciones = dividir_secciones(datos)
+                analisis_secciones = [
+                    analizar_en_fragmentos(fragmentos_mmap(datos, inicio, fin))
+                    for _, inicio, fin in secciones
+                ]
+                analisis = _analisis_documento(datos, ruta, analisis_secciones)
+
+        # Área principal como en la necesidad corta: desciende a subáreas
+        area, _ = area_desde_coincidencias_jerarquica(analisis.coincidencias)
+        puntajes = puntuar_areas(analisis_secciones)
+        sector = area.split(SEPARADOR_RUTA, 1)[0]
+        areas = areas_mas_fuertes(puntajes)
+        if sector in TEMPLATES:
+            areas = ([sector] + [a for a in areas if a != sector])[:MAX_AREAS]
+        resultado = _generador.generar_propuesta_extensa(
+            analisis, area_especifica=area, incluir_trazabilidad=False
+        )
+        if not resultado.exitoso:
+            raise ValueError(resultado.error)
+
+        puntajes_dict = dict(puntajes)
+        resultado = replace(
+            resultado,
+            propuesta=_agregar_areas_complementarias(
+                resultado.propuesta, areas[1:], puntajes_dict
+            ),
+        )
+        registro.update(
+            exitoso=True,
+            sha256=analisis.digest,
+            area_principal=resultado.area_detectada,
+            areas=puntajes_dict,
+            areas_combinadas=areas,
+            secciones=[
+                {
+                    "titulo": titulo,
+                    "bytes": fin - inicio,
+                    "puntajes": {a: len(p) for a, p in a_seccion.coincidencias.items()},
+                }
+                for (titulo, inicio, fin), a_seccion in zip(
+                    secciones, analisis_secciones
+                )
+            ],
+            propuesta=resultado.propuesta,
+        )
+    except Exception as e:
+        registro["error"] = str(e)
+    return registro
+
+
+class ProgresoIngesta:
+    """Progreso y throughput de la ingesta, reportado cada `intervalo_s`"""
+
+    def __init__(
+        self, total_documentos: int, total_bytes: int, intervalo_s: float = 10.0
+    ):
+        self.total_documentos = total_documentos
+        self.total_bytes = total_bytes
+        self.intervalo_s = intervalo_s
+        self.documentos = 0
+        self.bytes = 0
+        self.errores = 0
+        self.inicio = time.monotonic()
+        self._ultimo_reporte = self.inicio
+
+    def registrar(self, registro: Dict[str, Any]):
+        self.documentos += 1
+        self.bytes += registro["bytes"]
+        self.errores += not registro["exitoso"]
+        if time.monotonic() - self._ultimo_reporte >= self.intervalo_s:
+            self.reportar()
+
+    def reportar(self):
+        self._ultimo_reporte = time.monotonic()
+        segundos = max(self._ultimo_reporte - self.inicio, 1e-9)
+        mb_s = self.bytes / segundos / 1e6
+        restante = (
+            (self.total_bytes - self.bytes) / (self.bytes / segundos)
+            if self.bytes
+            else 0
+        )
+        print(
+            f"[{self.documentos}/{self.total_documentos} docs] "
+            f"{self.bytes / 1e9:.2f}/{self.total_bytes / 1e9:.2f} GB  "
+            f"{mb_s:.1f} MB/s  {self.documentos / segundos:.1f} docs/s  "
+            f"errores {self.errores}  ETA {time.strftime('%H:%M:%S', time.gmtime(restante))}",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def _truncar_linea_incompleta(salida: str, bloque: int = 1 << 16) -> int:
+    """
+    Corta la salida tras su último salto de línea: si la ejecución anterior
+    murió a mitad de una escritura, la línea truncada no debe quedar pegada
+    a los registros nuevos. Retorna los bytes descartados.
+    """
+    if not os.path.exists(salida):
+        return 0
+    with open(salida, "rb+") as archivo:
+        tamano = archivo.seek(0, os.SEEK_END)
+        fin = tamano
+        while fin > 0:
+            inicio = max(0, fin - bloque)
+            archivo.seek(inicio)
+            posicion = archivo.read(fin - inicio).rfind(b"\n")
+            if posicion >= 0:
+                fin = inicio + posicion + 1
+                break
+            fin = inicio
+        if fin < tamano:
+            archivo.truncate(fin)
+        return tamano - fin
+
+
+def _rutas_procesadas(salida: str) -> Set[str]:
+    """
+    Rutas procesadas con éxito en una salida previa (para reanudar). Las
+    fallidas se reintentan; su nuevo registro se agrega después y prevalece.
+    """
+    procesadas: Set[str] = set()
+    if os.path.exists(salida):
+        with open(salida, "r", encoding="utf-8") as archivo:
+            for linea in archivo:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                if registro.get("exitoso") and "ruta" in registro:
+                    procesadas.add(registro["ruta"])
+    return procesadas
+
+
+def ingerir_directorio(
+    directorio: str,
+    salida: str,
+    procesos: Optional[int] = None,
+    reanudar: bool = False,
+    intervalo_s: float = 10.0,
+) -> ProgresoIngesta:
+    """
+    Procesa todos los documentos del directorio en paralelo y escribe un
+    registro JSON por línea en `salida`. Mantiene acotado el número de
+    documentos en vuelo para no acumular resultados en memoria.
+    """
+    documentos = listar_documentos(directorio)
+    if reanudar:
+        descartados = _truncar_linea_incompleta(salida)
+        if descartados:
+            print(
+                f"Descartados {descartados} bytes de una línea incompleta en {salida}",
+                file=sys.stderr,
+            )
+        procesadas = _rutas_procesadas(salida)
+        documentos = [d for d in documentos if d[0] not in procesadas]
+
+    procesos = procesos or os.cpu_count() or 1
+    progreso = ProgresoIngesta(
+        len(documentos), sum(t for _, t in documentos), intervalo_s
+    )
+    pendientes = iter(documentos)
+
+    modo = "a" if reanudar else "w"
+    with open(salida, modo, encoding="utf-8") as archivo:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            en_vuelo = set()
+            for ruta, _ in pendientes:
+                en_vuelo.add(pool.submit(procesar_documento, ruta))
+                if len(en_vuelo) >= procesos * 4:
+                    break
+
+            while en_vuelo:
+                listos, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    registro = futuro.result()
+                    archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                    progreso.registrar(registro)
+                    siguiente = next(pendientes, None)
+                    if siguiente is not None:
+                        en_vuelo.add(pool.submit(procesar_documento, siguiente[0]))
+
+    progreso.reportar()
+    return progreso
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta de RFPs por directorio")
+    parser.add_argument("directorio")
+    parser.add_argument("--salida", default="propuestas_rfp.jsonl")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--intervalo-progreso", type=float, default=10.0)
+    parser.add_argument(
+        "--reanudar",
+        action="store_true",
+        help="Omite los documentos ya procesados con éxito y reintenta los fallidos",
+    )
+    args = parser.parse_args()
+
+    ingerir_directorio(
+        args.directorio,
+        args.salida,
+        procesos=args.procesos,
+        reanudar=args.reanudar,
+        intervalo_s=args.intervalo_progreso,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ Skills de LangChain para Arquitectura y Orquestación
 Extiende el agente con capacidades avanzadas de LangChain
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -27,19 +27,23 @@ class PatronOrquestacion(Enum):
     CONSUMER_PRODUCER = "consumer_producer"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ComponenteArquitectura:
     """Define un componente de arquitectura"""
 
     nombre: str
     tipo: str
     descripcion: str
-    tecnologias: List[str] = field(default_factory=list)
-    dependencias: List[str] = field(default_factory=list)
+    tecnologias: Tuple[str, ...] = ()
+    dependencias: Tuple[str, ...] = ()
     responsabilidad: str = ""
 
+    def __post_init__(self):
+        object.__setattr__(self, "tecnologias", tuple(self.tecnologias))
+        object.__setattr__(self, "dependencias", tuple(self.dependencias))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class SkillArquitectura:
     """Skill para generación de arquitecturas"""
 
@@ -260,7 +264,7 @@ class SkillArquitectura:
         return diagramas.get(tipo, "Diagrama no disponible")
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SkillOrquestacion:
     """Skill para orquestación de agentes"""
 
@@ -420,9 +424,9 @@ class SkillOrquestacion:
         return planes.get(patron, {})
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LangChainSkills:
-    """Clase principal que integra ambos skills"""
+    """Clase principal que integra ambos skills (inmutable, compartible entre hilos)"""
 
     arquitectura: SkillArquitectura = field(default_factory=SkillArquitectura)
     orquestacion: SkillOrquestacion = field(default_factory=SkillOrquestacion)
@@ -0,0 +1,287 @@
+"""
+Backends LLM intercambiables para el Generador de Propuestas
+Incluye batching, límite de concurrencia, reintentos con backoff
+y cache de respuestas en SQLite
+"""
+
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+class ErrorBackendLLM(Exception):
+    """Error al obtener respuesta de un backend LLM"""
+
+
+class BackendLLM(ABC):
+    """Interfaz de un backend capaz de completar lotes de prompts"""
+
+    nombre: str = "base"
+
+    @abstractmethod
+    def completar_lote(
+        self, prompts: List[str], modelo: str, temperatura: float
+    ) -> List[str]:
+        """Retorna una respuesta por prompt, en el mismo orden"""
+
+
+class BackendOpenAI(BackendLLM):
+    """Backend sobre ChatOpenAI de langchain-openai (requiere OPENAI_API_KEY)"""
+
+    nombre = "openai"
+
+    def __init__(self):
+        self._modelos: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _llm(self, modelo: str, temperatura: float):
+        clave = (modelo, temperatura)
+        with self._lock:
+            if clave not in self._modelos:
+                from langchain_openai import ChatOpenAI
+
+                self._modelos[clave] = ChatOpenAI(model=modelo, temperature=temperatura)
+            return self._modelos[clave]
+
+    def completar_lote(
+        self, prompts: List[str], modelo: str, temperatura: float
+    ) -> List[str]:
+        mensajes = self._llm(modelo, temperatura).batch(prompts)
+        return [m.content for m in mensajes]
+
+
+class BackendHTTP(BackendLLM):
+    """
+    Backend HTTP simple: POST {url}/v1/completar con
+    {"modelo", "temperatura", "prompts"} y respuesta {"respuestas": [...]}.
+    Es el protocolo de servidor_llm_falso.py.
+    """
+
+    nombre = "http"
+
+    def __init__(self, url: str, timeout_s: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout_s = timeout_s
+
+    def completar_lote(
+        self, prompts: List[str], modelo: str, temperatura: float
+    ) -> List[str]:
+        cuerpo = json.dumps(
+            {"modelo": modelo, "temperatura": temperatura, "prompts": prompts}
+        ).encode("utf-8")
+        peticion = urllib.request.Request(
+            f"{self.url}/v1/completar",
+            data=cuerpo,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(peticion, timeout=self.timeout_s) as resp:
+                datos = json.loads(resp.read().decode("utf-8"))
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise ErrorBackendLLM(f"Fallo en {self.url}: {e}") from e
+
+        respuestas = datos.get("respuestas", [])
+        if len(respuestas) != len(prompts):
+            raise ErrorBackendLLM(
+                f"Se esperaban {len(prompts)} respuestas y llegaron {len(respuestas)}"
+            )
+        return respuestas
+
+
+class CacheRespuestas:
+    """Cache persistente de respuestas indexada por prompt, modelo y temperatura"""
+
+    def __init__(self, ruta: str = "respuestas_llm.sqlite3"):
+        self.ruta = ruta
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        if ruta != ":memory:":
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                modelo TEXT NOT NULL,
+                temperatura REAL NOT NULL,
+                respuesta TEXT NOT NULL,
+                creado REAL NOT NULL
+            )
+            """)
+        self._conexion.commit()
+
+    @staticmethod
+    def clave(prompt: str, modelo: str, temperatura: float) -> str:
+        """Hash estable de la combinación prompt/modelo/temperatura"""
+        contenido = f"{modelo}\0{temperatura:.4f}\0{prompt}".encode("utf-8")
+        return hashlib.sha256(contenido).hexdigest()
+
+    def obtener_varios(self, claves: List[str]) -> Dict[str, str]:
+        """Retorna las respuestas cacheadas para las claves encontradas"""
+        encontradas: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(claves), 500):
+                bloque = claves[i : i + 500]
+                filas = self._conexion.execute(
+                    f"SELECT clave, respuesta FROM respuestas WHERE clave IN ({','.join('?' * len(bloque))})",
+                    bloque,
+                ).fetchall()
+                encontradas.update(filas)
+            self.aciertos += len(encontradas)
+            self.fallos += len(claves) - len(encontradas)
+        return encontradas
+
+    def guardar_varios(self, entradas: Dict[str, str], modelo: str, temperatura: float):
+        """Guarda respuestas nuevas en una sola transacción"""
+        ahora = time.time()
+        with self._lock:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?)",
+                [
+                    (clave, modelo, temperatura, respuesta, ahora)
+                    for clave, respuesta in entradas.items()
+                ],
+            )
+            self._conexion.commit()
+
+    def obtener_estadisticas(self) -> Dict[str, int]:
+        """Aciertos, fallos y número de entradas del cache"""
+        with self._lock:
+            total = self._conexion.execute(
+                "SELECT COUNT(*) FROM respuestas"
+            ).fetchone()[0]
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": total}
+
+    def cerrar(self):
+        """Cierra la conexión SQLite"""
+        with self._lock:
+            self._conexion.close()
+
+
+@dataclass
+class ClienteLLM:
+    """
+    Cliente sobre un BackendLLM que agrupa prompts en lotes, limita la
+    concurrencia, reintenta con backoff exponencial y usa el cache.
+    """
+
+    backend: BackendLLM
+    modelo: str = "gpt-4o-mini"
+    temperatura: float = 0.7
+    cache: Optional[CacheRespuestas] = None
+    tamano_lote: int = 8
+    max_concurrencia: int = 4
+    reintentos: int = 3
+    espera_base_s: float = 0.5
+    llamadas_backend: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        self._semaforo = threading.BoundedSemaphore(self.max_concurrencia)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrencia, thread_name_prefix="llm"
+        )
+        self._lock = threading.Lock()
+
+    def completar(self, prompt: str) -> str:
+        """Completa un único prompt"""
+        return self.completar_varios([prompt])[0]
+
+    def completar_varios(self, prompts: List[str]) -> List[str]:
+        """Completa varios prompts, resolviendo duplicados y aciertos de cache"""
+        claves = [
+            CacheRespuestas.clave(p, self.modelo, self.temperatura) for p in prompts
+        ]
+        respuestas: Dict[str, str] = {}
+        if self.cache is not None:
+            respuestas.update(self.cache.obtener_varios(list(dict.fromkeys(claves))))
+
+        pendientes: Dict[str, str] = {}
+        for clave, prompt in zip(claves, prompts):
+            if clave not in respuestas:
+                pendientes.setdefault(clave, prompt)
+
+        if pendientes:
+            items = list(pendientes.items())
+            lotes = [
+                items[i : i + self.tamano_lote]
+                for i in range(0, len(items), self.tamano_lote)
+            ]
+            for lote, resultado in zip(
+                lotes, self._executor.map(self._completar_lote, lotes)
+            ):
+                nuevas = {clave: r for (clave, _), r in zip(lote, resultado)}
+                respuestas.update(nuevas)
+                if self.cache is not None:
+                    self.cache.guardar_varios(nuevas, self.modelo, self.temperatura)
+
+        return [respuestas[clave] for clave in claves]
+
+    def _completar_lote(self, lote: List[tuple]) -> List[str]:
+        prompts = [prompt for _, prompt in lote]
+        for intento in range(self.reintentos + 1):
+            try:
+                with self._semaforo:
+                    with self._lock:
+                        self.llamadas_backend += 1
+                    return self.backend.completar_lote(
+                        prompts, self.modelo, self.temperatura
+                    )
+            except Exception as e:
+                if intento == self.reintentos:
+                    raise ErrorBackendLLM(
+                        f"{self.backend.nombre}: {e} tras {intento + 1} intentos"
+                    ) from e
+                espera = self.espera_base_s * (2**intento)
+                time.sleep(espera + random.uniform(0, espera / 2))
+
+    def cerrar(self):
+        """Libera el pool de hilos"""
+        self._executor.shutdown(wait=True)
+
+
+class AgenteLLM:
+    """Agente que genera propuestas con un LLM usando prompts.PROMPT_TEMPLATE"""
+
+    def __init__(self, cliente: ClienteLLM):
+        self.cliente = cliente
+
+    def _prompt(self, necesidad: str) -> str:
+        from prompts import PROMPT_TEMPLATE
+
+        return PROMPT_TEMPLATE.format(necesidad_negocio=necesidad)
+
+    def generar_propuesta(self, necesidad: str) -> str:
+        """Genera una propuesta en markdown para la necesidad"""
+        return self.cliente.completar(self._prompt(necesidad))
+
+    def generar_propuestas(self, necesidades: List[str]) -> List[str]:
+        """Genera propuestas para varias necesidades en lotes"""
+        return self.cliente.completar_varios([self._prompt(n) for n in necesidades])
+
+
+def crear_agente_llm(
+    model_name: str = "gpt-4o-mini",
+    temperature: float = 0.7,
+    backend: Optional[BackendLLM] = None,
+    ruta_cache: Optional[str] = "respuestas_llm.sqlite3",
+    **opciones,
+) -> AgenteLLM:
+    """Factory function para crear el agente LLM (OpenAI por defecto)"""
+    cliente = ClienteLLM(
+        backend=backend or BackendOpenAI(),
+        modelo=model_name,
+        temperatura=temperature,
+        cache=CacheRespuestas(ruta_cache) if ruta_cache else None,
+        **opciones,
+    )
+    return AgenteLLM(cliente)
@@ -0,0 +1,108 @@
+"""
+Presupuesto de arranque en frío de cli.py
+Lanza cli.py en procesos nuevos, toma la mediana del tiempo de pared y
+falla (código de salida 1) si se supera el presupuesto o si el CLI importa
+módulos de las interfaces (Streamlit, Gradio, skills). Uso:
+
+    python medicion_arranque.py --max-ms-propuesta 250
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+PRESUPUESTO_MS_AREAS = 200
+PRESUPUESTO_MS_PROPUESTA = 250
+PRESUPUESTO_MS_IMPORTS = 40
+
+RUTA_CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+MODULOS_PROHIBIDOS = ("streamlit", "gradio", "langchain_skills", "ejemplos", "numpy")
+
+
+def _mediana_ms(argumentos: List[str], repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *argumentos],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def medir(repeticiones: int = 7) -> Dict[str, float]:
+    """Mediana en ms de: intérprete vacío, --areas, una propuesta e imports propios"""
+    vacio = _mediana_ms(["-c", "pass"], repeticiones)
+    imports = _mediana_ms(["-c", "import cli"], repeticiones)
+    return {
+        "ms_interprete": vacio,
+        "ms_imports": imports - vacio,
+        "ms_areas": _mediana_ms([RUTA_CLI, "--areas"], repeticiones),
+        "ms_propuesta": _mediana_ms(
+            [RUTA_CLI, "Nuestra fintech necesita procesar pagos en tiempo real"],
+            repeticiones,
+        ),
+    }
+
+
+def modulos_prohibidos() -> List[str]:
+    """Módulos pesados que `import cli` arrastra y no debería"""
+    codigo = (
+        "import sys, cli; "
+        f"print(' '.join(m for m in {MODULOS_PROHIBIDOS!r} if m in sys.modules))"
+    )
+    salida = subprocess.run(
+        [sys.executable, "-c", codigo],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(RUTA_CLI),
+    )
+    return salida.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de arranque del CLI")
+    parser.add_argument("--repeticiones", type=int, default=7)
+    parser.add_argument("--max-ms-areas", type=float, default=PRESUPUESTO_MS_AREAS)
+    parser.add_argument(
+        "--max-ms-propuesta", type=float, default=PRESUPUESTO_MS_PROPUESTA
+    )
+    parser.add_argument("--max-ms-imports", type=float, default=PRESUPUESTO_MS_IMPORTS)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(RUTA_CLI))
+    medidas = medir(args.repeticiones)
+    presupuestos = {
+        "ms_imports": args.max_ms_imports,
+        "ms_areas": args.max_ms_areas,
+        "ms_propuesta": args.max_ms_propuesta,
+    }
+
+    excedido = False
+    for nombre, valor in medidas.items():
+        limite = presupuestos.get(nombre)
+        if limite is None:
+            print(f"{nombre:16s} {valor:8.1f} ms")
+            continue
+        estado = "OK" if valor <= limite else "EXCEDIDO"
+        excedido |= valor > limite
+        print(f"{nombre:16s} {valor:8.1f} ms  (presupuesto {limite:.0f} ms) {estado}")
+
+    prohibidos = modulos_prohibidos()
+    if prohibidos:
+        excedido = True
+        print(f"cli.py importa módulos de las interfaces: {', '.join(prohibidos)}")
+
+    return 1 if excedido else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Ahorro del historial por bloques direccionados por contenido
+Genera un historial realista, lo guarda con el esquema anterior (propuesta
+completa por fila) y con HistorialPropuestas, y compara tamaño en disco,
+bytes en memoria y tiempo de reensamblado. Uso:
+
+    python medicion_historial.py --propuestas 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Dict, List
+
+from agent import GeneradorPropuestas, ResultadoPropuesta
+from ejemplos import EJEMPLOS
+from historial_db import HistorialPropuestas
+
+# Esquema anterior: la propuesta completa en cada fila, FTS con contenido externo
+ESQUEMA_TEXTO_COMPLETO = """
+CREATE TABLE propuestas (
+    id INTEGER PRIMARY KEY,
+    creado REAL NOT NULL,
+    necesidad TEXT NOT NULL,
+    area TEXT NOT NULL,
+    propuesta TEXT NOT NULL,
+    secciones TEXT NOT NULL,
+    resumen_trazabilidad TEXT
+);
+CREATE INDEX idx_propuestas_area ON propuestas (area, id);
+CREATE VIRTUAL TABLE propuestas_fts USING fts5 (
+    necesidad, area, propuesta,
+    content = 'propuestas', content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER propuestas_ai AFTER INSERT ON propuestas BEGIN
+    INSERT INTO propuestas_fts (rowid, necesidad, area, propuesta)
+    VALUES (new.id, new.necesidad, new.area, new.propuesta);
+END;
+"""
+
+COMPLEMENTOS = (
+    "con integración a sistemas legacy",
+    "para 2 millones de usuarios activos",
+    "cumpliendo la regulación local",
+    "con reportes diarios para gerencia",
+    "en tres países de la región",
+    "reduciendo costos operativos en 30%",
+)
+
+
+def generar_historial(cantidad: int, semilla: int = 0) -> List[ResultadoPropuesta]:
+    """Propuestas con necesidades variadas sobre las áreas de EJEMPLOS"""
+    rng = random.Random(semilla)
+    generador = GeneradorPropuestas()
+    entradas = [e["input"] for e in EJEMPLOS.values()]
+    return [
+        generador.generar_propuesta(
+            f"{rng.choice(entradas)} {rng.choice(COMPLEMENTOS)} (#{i})",
+            incluir_trazabilidad=False,
+        )
+        for i in range(cantidad)
+    ]
+
+
+def _tamano_en_disco(ruta: str) -> int:
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conexion.execute("VACUUM")
+    conexion.close()
+    return os.path.getsize(ruta)
+
+
+def medir(cantidad: int) -> Dict[str, float]:
+    resultados = generar_historial(cantidad)
+    directorio = tempfile.mkdtemp(prefix="medicion_historial_")
+
+    ruta_texto = os.path.join(directorio, "texto_completo.sqlite3")
+    conexion = sqlite3.connect(ruta_texto)
+    conexion.executescript(ESQUEMA_TEXTO_COMPLETO)
+    with conexion:
+        conexion.executemany(
+            "INSERT INTO propuestas (creado, necesidad, area, propuesta, secciones) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    time.time(),
+                    r.inputs["necesidad"],
+                    r.area_detectada,
+                    r.propuesta,
+                    json.dumps(r.outputs, ensure_ascii=False),
+                )
+                for r in resultados
+            ),
+        )
+    conexion.close()
+
+    ruta_bloques = os.path.join(directorio, "bloques.sqlite3")
+    historial = HistorialPropuestas(ruta_bloques)
+    ids = historial.guardar_varios(resultados)
+    estadisticas = historial.obtener_estadisticas()
+
+    inicio = time.perf_counter()
+    for id_propuesta in ids:
+        historial.obtener(id_propuesta)
+    reensamblado_us = (time.perf_counter() - inicio) / len(ids) * 1e6
+    correcta = historial.obtener(ids[-1])["propuesta"] == resultados[-1].propuesta
+    historial.cerrar()
+
+    return {
+        "propuestas": cantidad,
+        "bloques_unicos": estadisticas["bloques_unicos"],
+        "disco_texto_completo_bytes": _tamano_en_disco(ruta_texto),
+        "disco_bloques_bytes": _tamano_en_disco(ruta_bloques),
+        "memoria_texto_completo_bytes": estadisticas["bytes_logicos"],
+        "memoria_bloques_bytes": estadisticas["bytes_almacenados"],
+        "ahorro_contenido": estadisticas["ahorro"],
+        "reensamblado_us": reensamblado_us,
+        "reensamblado_correcto": correcta,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ahorro del historial por bloques")
+    parser.add_argument("--propuestas", type=int, default=5000)
+    args = parser.parse_args()
+
+    medida = medir(args.propuestas)
+    for nombre, valor in medida.items():
+        if isinstance(valor, float):
+            print(f"{nombre:32s} {valor:14.3f}")
+        else:
+            print(f"{nombre:32s} {valor!s:>14}")
+    ahorro_disco = (
+        1 - medida["disco_bloques_bytes"] / medida["disco_texto_completo_bytes"]
+    )
+    print(f"{'ahorro_disco':32s} {ahorro_disco:14.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Medición de memoria con tracemalloc
+Reporta bytes por template del catálogo y por ResultadoPropuesta y falla
+(código de salida 1) si se supera el presupuesto. Uso:
+
+    python medicion_memoria.py --max-bytes-resultado 6000
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from dataclasses import fields
+from typing import Any, Dict
+
+PRESUPUESTO_BYTES_TEMPLATE = 3_000
+PRESUPUESTO_BYTES_RESULTADO = 4_000
+PRESUPUESTO_BYTES_RESULTADO_CON_TRAZA = 10_000
+
+
+def _copiar(valor: Any) -> Any:
+    """Copia con strings nuevos, para que sus bytes entren en la medición"""
+    if isinstance(valor, str):
+        return "".join(list(valor))
+    if isinstance(valor, tuple):
+        return tuple(_copiar(v) for v in valor)
+    return valor
+
+
+def medir_bytes_por_template() -> float:
+    """
+    Bytes retenidos por cada entrada del catálogo: se reconstruye cada
+    TemplatePropuesta desde copias de sus campos (el internado de
+    __post_init__ sigue aplicando) y se divide por la cantidad. No incluye
+    el código del módulo, que no crece con el catálogo.
+    """
+    from templates import TEMPLATES, TemplatePropuesta
+
+    campos = [f.name for f in fields(TemplatePropuesta)]
+    originales = list(TEMPLATES.values())
+
+    gc.collect()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    copias = [
+        TemplatePropuesta(**{c: _copiar(getattr(t, c)) for c in campos})
+        for t in originales
+    ]
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+
+    del copias
+    return total / len(originales)
+
+
+def medir_bytes_por_resultado(
+    cantidad: int = 2000, incluir_trazabilidad: bool = False
+) -> float:
+    """Bytes retenidos por cada ResultadoPropuesta generado"""
+    from agent import GeneradorPropuestas
+
+    generador = GeneradorPropuestas()
+    generador.generar_propuesta("Calentamiento del generador de propuestas")
+
+    gc.collect()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    resultados = [
+        generador.generar_propuesta(
+            f"Nuestra fintech necesita procesar pagos en tiempo real #{i}",
+            incluir_trazabilidad=incluir_trazabilidad,
+        )
+        for i in range(cantidad)
+    ]
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+
+    del resultados
+    return total / cantidad
+
+
+def medir() -> Dict[str, float]:
+    """Ejecuta todas las mediciones"""
+    return {
+        "bytes_por_template": medir_bytes_por_template(),
+        "bytes_por_resultado": medir_bytes_por_resultado(),
+        "bytes_por_resultado_con_traza": medir_bytes_por_resultado(
+            incluir_trazabilidad=True
+        ),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Presupuesto de memoria")
+    parser.add_argument(
+        "--max-bytes-template", type=float, default=PRESUPUESTO_BYTES_TEMPLATE
+    )
+    parser.add_argument(
+        "--max-bytes-resultado", type=float, default=PRESUPUESTO_BYTES_RESULTADO
+    )
+    parser.add_argument(
+        "--max-bytes-resultado-traza",
+        type=float,
+        default=PRESUPUESTO_BYTES_RESULTADO_CON_TRAZA,
+    )
+    args = parser.parse_args()
+
+    medidas = medir()
+    presupuestos = {
+        "bytes_por_template": args.max_bytes_template,
+        "bytes_por_resultado": args.max_bytes_resultado,
+        "bytes_por_resultado_con_traza": args.max_bytes_resultado_traza,
+    }
+
+    excedido = False
+    for nombre, valor in medidas.items():
+        limite = presupuestos[nombre]
+        estado = "OK" if valor <= limite else "EXCEDIDO"
+        excedido |= valor > limite
+        print(f"{nombre:32s} {valor:10.0f} B  (presupuesto {limite:.0f} B) {estado}")
+
+    return 1 if excedido else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
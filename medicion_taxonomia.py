@@ -0,0 +1,95 @@
+"""
+Latencia de la detección jerárquica según el tamaño de la taxonomía
+Registra una taxonomía sintética bajo cada sector (subsectores x
+especialidades) y compara detectar_area_jerarquica con un recorrido plano
+de todas las hojas. La jerárquica debería mantenerse casi constante al
+crecer la cantidad de hojas. Uso:
+
+    python medicion_taxonomia.py --ramas 4 8 16 32 --repeticiones 2000
+"""
+
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+import taxonomia
+from templates import TEMPLATES, buscar_palabras
+
+
+def registrar_sintetica(ramas: int) -> List[str]:
+    """
+    `ramas` subsectores por sector y `ramas` especialidades por subsector.
+    La palabra clave de cada hoja contiene la de su subsector.
+    """
+    taxonomia.restaurar_taxonomia({})
+    hojas = []
+    for sector in TEMPLATES:
+        for i in range(ramas):
+            subsector = f"{sector}/sub{i}"
+            clave = f"{sector}-s{i:04d}"
+            taxonomia.registrar_subarea(
+                subsector, palabras_clave=(clave,), descripcion=subsector
+            )
+            for j in range(ramas):
+                hoja = f"{subsector}/esp{j}"
+                taxonomia.registrar_subarea(hoja, palabras_clave=(f"{clave}-e{j:04d}",))
+                hojas.append(hoja)
+    return hojas
+
+
+def detectar_plano(necesidad: str, palabras_por_hoja: List) -> str:
+    """Referencia: busca las palabras clave de todas las hojas"""
+    coincidencias = buscar_palabras(necesidad.lower(), palabras_por_hoja, [])
+    return max(coincidencias, key=lambda h: len(coincidencias[h]), default="general")
+
+
+def medir(ramas: int, repeticiones: int) -> Dict[str, float]:
+    hojas = registrar_sintetica(ramas)
+    sector = next(iter(TEMPLATES))
+    objetivo = f"{sector}/sub{ramas - 1}/esp{ramas - 1}"
+    necesidad = (
+        f"Plataforma de {TEMPLATES[sector].palabras_clave[0]} "
+        f"con {sector}-s{ramas - 1:04d}-e{ramas - 1:04d}"
+    )
+    area = taxonomia.detectar_area(necesidad)
+    if area != objetivo:
+        raise RuntimeError(f"Detección incorrecta: {area} (esperada {objetivo})")
+
+    subareas = taxonomia.instantanea_taxonomia()
+    palabras_por_hoja = [(h, subareas[h]["palabras_clave"]) for h in hojas]
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        taxonomia.detectar_area(necesidad)
+    jerarquica = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        detectar_plano(necesidad, palabras_por_hoja)
+    plana = time.perf_counter() - inicio
+
+    return {
+        "hojas": len(hojas),
+        "us_jerarquica": jerarquica / repeticiones * 1e6,
+        "us_plana": plana / repeticiones * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de la taxonomía")
+    parser.add_argument("--ramas", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--repeticiones", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'ramas':>6s} {'hojas':>7s} {'jerárquica':>12s} {'plana':>12s}")
+    for ramas in args.ramas:
+        medidas = medir(ramas, args.repeticiones)
+        print(
+            f"{ramas:6d} {medidas['hojas']:7d} "
+            f"{medidas['us_jerarquica']:9.1f} us {medidas['us_plana']:9.1f} us"
+        )
+    taxonomia.restaurar_taxonomia({})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Pool de workers con precarga en el proceso padre
+El padre importa y construye templates, skills, el generador y sus caches,
+congela el heap con gc.freeze() y recién entonces crea los workers con
+fork, de modo que los datos estáticos quedan compartidos copy-on-write.
+Con spawn/forkserver nada se comparte: opcionalmente el padre publica el
+catálogo de templates (con overlays) y la taxonomía en
+multiprocessing.shared_memory solo como medio de transporte, y cada worker
+deserializa su propia copia (la USS por worker es la de un proceso
+independiente, no la de fork). Reporta la memoria única (USS) de cada worker. Uso:
+
+    python pool_workers.py --workers 8 --propuestas 20000
+    python pool_workers.py --workers 8 --sin-freeze          # comparar
+    python pool_workers.py --workers 4 --inicio spawn --memoria-compartida
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+
+from agent import (
+    SECCIONES,
+    GeneradorPropuestas,
+    ResultadoPropuesta,
+    planificar_etapas,
+)
+from ejemplos import EJEMPLOS
+from langchain_skills import LangChainSkills, crear_skills
+from taxonomia import instantanea_taxonomia, restaurar_taxonomia
+from templates import instantanea_catalogo, listar_areas, restaurar_catalogo
+
+_generador: Optional[GeneradorPropuestas] = None
+_skills: Optional[LangChainSkills] = None
+
+
+def precargar(congelar: bool = True) -> GeneradorPropuestas:
+    """
+    Construye el estado compartido en el proceso actual: generador, skills,
+    plan de etapas y una propuesta por área para calentar los caches. Con
+    `congelar`, mueve todo el heap a la generación permanente del GC para
+    que los recorridos del recolector no ensucien las páginas compartidas.
+    """
+    global _generador, _skills
+    gc.disable()
+    try:
+        _generador = GeneradorPropuestas()
+        _skills = crear_skills()
+        planificar_etapas(SECCIONES)
+        for area in listar_areas():
+            ejemplo = EJEMPLOS.get(area, {}).get("input", f"Necesidad de {area}")
+            _generador.generar_propuesta(ejemplo, area, incluir_trazabilidad=False)
+        gc.collect()
+        if congelar:
+            gc.freeze()
+    finally:
+        gc.enable()
+    return _generador
+
+
+def _inicializar_worker(nombre_memoria: Optional[str], congelar: bool):
+    """
+    Con fork el estado ya viene del padre; con spawn se reconstruye. El
+    bloque de shared_memory solo trae el catálogo del padre: se deserializa
+    a objetos propios del worker y se cierra.
+    """
+    if nombre_memoria is not None:
+        memoria = shared_memory.SharedMemory(name=nombre_memoria)
+        try:
+            catalogo, subareas = pickle.loads(memoria.buf)
+            restaurar_catalogo(*catalogo)
+            restaurar_taxonomia(subareas)
+        finally:
+            memoria.close()
+    if _generador is None:
+        precargar(congelar)
+
+
+def _generar(necesidad: str, area: Optional[str]) -> ResultadoPropuesta:
+    return _generador.generar_propuesta(necesidad, area, incluir_trazabilidad=False)
+
+
+def _pid_worker(_: int) -> int:
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def memoria_proceso(pid: int) -> Dict[str, int]:
+    """RSS, PSS y USS (privada) en bytes según /proc/<pid>/smaps_rollup"""
+    campos: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as archivo:
+            for linea in archivo:
+                partes = linea.split()
+                if len(partes) == 3 and partes[2] == "kB":
+                    campos[partes[0].rstrip(":")] = int(partes[1]) * 1024
+    except OSError:
+        return {}
+    return {
+        "rss": campos.get("Rss", 0),
+        "pss": campos.get("Pss", 0),
+        "uss": campos.get("Private_Clean", 0) + campos.get("Private_Dirty", 0),
+    }
+
+
+class PoolPrecargado:
+    """
+    ProcessPoolExecutor cuyos workers heredan el estado precargado.
+
+    - inicio="fork" (por defecto): precarga y gc.freeze() en el padre antes
+      de crear los workers; no hay trabajo de arranque en cada worker.
+    - inicio="spawn"/"forkserver": cada worker precarga por su cuenta y
+      tiene su propia copia de todo. `memoria_compartida` solo cambia de
+      dónde sale el catálogo: toma templates, overlays y taxonomía del padre
+      desde un bloque de shared_memory (en lugar de los del módulo), pero
+      cada worker lo deserializa y no ahorra memoria frente a spawn simple.
+    """
+
+    def __init__(
+        self,
+        workers: int = os.cpu_count() or 1,
+        inicio: str = "fork",
+        congelar: bool = True,
+        memoria_compartida: bool = False,
+    ):
+        self.workers = workers
+        self.inicio = inicio
+        self._memoria: Optional[shared_memory.SharedMemory] = None
+
+        if memoria_compartida:
+            datos = pickle.dumps(
+                (instantanea_catalogo(), instantanea_taxonomia()),
+                pickle.HIGHEST_PROTOCOL,
+            )
+            self._memoria = shared_memory.SharedMemory(create=True, size=len(datos))
+            self._memoria.buf[: len(datos)] = datos
+
+        if inicio == "fork":
+            precargar(congelar)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(inicio),
+            initializer=_inicializar_worker,
+            initargs=(self._memoria.name if self._memoria else None, congelar),
+        )
+        self.pids = self._arrancar_workers()
+
+    def _arrancar_workers(self) -> List[int]:
+        """Fuerza el arranque de todos los workers y retorna sus pids"""
+        return sorted(set(self._executor.map(_pid_worker, range(self.workers * 4))))
+
+    def generar(self, necesidad: str, area: Optional[str] = None):
+        """Future con el ResultadoPropuesta de una necesidad"""
+        return self._executor.submit(_generar, necesidad, area)
+
+    def generar_lote(
+        self,
+        necesidades: Sequence[str],
+        areas: Optional[Sequence[Optional[str]]] = None,
+        tamano_bloque: int = 64,
+    ) -> List[ResultadoPropuesta]:
+        """Genera un lote repartido entre los workers, en orden"""
+        areas = areas if areas is not None else [None] * len(necesidades)
+        return list(
+            self._executor.map(_generar, necesidades, areas, chunksize=tamano_bloque)
+        )
+
+    def memoria(self) -> Dict[str, Dict[str, int]]:
+        """Memoria del padre y de cada worker"""
+        medidas = {"padre": memoria_proceso(os.getpid())}
+        for pid in self.pids:
+            medidas[f"worker {pid}"] = memoria_proceso(pid)
+        return medidas
+
+    def cerrar(self):
+        self._executor.shutdown(wait=True)
+        if self._memoria is not None:
+            self._memoria.close()
+            self._memoria.unlink()
+            self._memoria = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pool de workers precargado")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--propuestas", type=int, default=5000)
+    parser.add_argument(
+        "--inicio", choices=("fork", "forkserver", "spawn"), default="fork"
+    )
+    parser.add_argument("--sin-freeze", action="store_true")
+    parser.add_argument(
+        "--memoria-compartida",
+        action="store_true",
+        help="con spawn/forkserver, enviar el catálogo del padre a los workers",
+    )
+    args = parser.parse_args()
+
+    entradas = [e["input"] for e in EJEMPLOS.values()]
+    necesidades = [
+        f"{entradas[i % len(entradas)]} (#{i})" for i in range(args.propuestas)
+    ]
+
+    inicio = time.perf_counter()
+    with PoolPrecargado(
+        args.workers, args.inicio, not args.sin_freeze, args.memoria_compartida
+    ) as pool:
+        arranque = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        resultados = pool.generar_lote(necesidades)
+        segundos = time.perf_counter() - inicio
+        medidas = pool.memoria()
+
+    errores = sum(not r.exitoso for r in resultados)
+    print(
+        f"{args.workers} workers ({args.inicio}, "
+        f"{'sin' if args.sin_freeze else 'con'} gc.freeze): arranque {arranque:.2f} s, "
+        f"{len(resultados) / segundos:.0f} propuestas/s, {errores} errores\n"
+    )
+    print(f"{'proceso':>16} {'RSS MB':>9} {'PSS MB':>9} {'USS MB':>9}")
+    for nombre, medida in medidas.items():
+        if medida:
+            print(
+                f"{nombre:>16} {medida['rss'] / 1e6:9.1f} "
+                f"{medida['pss'] / 1e6:9.1f} {medida['uss'] / 1e6:9.1f}"
+            )
+    workers = [m for n, m in medidas.items() if n != "padre" and m]
+    if workers:
+        uss_media = sum(m["uss"] for m in workers) / len(workers)
+        print(f"\nUSS media por worker: {uss_media / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Vista previa en vivo con generación especulativa
+Mientras el usuario escribe se detecta el área y se pre-genera la propuesta
+en segundo plano, de modo que "Generar" pueda responder al instante.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from agent import GeneradorPropuestas, ResultadoPropuesta
+from taxonomia import detectar_area_jerarquica, existe_area
+from templates import CoincidenciaPalabra
+
+
+@dataclass
+class VistaPrevia:
+    """Resultado (parcial o completo) de la vista previa de una sesión"""
+
+    necesidad: str
+    area_especifica: Optional[str]
+    area: str
+    coincidencias: Dict[str, List[str]] = field(default_factory=dict)
+    resultado: Optional[ResultadoPropuesta] = None
+    posiciones: Tuple[CoincidenciaPalabra, ...] = ()
+
+
+@dataclass
+class _EstadoSesion:
+    """Trabajo especulativo en curso de una sesión"""
+
+    version: int = 0
+    necesidad: Optional[str] = None
+    area_especifica: Optional[str] = None
+    temporizador: Optional[threading.Timer] = None
+    futuro: Optional[Future] = None
+    vista: Optional[VistaPrevia] = None
+
+
+class Previsualizador:
+    """
+    Programa vistas previas con debounce y las ejecuta en un pool acotado
+    compartido por todas las sesiones. Cada nueva entrada de una sesión
+    cancela el trabajo pendiente de la anterior, así el trabajo obsoleto
+    no se acumula con muchos usuarios concurrentes.
+    """
+
+    def __init__(
+        self,
+        generador: Optional[GeneradorPropuestas] = None,
+        espera_s: float = 0.4,
+        max_workers: int = 2,
+        max_sesiones: int = 1000,
+    ):
+        self.generador = generador or GeneradorPropuestas()
+        self.espera_s = espera_s
+        self.max_sesiones = max_sesiones
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="vista_previa"
+        )
+        self._lock = threading.Lock()
+        self._sesiones: "OrderedDict[str, _EstadoSesion]" = OrderedDict()
+
+    def solicitar(
+        self, sesion: str, necesidad: str, area_especifica: Optional[str] = None
+    ):
+        """Programa la vista previa de la sesión descartando la anterior"""
+        with self._lock:
+            estado = self._sesiones.get(sesion)
+            if estado is None:
+                estado = self._sesiones[sesion] = _EstadoSesion()
+                while len(self._sesiones) > self.max_sesiones:
+                    _, antiguo = self._sesiones.popitem(last=False)
+                    self._cancelar(antiguo)
+            else:
+                self._sesiones.move_to_end(sesion)
+
+            if (
+                estado.necesidad == necesidad
+                and estado.area_especifica == area_especifica
+            ):
+                return
+
+            self._cancelar(estado)
+            estado.version += 1
+            estado.necesidad = necesidad
+            estado.area_especifica = area_especifica
+            estado.vista = None
+            estado.temporizador = threading.Timer(
+                self.espera_s,
+                self._lanzar,
+                (sesion, estado.version, necesidad, area_especifica),
+            )
+            estado.temporizador.daemon = True
+            estado.temporizador.start()
+
+    def obtener(self, sesion: str) -> Optional[VistaPrevia]:
+        """Vista previa más reciente de la sesión (puede no tener propuesta aún)"""
+        with self._lock:
+            estado = self._sesiones.get(sesion)
+            return estado.vista if estado else None
+
+    def resultado_para(
+        self, sesion: str, necesidad: str, area_especifica: Optional[str] = None
+    ) -> Optional[ResultadoPropuesta]:
+        """Propuesta pre-generada si corresponde exactamente a la entrada dada"""
+        vista = self.obtener(sesion)
+        if (
+            vista is not None
+            and vista.resultado is not None
+            and vista.necesidad == necesidad
+            and vista.area_especifica == area_especifica
+        ):
+            return vista.resultado
+        return None
+
+    def cerrar_sesion(self, sesion: str):
+        """Cancela el trabajo pendiente y olvida la sesión"""
+        with self._lock:
+            estado = self._sesiones.pop(sesion, None)
+            if estado is not None:
+                self._cancelar(estado)
+
+    def cerrar(self):
+        """Cancela todo el trabajo pendiente y detiene el pool"""
+        with self._lock:
+            for estado in self._sesiones.values():
+                self._cancelar(estado)
+            self._sesiones.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cancelar(self, estado: _EstadoSesion):
+        if estado.temporizador is not None:
+            estado.temporizador.cancel()
+            estado.temporizador = None
+        if estado.futuro is not None:
+            estado.futuro.cancel()
+            estado.futuro = None
+
+    def _vigente(self, sesion: str, version: int) -> bool:
+        estado = self._sesiones.get(sesion)
+        return estado is not None and estado.version == version
+
+    def _lanzar(
+        self,
+        sesion: str,
+        version: int,
+        necesidad: str,
+        area_especifica: Optional[str],
+    ):
+        with self._lock:
+            if not self._vigente(sesion, version):
+                return
+            estado = self._sesiones[sesion]
+            estado.temporizador = None
+            estado.futuro = self._executor.submit(
+                self._calcular, sesion, version, necesidad, area_especifica
+            )
+
+    def _calcular(
+        self,
+        sesion: str,
+        version: int,
+        necesidad: str,
+        area_especifica: Optional[str],
+    ):
+        area, coincidencias, posiciones = detectar_area_jerarquica(necesidad)
+        if area_especifica and existe_area(area_especifica):
+            area = area_especifica
+        vista = VistaPrevia(
+            necesidad, area_especifica, area, coincidencias, posiciones=posiciones
+        )
+
+        with self._lock:
+            if not self._vigente(sesion, version):
+                return
+            self._sesiones[sesion].vista = vista
+
+        # La detección ya hecha se reutiliza: una sola por tecla
+        resultado = self.generador.generar_propuesta(
+            necesidad,
+            area_especifica=area_especifica,
+            deteccion=(area, posiciones),
+        )
+
+        with self._lock:
+            if self._vigente(sesion, version):
+                vista.resultado = resultado
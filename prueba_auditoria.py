@@ -0,0 +1,196 @@
+"""
+Prueba del registro de auditoría JSONL
+Ejercita la cola, las políticas "descartar" y "bloquear", la rotación por
+tamaño y el vaciado al cerrar (también con productores concurrentes). Un
+escritor lento (que demora cada serialización) llena la cola a propósito.
+Falla (código de salida 1) si se pierde o duplica un registro aceptado, si
+un archivo supera el límite de tamaño o si se acepta un registro después
+de cerrar. Uso:
+
+    python prueba_auditoria.py --registros 300 --max-bytes 20000
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from agent import GeneradorPropuestas, ResultadoPropuesta
+from auditoria import RegistroAuditoria
+
+
+class RegistroLento(RegistroAuditoria):
+    """RegistroAuditoria cuyo hilo de fondo tarda `demora_s` por registro"""
+
+    def __init__(self, ruta: str, demora_s: float, **opciones):
+        self.demora_s = demora_s
+        super().__init__(ruta, **opciones)
+
+    def _serializar(self, item: tuple) -> bytes:
+        time.sleep(self.demora_s)
+        return super()._serializar(item)
+
+
+def _lineas(ruta: str) -> List[dict]:
+    """Registros de ruta, ruta.1, ruta.2, ... (del más antiguo al más nuevo)"""
+    archivos = sorted(
+        glob.glob(f"{ruta}.*"), key=lambda r: -int(r.rsplit(".", 1)[1])
+    ) + ([ruta] if os.path.exists(ruta) else [])
+    registros = []
+    for archivo in archivos:
+        with open(archivo, encoding="utf-8") as f:
+            registros.extend(json.loads(linea) for linea in f)
+    return registros
+
+
+def _resultado(generador: GeneradorPropuestas, i: int) -> ResultadoPropuesta:
+    return generador.generar_propuesta(
+        f"Nuestra fintech necesita pagos en tiempo real, pedido {i}",
+        incluir_trazabilidad=False,
+    )
+
+
+def probar_cierre(directorio: str, resultados: List) -> Tuple[bool, str]:
+    """Todo lo encolado se escribe al cerrar; después se rechaza"""
+    ruta = os.path.join(directorio, "cierre.jsonl")
+    registro = RegistroAuditoria(ruta, intervalo_escritura_s=5.0)
+    aceptados = sum(registro.registrar(r) for r in resultados)
+    registro.cerrar()
+    tardio = registro.registrar(resultados[0])
+    estadisticas = registro.obtener_estadisticas()
+    escritos = len(_lineas(ruta))
+    ok = (
+        aceptados == len(resultados) == escritos
+        and not tardio
+        and estadisticas["fsyncs"] >= 1
+    )
+    return ok, (
+        f"{aceptados} aceptados, {escritos} escritos, "
+        f"tras cerrar {'aceptado' if tardio else 'rechazado'}, "
+        f"{estadisticas['fsyncs']} fsyncs"
+    )
+
+
+def probar_descartar(directorio: str, resultados: List) -> Tuple[bool, str]:
+    """Con la cola llena se descarta sin esperar y se cuenta"""
+    ruta = os.path.join(directorio, "descartar.jsonl")
+    registro = RegistroLento(ruta, 0.005, politica="descartar", capacidad=4)
+    inicio = time.perf_counter()
+    aceptados = sum(registro.registrar(r) for r in resultados)
+    segundos = time.perf_counter() - inicio
+    registro.cerrar()
+    estadisticas = registro.obtener_estadisticas()
+    escritos = len(_lineas(ruta))
+    ok = (
+        0 < aceptados < len(resultados)
+        and aceptados + estadisticas["descartados"] == len(resultados)
+        and escritos == aceptados
+        and segundos < 0.005 * len(resultados)
+    )
+    return ok, (
+        f"{aceptados} aceptados, {estadisticas['descartados']} descartados, "
+        f"{escritos} escritos, encolar {segundos * 1000:.1f} ms"
+    )
+
+
+def probar_bloquear(directorio: str, resultados: List) -> Tuple[bool, str]:
+    """Sin timeout la petición espera y no se pierde nada"""
+    ruta = os.path.join(directorio, "bloquear.jsonl")
+    registro = RegistroLento(ruta, 0.001, politica="bloquear", capacidad=4)
+    aceptados = sum(registro.registrar(r) for r in resultados)
+    registro.cerrar()
+    estadisticas = registro.obtener_estadisticas()
+    escritos = len(_lineas(ruta))
+    ok = aceptados == escritos == len(resultados) and not estadisticas["descartados"]
+    return ok, f"{aceptados} aceptados, {escritos} escritos"
+
+
+def probar_rotacion(
+    directorio: str, resultados: List, max_bytes: int
+) -> Tuple[bool, str]:
+    """Ningún archivo supera max_bytes salvo una línea sola más grande"""
+    ruta = os.path.join(directorio, "rotacion.jsonl")
+    registro = RegistroAuditoria(
+        ruta, max_bytes_archivo=max_bytes, max_archivos=len(resultados) + 1
+    )
+    for r in resultados:
+        registro.registrar(r)
+    registro.cerrar()
+    archivos = glob.glob(f"{ruta}*")
+    excedidos = []
+    for archivo in archivos:
+        with open(archivo, "rb") as f:
+            lineas = f.readlines()
+        if os.path.getsize(archivo) > max_bytes and len(lineas) > 1:
+            excedidos.append(archivo)
+    registros = _lineas(ruta)
+    en_orden = [r["inputs"]["necesidad"] for r in registros] == [
+        r.inputs["necesidad"] for r in resultados
+    ]
+    estadisticas = registro.obtener_estadisticas()
+    ok = (
+        not excedidos
+        and len(registros) == len(resultados)
+        and en_orden
+        and estadisticas["rotaciones"] == len(archivos) - 1
+    )
+    return ok, (
+        f"{len(archivos)} archivos, máx {max(map(os.path.getsize, archivos))} B, "
+        f"{len(excedidos)} excedidos, {len(registros)} registros"
+        f"{'' if en_orden else ' (desordenados)'}"
+    )
+
+
+def probar_concurrencia(directorio: str, resultados: List) -> Tuple[bool, str]:
+    """Productores concurrentes con cerrar(): lo aceptado se escribe"""
+    perdidos = 0
+    for ronda in range(20):
+        ruta = os.path.join(directorio, f"concurrencia{ronda}.jsonl")
+        registro = RegistroAuditoria(ruta, intervalo_escritura_s=0.01)
+        aceptados = [0] * 4
+
+        def producir(numero: int):
+            for r in resultados:
+                aceptados[numero] += registro.registrar(r)
+
+        hilos = [threading.Thread(target=producir, args=(n,)) for n in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        registro.cerrar()
+        for hilo in hilos:
+            hilo.join()
+        perdidos += sum(aceptados) - len(_lineas(ruta))
+    return perdidos == 0, f"{perdidos} aceptados sin escribir en 20 rondas"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba del registro de auditoría")
+    parser.add_argument("--registros", type=int, default=300)
+    parser.add_argument("--max-bytes", type=int, default=20_000)
+    args = parser.parse_args()
+
+    generador = GeneradorPropuestas()
+    resultados = [_resultado(generador, i) for i in range(args.registros)]
+
+    fallo = False
+    with tempfile.TemporaryDirectory() as directorio:
+        pruebas: Dict[str, Tuple[bool, str]] = {
+            "cierre": probar_cierre(directorio, resultados),
+            "descartar": probar_descartar(directorio, resultados),
+            "bloquear": probar_bloquear(directorio, resultados),
+            "rotacion": probar_rotacion(directorio, resultados, args.max_bytes),
+            "concurrencia": probar_concurrencia(directorio, resultados),
+        }
+    for nombre, (ok, detalle) in pruebas.items():
+        fallo |= not ok
+        print(f"{nombre:14s} {'OK' if ok else 'FALLA':6s} {detalle}")
+    return 1 if fallo else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
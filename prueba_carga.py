@@ -0,0 +1,521 @@
+"""
+Generador de tráfico sintético y prueba de carga
+Produce necesidades realistas a partir de EJEMPLOS y las palabras clave de
+los templates (distribución de largo, mezcla de áreas, tasa de duplicados y
+ruido) y las envía al generador en proceso, a un pool de hilos o procesos o
+a un endpoint HTTP del generador (servidor_propuestas.py), en lazo cerrado
+(concurrencia fija) o abierto (tasa objetivo). Reporta throughput,
+percentiles de latencia, CPU y RSS por intervalo; en modo http, los del
+proceso servidor. Uso:
+
+    python prueba_carga.py --modo hilos --concurrencia 8 --duracion 30
+    python prueba_carga.py --modo procesos --workers 4 --tasa 2000
+    python prueba_carga.py --modo http --concurrencia 16      # servidor local propio
+    python prueba_carga.py --modo http --url http://127.0.0.1:8080 --pid-servidor 1234
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agent import GeneradorPropuestas
+from ejemplos import EJEMPLOS
+from templates import TEMPLATES
+
+MODOS = ("directo", "hilos", "procesos", "http")
+
+PALABRAS_RELLENO = (
+    "empresa",
+    "clientes",
+    "proceso",
+    "actualmente",
+    "sistema",
+    "equipo",
+    "plataforma",
+    "necesidad",
+    "mejorar",
+    "reducir",
+    "tiempos",
+    "manual",
+    "reportes",
+    "integración",
+    "usuarios",
+    "operación",
+    "calidad",
+    "datos",
+    "región",
+    "crecimiento",
+    "costos",
+    "gestión",
+    "seguimiento",
+    "control",
+)
+
+
+@dataclass
+class GeneradorTrafico:
+    """
+    Necesidades sintéticas. El largo (caracteres) sigue una lognormal de
+    media `largo_medio`; cada palabra agregada es palabra clave del área
+    elegida con `proporcion_palabras_clave`, palabra clave de otra área con
+    `ruido` y relleno en el resto. Con `tasa_duplicados` se repite una
+    necesidad reciente.
+    """
+
+    largo_medio: float = 160.0
+    largo_sigma: float = 0.6
+    largo_maximo: int = 20_000
+    mezcla_areas: Optional[Dict[str, float]] = None
+    tasa_duplicados: float = 0.1
+    proporcion_palabras_clave: float = 0.3
+    ruido: float = 0.1
+    semilla: Optional[int] = None
+    _rng: random.Random = field(init=False, repr=False)
+    _recientes: deque = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.semilla)
+        self._recientes = deque(maxlen=1000)
+        mezcla = self.mezcla_areas or {area: 1.0 for area in TEMPLATES}
+        desconocidas = set(mezcla) - set(TEMPLATES)
+        if desconocidas:
+            raise ValueError(f"Áreas desconocidas: {', '.join(sorted(desconocidas))}")
+        self._areas = list(mezcla)
+        self._pesos = [mezcla[a] for a in self._areas]
+
+    def _largo(self) -> int:
+        mu = math.log(self.largo_medio) - self.largo_sigma**2 / 2
+        largo = int(self._rng.lognormvariate(mu, self.largo_sigma))
+        return max(20, min(largo, self.largo_maximo))
+
+    def siguiente(self) -> str:
+        """Una necesidad (posiblemente duplicada de una reciente)"""
+        rng = self._rng
+        if self._recientes and rng.random() < self.tasa_duplicados:
+            return rng.choice(self._recientes)
+
+        area = rng.choices(self._areas, self._pesos)[0]
+        largo = self._largo()
+        base = EJEMPLOS[area]["input"] if area in EJEMPLOS else ""
+        if len(base) > largo:
+            base = base[: max(base.rfind(" ", 0, largo), 10)]
+
+        palabras = [base]
+        actual = len(base)
+        otras = [a for a in TEMPLATES if a != area]
+        while actual < largo:
+            tirada = rng.random()
+            if tirada < self.proporcion_palabras_clave:
+                palabra = rng.choice(TEMPLATES[area].palabras_clave)
+            elif tirada < self.proporcion_palabras_clave + self.ruido:
+                palabra = rng.choice(TEMPLATES[rng.choice(otras)].palabras_clave)
+            else:
+                palabra = rng.choice(PALABRAS_RELLENO)
+            palabras.append(palabra)
+            actual += len(palabra) + 1
+
+        necesidad = " ".join(palabras)
+        self._recientes.append(necesidad)
+        return necesidad
+
+
+_generador_worker: Optional[GeneradorPropuestas] = None
+
+
+def _generar_en_worker(necesidad: str) -> bool:
+    """Tarea de los workers de procesos (un generador por proceso)"""
+    global _generador_worker
+    if _generador_worker is None:
+        _generador_worker = GeneradorPropuestas()
+    return _generador_worker.generar_propuesta(
+        necesidad, incluir_trazabilidad=False
+    ).exitoso
+
+
+def crear_destino(
+    modo: str, workers: int, url: Optional[str] = None
+) -> Tuple[Executor, Callable[[str], bool]]:
+    """Executor y tarea que atiende cada petición según el modo"""
+    if modo not in MODOS:
+        raise ValueError(f"Modo no soportado: {modo}. Usa {MODOS}")
+
+    if modo == "procesos":
+        return ProcessPoolExecutor(max_workers=workers), _generar_en_worker
+
+    if modo == "http":
+        destino = urllib.parse.urlsplit(url)
+        local = threading.local()
+
+        def tarea(necesidad: str) -> bool:
+            # Una conexión persistente por hilo, como un cliente real
+            conexion = getattr(local, "conexion", None)
+            if conexion is None:
+                conexion = local.conexion = http.client.HTTPConnection(
+                    destino.hostname, destino.port, timeout=30
+                )
+            cuerpo = json.dumps({"necesidad": necesidad}).encode("utf-8")
+            try:
+                conexion.request(
+                    "POST",
+                    "/v1/propuestas",
+                    body=cuerpo,
+                    headers={"Content-Type": "application/json"},
+                )
+                respuesta = conexion.getresponse()
+                datos = json.loads(respuesta.read())
+            except (OSError, http.client.HTTPException, ValueError):
+                conexion.close()
+                local.conexion = None
+                raise
+            return respuesta.status == 200 and datos["exitoso"]
+
+    else:
+        generador = GeneradorPropuestas()
+
+        def tarea(necesidad: str) -> bool:
+            return generador.generar_propuesta(
+                necesidad, incluir_trazabilidad=False
+            ).exitoso
+
+    hilos = 1 if modo == "directo" else workers
+    return ThreadPoolExecutor(max_workers=hilos), tarea
+
+
+def percentil(ordenados: List[float], p: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not ordenados:
+        return 0.0
+    return ordenados[
+        min(len(ordenados) - 1, max(0, math.ceil(p / 100 * len(ordenados)) - 1))
+    ]
+
+
+def _pids_hijos(executor: Executor) -> List[int]:
+    procesos = getattr(executor, "_processes", None) or {}
+    return list(procesos)
+
+
+def _leer_proc(pid: int) -> Optional[tuple]:
+    """(segundos de CPU, RSS en bytes) de un proceso leyendo /proc"""
+    try:
+        with open(f"/proc/{pid}/stat") as archivo:
+            campos = archivo.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as archivo:
+            paginas_rss = int(archivo.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return (
+        (int(campos[11]) + int(campos[12])) / ticks,
+        paginas_rss * os.sysconf("SC_PAGE_SIZE"),
+    )
+
+
+def medir_recursos(
+    executor: Executor, pids: Optional[List[int]] = None
+) -> Dict[str, float]:
+    """
+    CPU acumulada (s) y RSS (bytes) de `pids` o, sin ellos, del proceso y
+    de sus workers
+    """
+    cpu, rss = 0.0, 0
+    for pid in pids or [os.getpid()] + _pids_hijos(executor):
+        lectura = _leer_proc(pid)
+        if lectura:
+            cpu += lectura[0]
+            rss += lectura[1]
+    if rss == 0 and not pids:
+        uso = resource.getrusage(resource.RUSAGE_SELF)
+        cpu, rss = uso.ru_utime + uso.ru_stime, uso.ru_maxrss * 1024
+    return {"cpu_s": cpu, "rss_bytes": rss}
+
+
+class Metricas:
+    """Latencias y errores acumulados por intervalo y en total"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._intervalo = array("d")
+        self.total = array("d")
+        self.errores = 0
+        self.descartadas = 0
+
+    def registrar(self, latencia_ms: float, exitosa: bool):
+        with self._lock:
+            self._intervalo.append(latencia_ms)
+            self.total.append(latencia_ms)
+            self.errores += not exitosa
+
+    def cerrar_intervalo(self) -> List[float]:
+        with self._lock:
+            latencias, self._intervalo = self._intervalo, array("d")
+        return sorted(latencias)
+
+
+def _resumen_latencias(ordenadas: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": percentil(ordenadas, 50),
+        "p90_ms": percentil(ordenadas, 90),
+        "p99_ms": percentil(ordenadas, 99),
+        "max_ms": ordenadas[-1] if ordenadas else 0.0,
+    }
+
+
+def ejecutar_prueba(
+    trafico: GeneradorTrafico,
+    modo: str = "hilos",
+    concurrencia: int = 8,
+    workers: Optional[int] = None,
+    tasa: Optional[float] = None,
+    duracion_s: float = 30.0,
+    intervalo_s: float = 1.0,
+    url: Optional[str] = None,
+    reportar: Optional[Callable[[Dict[str, Any]], None]] = print,
+    pids_medidos: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Ejecuta la prueba y retorna el resumen con la serie por intervalo.
+    Sin `tasa` es lazo cerrado: `concurrencia` clientes envían una petición
+    tras otra. Con `tasa` es lazo abierto: se envían `tasa` peticiones/s y la
+    latencia se mide desde el instante programado (incluye la espera en
+    cola); si hay más de 10 * workers en vuelo, las nuevas se descartan.
+    CPU y RSS son los de `pids_medidos` (p. ej. el servidor HTTP) o, sin
+    ellos, los de este proceso y sus workers.
+    """
+    workers = workers or concurrencia
+    executor, tarea = crear_destino(modo, workers, url)
+    metricas = Metricas()
+    serie: List[Dict[str, Any]] = []
+    fin = time.monotonic() + duracion_s
+    activo = threading.Event()
+    activo.set()
+
+    # Una necesidad nueva por petición, así la tasa de duplicados es la
+    # configurada; se genera antes de tomar el tiempo de inicio
+    lock_trafico = threading.Lock()
+
+    def siguiente_necesidad() -> str:
+        with lock_trafico:
+            return trafico.siguiente()
+
+    def enviar(necesidad: str, programada: float) -> Future:
+        futuro = executor.submit(tarea, necesidad)
+
+        def terminado(f: Future):
+            try:
+                exitosa = bool(f.result())
+            except Exception:
+                exitosa = False
+            metricas.registrar((time.perf_counter() - programada) * 1000, exitosa)
+
+        futuro.add_done_callback(terminado)
+        return futuro
+
+    def cliente():
+        while activo.is_set() and time.monotonic() < fin:
+            necesidad = siguiente_necesidad()
+            try:
+                enviar(necesidad, time.perf_counter()).result()
+            except Exception:
+                pass
+
+    def despachador():
+        en_vuelo: deque = deque()
+        inicio = time.perf_counter()
+        i = 0
+        while activo.is_set() and time.monotonic() < fin:
+            necesidad = siguiente_necesidad()
+            programada = inicio + i / tasa
+            espera = programada - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            while en_vuelo and en_vuelo[0].done():
+                en_vuelo.popleft()
+            if len(en_vuelo) >= 10 * workers:
+                metricas.descartadas += 1
+            else:
+                en_vuelo.append(enviar(necesidad, programada))
+            i += 1
+
+    hilos = (
+        [threading.Thread(target=despachador, daemon=True)]
+        if tasa
+        else [
+            threading.Thread(target=cliente, daemon=True) for _ in range(concurrencia)
+        ]
+    )
+
+    recursos_previos = medir_recursos(executor, pids_medidos)
+    inicio = time.monotonic()
+    for hilo in hilos:
+        hilo.start()
+
+    try:
+        anterior = inicio
+        while time.monotonic() < fin:
+            time.sleep(min(intervalo_s, max(0.0, fin - time.monotonic())))
+            ahora = time.monotonic()
+            recursos = medir_recursos(executor, pids_medidos)
+            latencias = metricas.cerrar_intervalo()
+            punto = {
+                "t_s": round(ahora - inicio, 2),
+                "peticiones_s": len(latencias) / (ahora - anterior),
+                **_resumen_latencias(latencias),
+                "cpu_pct": 100
+                * (recursos["cpu_s"] - recursos_previos["cpu_s"])
+                / (ahora - anterior),
+                "rss_mb": recursos["rss_bytes"] / 1e6,
+            }
+            serie.append(punto)
+            if reportar:
+                reportar(_formatear_punto(punto))
+            anterior, recursos_previos = ahora, recursos
+    finally:
+        activo.clear()
+        for hilo in hilos:
+            hilo.join()
+        executor.shutdown(wait=True)
+
+    total = sorted(metricas.total)
+    segundos = time.monotonic() - inicio
+    return {
+        "modo": modo,
+        "concurrencia": None if tasa else concurrencia,
+        "tasa_objetivo": tasa,
+        "workers": workers,
+        "recursos_de": "servidor" if pids_medidos else "cliente",
+        "peticiones": len(total),
+        "errores": metricas.errores,
+        "descartadas": metricas.descartadas,
+        "peticiones_s": len(total) / segundos,
+        **_resumen_latencias(total),
+        "cpu_pct_medio": (
+            sum(p["cpu_pct"] for p in serie) / len(serie) if serie else 0.0
+        ),
+        "rss_mb_max": max((p["rss_mb"] for p in serie), default=0.0),
+        "serie": serie,
+    }
+
+
+def _formatear_punto(punto: Dict[str, Any]) -> str:
+    return (
+        f"t={punto['t_s']:7.1f}s  {punto['peticiones_s']:9.1f} pet/s  "
+        f"p50 {punto['p50_ms']:7.2f}  p90 {punto['p90_ms']:7.2f}  "
+        f"p99 {punto['p99_ms']:7.2f} ms  CPU {punto['cpu_pct']:6.1f}%  "
+        f"RSS {punto['rss_mb']:7.1f} MB"
+    )
+
+
+def _parsear_mezcla(texto: Optional[str]) -> Optional[Dict[str, float]]:
+    if not texto:
+        return None
+    mezcla = {}
+    for parte in texto.split(","):
+        area, _, peso = parte.partition("=")
+        mezcla[area.strip()] = float(peso or 1)
+    return mezcla
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del generador")
+    parser.add_argument("--modo", choices=MODOS, default="hilos")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--tasa", type=float, default=None, help="Peticiones/s (lazo abierto)"
+    )
+    parser.add_argument("--duracion", type=float, default=30.0)
+    parser.add_argument("--intervalo", type=float, default=1.0)
+    parser.add_argument(
+        "--url", default=None, help="Endpoint HTTP (por defecto uno local)"
+    )
+    parser.add_argument(
+        "--pid-servidor",
+        type=int,
+        default=None,
+        help="PID del servidor de --url para medir su CPU y RSS",
+    )
+    parser.add_argument("--largo-medio", type=float, default=160.0)
+    parser.add_argument("--largo-sigma", type=float, default=0.6)
+    parser.add_argument("--mezcla", default=None, help="p. ej. fintech=3,medica=1")
+    parser.add_argument("--duplicados", type=float, default=0.1)
+    parser.add_argument("--ruido", type=float, default=0.1)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida-json", default=None)
+    args = parser.parse_args()
+
+    trafico = GeneradorTrafico(
+        largo_medio=args.largo_medio,
+        largo_sigma=args.largo_sigma,
+        mezcla_areas=_parsear_mezcla(args.mezcla),
+        tasa_duplicados=args.duplicados,
+        ruido=args.ruido,
+        semilla=args.semilla,
+    )
+
+    servidor = None
+    url = args.url
+    pids_medidos = [args.pid_servidor] if args.pid_servidor else None
+    if args.modo == "http" and url is None:
+        # En su propio proceso, así CPU y RSS son solo los del servidor
+        servidor = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(
+                    os.path.dirname(os.path.abspath(__file__)), "servidor_propuestas.py"
+                ),
+                "--puerto",
+                "0",
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        url = servidor.stdout.readline().rsplit(" ", 1)[-1].strip()
+        pids_medidos = [servidor.pid]
+
+    try:
+        resumen = ejecutar_prueba(
+            trafico,
+            modo=args.modo,
+            concurrencia=args.concurrencia,
+            workers=args.workers,
+            tasa=args.tasa,
+            duracion_s=args.duracion,
+            intervalo_s=args.intervalo,
+            url=url,
+            pids_medidos=pids_medidos,
+        )
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    print(
+        f"\n{resumen['peticiones']} peticiones, {resumen['errores']} errores, "
+        f"{resumen['descartadas']} descartadas  ->  {resumen['peticiones_s']:.1f} pet/s\n"
+        f"latencia p50 {resumen['p50_ms']:.2f} / p90 {resumen['p90_ms']:.2f} / "
+        f"p99 {resumen['p99_ms']:.2f} / max {resumen['max_ms']:.2f} ms\n"
+        f"CPU medio {resumen['cpu_pct_medio']:.1f}%  RSS máx {resumen['rss_mb_max']:.1f} MB"
+        f" ({resumen['recursos_de']})"
+    )
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as archivo:
+            json.dump(resumen, archivo, indent=2)
+
+
+if __name__ == "__main__":
+    main()
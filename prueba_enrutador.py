@@ -0,0 +1,91 @@
+"""
+Prueba del presupuesto de latencia del enrutador con un LLM lento
+Un agente LLM que tarda mucho más que el presupuesto no debe retrasar el
+respaldo con template de las peticiones siguientes: mientras la primera
+llamada sigue en curso, las siguientes responden sin esperar el presupuesto
+y no se encolan llamadas que el LLM atendería después. Falla (código de
+salida 1) si alguna petición posterior a la primera tarda más de la mitad
+del presupuesto o si el LLM recibe llamadas vencidas. Uso:
+
+    python prueba_enrutador.py --presupuesto-ms 100 --peticiones 20
+"""
+
+import argparse
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from enrutador import EnrutadorPropuestas
+
+# Sin palabras clave de ningún área: siempre ambigua, siempre se escala
+NECESIDAD_AMBIGUA = "Necesitamos modernizar la gestión interna de la empresa"
+
+
+class AgenteLento:
+    """Agente LLM falso que tarda `demora_s` en cada propuesta"""
+
+    def __init__(self, demora_s: float):
+        self.demora_s = demora_s
+        self.llamadas = 0
+        self._lock = threading.Lock()
+
+    def generar_propuesta(self, necesidad: str) -> str:
+        with self._lock:
+            self.llamadas += 1
+        time.sleep(self.demora_s)
+        return f"# Propuesta LLM\n\n{necesidad}"
+
+
+def probar(
+    presupuesto_ms: float, peticiones: int, demora_s: float
+) -> Dict[str, object]:
+    """Latencia de cada petición ambigua en serie contra el agente lento"""
+    agente = AgenteLento(demora_s)
+    enrutador = EnrutadorPropuestas(
+        agente_llm=agente, presupuesto_ms=presupuesto_ms, max_concurrencia_llm=1
+    )
+    latencias: List[float] = []
+    for _ in range(peticiones):
+        inicio = time.perf_counter()
+        resultado = enrutador.generar_propuesta(NECESIDAD_AMBIGUA)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if not resultado.exitoso or resultado.outputs["nivel"] != "template":
+            raise RuntimeError("Se esperaba el respaldo con template")
+
+    # Las llamadas que quedaran en cola se ejecutarían al liberarse el worker
+    time.sleep(demora_s * 2)
+    return {
+        "latencia_primera_ms": latencias[0],
+        "latencia_max_siguientes_ms": max(latencias[1:], default=0.0),
+        "lentas": sum(latencia > presupuesto_ms / 2 for latencia in latencias[1:]),
+        "llamadas_llm": agente.llamadas,
+        **enrutador.obtener_contadores(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto del enrutador")
+    parser.add_argument("--presupuesto-ms", type=float, default=100.0)
+    parser.add_argument("--peticiones", type=int, default=20)
+    parser.add_argument("--demora-s", type=float, default=2.0)
+    args = parser.parse_args()
+
+    medida = probar(args.presupuesto_ms, args.peticiones, args.demora_s)
+    for nombre, valor in medida.items():
+        print(f"{nombre:32s} {valor}")
+
+    fallo = False
+    if medida["lentas"]:
+        fallo = True
+        print(f"{medida['lentas']} respaldos esperaron más de la mitad del presupuesto")
+    if medida["llamadas_llm"] > 1:
+        fallo = True
+        print(
+            f"El LLM atendió {medida['llamadas_llm']} llamadas ya vencidas o encoladas"
+        )
+    return 1 if fallo else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
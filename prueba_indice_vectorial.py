@@ -0,0 +1,60 @@
+"""
+Prueba del idf del índice vectorial en cargas por lotes
+Inserta en un solo lote varias necesidades que comparten términos (como la
+carga inicial del historial en Streamlit) y verifica que todas las que
+comparten un término con la consulta tengan similitud positiva y que la
+obvia quede primera. Falla (código de salida 1) si no. Uso:
+
+    python prueba_indice_vectorial.py --copias 1000
+"""
+
+import argparse
+import sys
+
+from indice_vectorial import IndiceVectorial
+
+NECESIDADES = [
+    "pagos transacciones banco",
+    "pagos con tarjeta para comercios",
+    "pagos recurrentes y suscripciones",
+    "app móvil para pacientes",
+    "inventario de bodega con picking",
+]
+CONSULTA = "pagos con tarjeta"
+ESPERADA = 1
+# Comparten "pagos" con la consulta
+RELACIONADAS = (0, 1, 2)
+
+
+def probar(copias: int) -> list:
+    """Resultados (id, similitud) de la consulta tras una carga en un solo lote"""
+    indice = IndiceVectorial()
+    relleno = [f"necesidad de relleno número {i}" for i in range(copias)]
+    indice.agregar_varios(NECESIDADES + relleno)
+
+    resultados = indice.buscar(CONSULTA, k=len(RELACIONADAS))
+    for id_, similitud in resultados:
+        print(f"  id {id_:6d}  similitud {similitud:.3f}  {NECESIDADES[id_]}")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="idf del índice en lotes")
+    parser.add_argument("--copias", type=int, default=1000)
+    args = parser.parse_args()
+
+    resultados = probar(args.copias)
+    fallo = False
+    # buscar() descarta las similitudes <= 0: una relacionada ausente es negativa
+    faltantes = set(RELACIONADAS) - {id_ for id_, _ in resultados}
+    if faltantes:
+        fallo = True
+        print(f"Sin similitud positiva: {', '.join(NECESIDADES[i] for i in faltantes)}")
+    if not resultados or resultados[0][0] != ESPERADA:
+        fallo = True
+        print(f"'{NECESIDADES[ESPERADA]}' no es el primer resultado de '{CONSULTA}'")
+    return 1 if fallo else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
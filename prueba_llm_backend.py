@@ -0,0 +1,144 @@
+"""
+Prueba de ClienteLLM contra servidor_llm_falso (sin red ni API key)
+Verifica que los prompts se agrupen en lotes de `tamano_lote`, que los
+duplicados y los aciertos de cache no lleguen al servidor, que los errores
+transitorios se reintenten y que un backend caído termine en
+ErrorBackendLLM. Falla (código de salida 1) si alguna verificación no se
+cumple. Uso:
+
+    python prueba_llm_backend.py --prompts 64 --tamano-lote 8
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Dict, Tuple
+
+from llm_backend import BackendHTTP, CacheRespuestas, ClienteLLM, ErrorBackendLLM
+from servidor_llm_falso import ServidorLLMFalso, iniciar_servidor
+
+
+def _url(servidor: ServidorLLMFalso) -> str:
+    return f"http://127.0.0.1:{servidor.server_port}"
+
+
+def _contar(servidor: ServidorLLMFalso) -> Dict[str, int]:
+    with servidor._lock:
+        return dict(servidor.estadisticas)
+
+
+def probar_lotes_y_cache(prompts: int, tamano_lote: int) -> Dict[str, Tuple[bool, str]]:
+    """Lotes, duplicados y cache contra un servidor sin errores"""
+    servidor = iniciar_servidor(latencia_ms=20.0, latencia_por_prompt_ms=1.0)
+    cache = CacheRespuestas(":memory:")
+    cliente = ClienteLLM(
+        BackendHTTP(_url(servidor)), cache=cache, tamano_lote=tamano_lote
+    )
+    textos = [f"Necesidad de prueba número {i} con pagos" for i in range(prompts)]
+    lotes_esperados = -(-prompts // tamano_lote)
+    medidas: Dict[str, Tuple[bool, str]] = {}
+    try:
+        inicio = time.perf_counter()
+        respuestas = cliente.completar_varios(textos)
+        segundos = time.perf_counter() - inicio
+        conteo = _contar(servidor)
+        medidas["lotes"] = (
+            conteo["peticiones"] == lotes_esperados
+            and conteo["prompts"] == prompts
+            and all(respuestas),
+            f"{conteo['prompts']} prompts en {conteo['peticiones']} peticiones "
+            f"(esperadas {lotes_esperados}), {prompts / segundos:.0f} prompts/s",
+        )
+
+        duplicados = [f"Duplicado {i % 3}" for i in range(12)]
+        antes = _contar(servidor)
+        repetidas = cliente.completar_varios(duplicados)
+        enviados = _contar(servidor)["prompts"] - antes["prompts"]
+        medidas["duplicados"] = (
+            enviados == 3 and repetidas[0] == repetidas[3],
+            f"12 prompts con 3 distintos -> {enviados} enviados",
+        )
+
+        antes = _contar(servidor)
+        aciertos_previos = cache.aciertos
+        inicio = time.perf_counter()
+        cacheadas = cliente.completar_varios(textos)
+        segundos = time.perf_counter() - inicio
+        nuevas = _contar(servidor)["peticiones"] - antes["peticiones"]
+        medidas["cache"] = (
+            nuevas == 0
+            and cacheadas == respuestas
+            and cache.aciertos - aciertos_previos == prompts,
+            f"{cache.aciertos - aciertos_previos} aciertos, {nuevas} peticiones, "
+            f"{prompts / segundos:.0f} prompts/s",
+        )
+    finally:
+        cliente.cerrar()
+        cache.cerrar()
+        servidor.shutdown()
+    return medidas
+
+
+def probar_reintentos(prompts: int, tamano_lote: int) -> Dict[str, Tuple[bool, str]]:
+    """Errores 503 transitorios se reintentan; un backend caído falla"""
+    random.seed(0)
+    servidor = iniciar_servidor(
+        latencia_ms=1.0, latencia_por_prompt_ms=0.0, tasa_error=0.5
+    )
+    cliente = ClienteLLM(
+        BackendHTTP(_url(servidor)),
+        tamano_lote=tamano_lote,
+        reintentos=8,
+        espera_base_s=0.001,
+    )
+    medidas: Dict[str, Tuple[bool, str]] = {}
+    try:
+        respuestas = cliente.completar_varios(
+            [f"Reintento {i} de logística" for i in range(prompts)]
+        )
+        conteo = _contar(servidor)
+        medidas["reintentos"] = (
+            all(respuestas)
+            and conteo["errores"] > 0
+            and cliente.llamadas_backend == conteo["peticiones"]
+            and conteo["peticiones"] - conteo["errores"] == -(-prompts // tamano_lote),
+            f"{conteo['errores']} errores simulados, "
+            f"{cliente.llamadas_backend} llamadas, todas las respuestas recibidas",
+        )
+    finally:
+        cliente.cerrar()
+
+    servidor.tasa_error = 1.0
+    caido = ClienteLLM(BackendHTTP(_url(servidor)), reintentos=2, espera_base_s=0.001)
+    try:
+        caido.completar("Backend caído")
+        medidas["agotados"] = (False, "no se lanzó ErrorBackendLLM")
+    except ErrorBackendLLM:
+        medidas["agotados"] = (
+            caido.llamadas_backend == 3,
+            f"ErrorBackendLLM tras {caido.llamadas_backend} intentos",
+        )
+    finally:
+        caido.cerrar()
+        servidor.shutdown()
+    return medidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ClienteLLM contra el servidor falso")
+    parser.add_argument("--prompts", type=int, default=64)
+    parser.add_argument("--tamano-lote", type=int, default=8)
+    args = parser.parse_args()
+
+    medidas = {
+        **probar_lotes_y_cache(args.prompts, args.tamano_lote),
+        **probar_reintentos(args.prompts, args.tamano_lote),
+    }
+    for nombre, (ok, detalle) in medidas.items():
+        print(f"{nombre:12s} {'OK' if ok else 'FALLA':6s} {detalle}")
+    return 0 if all(ok for ok, _ in medidas.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Throughput del endpoint Gradio por lotes
+Levanta app.py en un puerto local, simula clientes concurrentes con
+gradio_client y compara peticiones por segundo sin lotes (max_lote=1)
+y con lotes. Uso:
+
+    python rendimiento_gradio.py --clientes 32 --peticiones 20 --max-lote 16
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from gradio_client import Client
+
+from app import AREA_AUTOMATICA, crear_app
+
+NECESIDADES = (
+    "Nuestra fintech necesita procesar pagos en tiempo real",
+    "Queremos una app móvil para pedidos con notificaciones push",
+    "Necesitamos trazabilidad de contratos con blockchain",
+    "Migrar el monolito a microservicios en Kubernetes",
+)
+
+
+def medir(
+    clientes: int, peticiones: int, concurrencia: int, max_lote: int, puerto: int
+) -> Dict[str, float]:
+    """Peticiones por segundo con `clientes` clientes enviando en paralelo"""
+    app = crear_app(concurrencia=concurrencia, max_lote=max_lote)
+    app.launch(server_port=puerto, prevent_thread_lock=True, quiet=True)
+    url = f"http://127.0.0.1:{puerto}/"
+
+    with ThreadPoolExecutor(max_workers=clientes) as pool:
+        conexiones = list(
+            pool.map(lambda _: Client(url, verbose=False), range(clientes))
+        )
+
+    def cliente(numero: int) -> int:
+        conexion = conexiones[numero]
+        for i in range(peticiones):
+            necesidad = f"{NECESIDADES[(numero + i) % len(NECESIDADES)]} #{numero}-{i}"
+            conexion.predict(necesidad, AREA_AUTOMATICA, api_name="/generar_propuesta")
+        return peticiones
+
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clientes) as pool:
+            total = sum(pool.map(cliente, range(clientes)))
+        segundos = time.perf_counter() - inicio
+    finally:
+        app.close()
+
+    return {"peticiones": total, "segundos": segundos, "por_segundo": total / segundos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput del endpoint por lotes")
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--peticiones", type=int, default=20)
+    parser.add_argument("--concurrencia", type=int, default=4)
+    parser.add_argument("--max-lote", type=int, default=16)
+    parser.add_argument("--puerto", type=int, default=7861)
+    args = parser.parse_args()
+
+    for max_lote in (1, args.max_lote):
+        medida = medir(
+            args.clientes, args.peticiones, args.concurrencia, max_lote, args.puerto
+        )
+        print(
+            f"max_lote={max_lote:3d}  {medida['peticiones']:6.0f} peticiones en "
+            f"{medida['segundos']:6.2f} s  ->  {medida['por_segundo']:8.1f} pet/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
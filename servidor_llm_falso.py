@@ -0,0 +1,147 @@
+"""
+Servidor LLM falso para pruebas offline
+Implementa el protocolo de BackendHTTP con latencia configurable y responde
+con propuestas del motor de templates. Uso:
+
+    python servidor_llm_falso.py --puerto 8765 --latencia-ms 300
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from agent import GeneradorPropuestas
+
+PATRON_NECESIDAD = re.compile(
+    r"## Necesidad de negocio descrita:\s*(.*?)\s*## Instrucciones", re.DOTALL
+)
+
+
+class ServidorLLMFalso(ThreadingHTTPServer):
+    """Servidor HTTP que simula un proveedor LLM"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        direccion: Tuple[str, int],
+        latencia_ms: float = 200.0,
+        latencia_por_prompt_ms: float = 20.0,
+        jitter_ms: float = 0.0,
+        tasa_error: float = 0.0,
+    ):
+        super().__init__(direccion, _ManejadorLLM)
+        self.latencia_ms = latencia_ms
+        self.latencia_por_prompt_ms = latencia_por_prompt_ms
+        self.jitter_ms = jitter_ms
+        self.tasa_error = tasa_error
+        self.generador = GeneradorPropuestas()
+        self.estadisticas = {"peticiones": 0, "prompts": 0, "errores": 0}
+        self._lock = threading.Lock()
+
+    def responder(self, prompt: str) -> str:
+        """Respuesta determinista: propuesta de templates para la necesidad del prompt"""
+        coincidencia = PATRON_NECESIDAD.search(prompt)
+        necesidad = coincidencia.group(1) if coincidencia else prompt
+        resultado = self.generador.generar_propuesta(
+            necesidad, incluir_trazabilidad=False
+        )
+        return resultado.propuesta if resultado.exitoso else f"Error: {resultado.error}"
+
+
+class _ManejadorLLM(BaseHTTPRequestHandler):
+    server: ServidorLLMFalso
+
+    def log_message(self, format, *args):
+        pass
+
+    def _enviar_json(self, codigo: int, datos: dict):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        if self.path == "/v1/estadisticas":
+            with self.server._lock:
+                self._enviar_json(200, dict(self.server.estadisticas))
+        else:
+            self._enviar_json(404, {"error": "ruta no encontrada"})
+
+    def do_POST(self):
+        if self.path != "/v1/completar":
+            self._enviar_json(404, {"error": "ruta no encontrada"})
+            return
+
+        longitud = int(self.headers.get("Content-Length", 0))
+        try:
+            datos = json.loads(self.rfile.read(longitud).decode("utf-8"))
+            prompts = list(datos["prompts"])
+        except (ValueError, KeyError, TypeError):
+            self._enviar_json(400, {"error": "cuerpo inválido"})
+            return
+
+        servidor = self.server
+        with servidor._lock:
+            servidor.estadisticas["peticiones"] += 1
+            servidor.estadisticas["prompts"] += len(prompts)
+
+        espera_ms = (
+            servidor.latencia_ms
+            + servidor.latencia_por_prompt_ms * len(prompts)
+            + random.uniform(0, servidor.jitter_ms)
+        )
+        time.sleep(espera_ms / 1000)
+
+        if random.random() < servidor.tasa_error:
+            with servidor._lock:
+                servidor.estadisticas["errores"] += 1
+            self._enviar_json(503, {"error": "sobrecarga simulada"})
+            return
+
+        self._enviar_json(200, {"respuestas": [servidor.responder(p) for p in prompts]})
+
+
+def iniciar_servidor(
+    host: str = "127.0.0.1", puerto: int = 0, **opciones
+) -> ServidorLLMFalso:
+    """Inicia el servidor en un hilo de fondo; puerto 0 elige uno libre"""
+    servidor = ServidorLLMFalso((host, puerto), **opciones)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor LLM falso para pruebas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia-ms", type=float, default=200.0)
+    parser.add_argument("--latencia-por-prompt-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--tasa-error", type=float, default=0.0)
+    args = parser.parse_args()
+
+    servidor = ServidorLLMFalso(
+        (args.host, args.puerto),
+        latencia_ms=args.latencia_ms,
+        latencia_por_prompt_ms=args.latencia_por_prompt_ms,
+        jitter_ms=args.jitter_ms,
+        tasa_error=args.tasa_error,
+    )
+    print(f"Servidor LLM falso en http://{args.host}:{servidor.server_port}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Endpoint HTTP mínimo del generador de propuestas
+Expone GeneradorPropuestas por HTTP/1.1 con conexiones persistentes para
+medir un worker de producción con prueba_carga.py --modo http. Protocolo:
+POST /v1/propuestas con {"necesidad", "area"} y respuesta {"exitoso",
+"area_detectada", "propuesta", "error"}. Uso:
+
+    python servidor_propuestas.py --puerto 8080
+"""
+
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from agent import GeneradorPropuestas
+
+
+class ServidorPropuestas(ThreadingHTTPServer):
+    """Servidor HTTP con una instancia de GeneradorPropuestas compartida"""
+
+    daemon_threads = True
+
+    def __init__(self, direccion: Tuple[str, int]):
+        super().__init__(direccion, _ManejadorPropuestas)
+        self.generador = GeneradorPropuestas()
+        self.estadisticas = {"peticiones": 0, "errores": 0}
+        self._lock = threading.Lock()
+
+
+class _ManejadorPropuestas(BaseHTTPRequestHandler):
+    server: ServidorPropuestas
+    protocol_version = "HTTP/1.1"
+    # Encabezados y cuerpo van en escrituras separadas: sin TCP_NODELAY cada
+    # respuesta espera el ACK retardado del cliente (~40 ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _enviar_json(self, codigo: int, datos: dict):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        if self.path == "/v1/estadisticas":
+            with self.server._lock:
+                self._enviar_json(200, dict(self.server.estadisticas))
+        else:
+            self._enviar_json(404, {"error": "ruta no encontrada"})
+
+    def do_POST(self):
+        longitud = int(self.headers.get("Content-Length", 0))
+        cuerpo = self.rfile.read(longitud)
+        if self.path != "/v1/propuestas":
+            self._enviar_json(404, {"error": "ruta no encontrada"})
+            return
+        try:
+            datos = json.loads(cuerpo.decode("utf-8"))
+            necesidad = str(datos["necesidad"])
+            area = datos.get("area")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self._enviar_json(400, {"error": "cuerpo inválido"})
+            return
+
+        resultado = self.server.generador.generar_propuesta(
+            necesidad, area_especifica=area, incluir_trazabilidad=False
+        )
+        with self.server._lock:
+            self.server.estadisticas["peticiones"] += 1
+            self.server.estadisticas["errores"] += not resultado.exitoso
+        self._enviar_json(
+            200,
+            {
+                "exitoso": resultado.exitoso,
+                "area_detectada": resultado.area_detectada,
+                "propuesta": resultado.propuesta,
+                "error": resultado.error,
+            },
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint HTTP del generador")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080, help="0 elige uno libre")
+    args = parser.parse_args()
+
+    servidor = ServidorPropuestas((args.host, args.puerto))
+    # prueba_carga.py lee esta línea para conocer el puerto
+    print(f"Servidor de propuestas en http://{args.host}:{servidor.server_port}")
+    sys.stdout.flush()
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
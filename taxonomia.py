@@ -0,0 +1,214 @@
+"""
+Taxonomía jerárquica de áreas: sector -> subsector -> especialidad
+Los sectores son los templates de templates.py y cada subárea se identifica
+por su ruta ("fintech/pagos/pci"). Una subárea guarda solo los campos que
+define; el resto se hereda del padre con replace(), que comparte las
+referencias en lugar de copiarlas. Las palabras clave no se heredan: las de
+cada nodo deciden si la detección desciende hasta él.
+
+La detección recorre el árbol de rutas por niveles y solo expande las ramas
+más prometedoras, así su costo crece con la profundidad y no con la cantidad
+de hojas. Sin subáreas registradas equivale a la detección plana.
+"""
+
+import sys
+import threading
+from dataclasses import fields, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from templates import (
+    TEMPLATES,
+    CoincidenciaPalabra,
+    TemplatePropuesta,
+    area_desde_coincidencias,
+    buscar_palabras,
+    palabras_clave_por_area,
+)
+from templates import obtener_template as obtener_template_sector
+
+SEPARADOR_RUTA = "/"
+MAX_RAMAS = 2
+
+_CAMPOS_SUBAREA = {f.name for f in fields(TemplatePropuesta)} - {"padre"}
+# Los lectores no toman _LOCK: registrar_subarea() solo agrega o reemplaza
+# entradas (primero en _SUBAREAS y luego en _HIJOS) y restaurar_taxonomia()
+# arma dicts nuevos y los intercambia, sin estados vacíos ni a medias.
+_SUBAREAS: Dict[str, Dict[str, Any]] = {}
+# Hijos de cada nodo como (ruta, palabras_clave), listos para buscar_palabras.
+# Las tuplas se reemplazan en lugar de modificarse.
+_HIJOS: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {}
+# (tenant, ruta) -> (template del padre, campos, vista resuelta); se escribe
+# bajo _LOCK y se valida por identidad al leer
+_VISTAS: Dict[Tuple[Optional[str], str], Tuple[Any, Dict, TemplatePropuesta]] = {}
+_LOCK = threading.Lock()
+# Aumenta con cada registro o restauración de subáreas
+_VERSION = 0
+
+
+def existe_area(area: str) -> bool:
+    """True si `area` es un sector de TEMPLATES o una subárea registrada"""
+    return area in TEMPLATES or area in _SUBAREAS
+
+
+def registrar_subarea(ruta: str, /, **campos: Any):
+    """
+    Registra (o reemplaza) una subárea bajo su padre, p. ej.
+    registrar_subarea("fintech/pagos", palabras_clave=("pasarela", "tarjeta")).
+    Los campos no indicados se heredan del padre.
+    """
+    global _VERSION
+    padre, separador, nombre = ruta.rpartition(SEPARADOR_RUTA)
+    if not separador or not nombre or not existe_area(padre):
+        raise ValueError(f"Padre desconocido para la subárea: {ruta}")
+    invalidos = set(campos) - _CAMPOS_SUBAREA
+    if invalidos:
+        raise ValueError(f"Campos no válidos: {', '.join(sorted(invalidos))}")
+    palabras_clave = tuple(
+        sys.intern(p.lower()) for p in campos.get("palabras_clave", ())
+    )
+
+    with _LOCK:
+        hijos = _HIJOS.get(padre, ())
+        nodo = (ruta, palabras_clave)
+        existente = ruta in _SUBAREAS
+        # Un dict nuevo invalida las vistas cacheadas de la subárea
+        _SUBAREAS[ruta] = {**campos, "palabras_clave": palabras_clave, "padre": padre}
+        if existente:
+            _HIJOS[padre] = tuple(nodo if h[0] == ruta else h for h in hijos)
+        else:
+            _HIJOS[padre] = hijos + (nodo,)
+        _VERSION += 1
+
+
+def version_taxonomia() -> int:
+    """Versión de las subáreas, para invalidar lo derivado de ellas"""
+    return _VERSION
+
+
+def listar_subareas(ruta: str) -> List[str]:
+    """Rutas de las subáreas directas de un área"""
+    return [hijo for hijo, _ in _HIJOS.get(ruta, ())]
+
+
+def palabras_clave_subareas() -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """(ruta, palabras_clave) de todas las subáreas registradas"""
+    return tuple(nodo for hijos in list(_HIJOS.values()) for nodo in hijos)
+
+
+def obtener_template(area: str, tenant: Optional[str] = None) -> TemplatePropuesta:
+    """
+    Como templates.obtener_template, aceptando también rutas de subáreas.
+    La subárea parte del template (con overlay del tenant) de su padre; la
+    vista cacheada se descarta sola si cambian el padre o sus campos.
+    """
+    campos = _SUBAREAS.get(area)
+    if campos is None:
+        return obtener_template_sector(area, tenant)
+
+    base = obtener_template(campos["padre"], tenant)
+    cacheada = _VISTAS.get((tenant, area))
+    if cacheada is not None and cacheada[0] is base and cacheada[1] is campos:
+        return cacheada[2]
+    vista = replace(base, **campos)
+    with _LOCK:
+        # No se cachea una subárea que se reemplazó o restauró mientras tanto
+        if _SUBAREAS.get(area) is campos:
+            _VISTAS[(tenant, area)] = (base, campos, vista)
+    return vista
+
+
+def detectar_area_jerarquica(
+    necesidad: str, max_ramas: int = MAX_RAMAS
+) -> Tuple[str, Dict[str, List[str]], Tuple[CoincidenciaPalabra, ...]]:
+    """
+    Puntúa primero los sectores y en cada nivel busca solo entre los hijos
+    de las `max_ramas` ramas con más coincidencias acumuladas. Gana el nodo
+    con más coincidencias acumuladas; en empate, el menos profundo y luego
+    el primero, como en area_desde_coincidencias.
+
+    Retorna (área o ruta, coincidencias por nodo visitado, posiciones).
+    """
+    necesidad_lower = necesidad.lower()
+    posiciones: List[CoincidenciaPalabra] = []
+
+    def buscar(nodos):
+        return buscar_palabras(necesidad_lower, nodos, posiciones)
+
+    mejor, coincidencias = _descender(buscar, max_ramas)
+    posiciones.sort(key=lambda c: (c.inicio, -c.fin))
+    return mejor, coincidencias, tuple(posiciones)
+
+
+def area_desde_coincidencias_jerarquica(
+    coincidencias: Dict[str, List[str]], max_ramas: int = MAX_RAMAS
+) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    Como detectar_area_jerarquica, a partir de coincidencias ya calculadas
+    por sector y por subárea (p. ej. las de analisis_extenso, que busca las
+    palabras de toda la taxonomía en una pasada por fragmentos).
+
+    Retorna (área o ruta, coincidencias por nodo visitado).
+    """
+
+    def buscar(nodos):
+        return {ruta: coincidencias[ruta] for ruta, _ in nodos if ruta in coincidencias}
+
+    return _descender(buscar, max_ramas)
+
+
+def _descender(
+    buscar: Callable[[Any], Dict[str, List[str]]], max_ramas: int
+) -> Tuple[str, Dict[str, List[str]]]:
+    """Recorrido por niveles; `buscar` da las coincidencias de unos nodos"""
+    # Un solo árbol durante todo el recorrido aunque se restaure la taxonomía
+    hijos_por_ruta = _HIJOS
+    coincidencias = buscar(palabras_clave_por_area())
+    mejor = area_desde_coincidencias(coincidencias)
+
+    puntajes = {area: len(palabras) for area, palabras in coincidencias.items()}
+    frontera = sorted(puntajes, key=lambda a: -puntajes[a])[:max_ramas]
+    while frontera and hijos_por_ruta:
+        candidatos = []
+        for ruta in frontera:
+            hijos = hijos_por_ruta.get(ruta)
+            if not hijos:
+                continue
+            encontradas = buscar(hijos)
+            coincidencias.update(encontradas)
+            for hijo, palabras in encontradas.items():
+                puntajes[hijo] = puntajes[ruta] + len(palabras)
+                candidatos.append(hijo)
+        frontera = sorted(candidatos, key=lambda a: -puntajes[a])[:max_ramas]
+        if frontera and puntajes[frontera[0]] > puntajes.get(mejor, 0):
+            mejor = frontera[0]
+
+    return mejor, coincidencias
+
+
+def detectar_area(necesidad: str) -> str:
+    """
+    Detecta el área más relevante de la taxonomía: la ruta de una subárea
+    (p. ej. "fintech/pagos/pci"), un sector o 'general' como default.
+    """
+    return detectar_area_jerarquica(necesidad)[0]
+
+
+def instantanea_taxonomia() -> Dict[str, Dict[str, Any]]:
+    """Copia de las subáreas registradas, cada padre antes que sus hijos"""
+    with _LOCK:
+        return dict(_SUBAREAS)
+
+
+def restaurar_taxonomia(subareas: Dict[str, Dict[str, Any]]):
+    """Reemplaza las subáreas por las de una instantánea"""
+    global _SUBAREAS, _HIJOS, _VISTAS, _VERSION
+    nuevas = dict(subareas)
+    hijos: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {}
+    for ruta, campos in nuevas.items():
+        padre = campos["padre"]
+        hijos[padre] = hijos.get(padre, ()) + ((ruta, campos["palabras_clave"]),)
+    with _LOCK:
+        _SUBAREAS = nuevas
+        _HIJOS = hijos
+        _VISTAS = {}
+        _VERSION += 1
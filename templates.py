@@ -3,11 +3,23 @@ Templates de Propuestas Técnicas por Área
 Cada template incluye: problema, solución, arquitectura y riesgos
 """
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import sys
+import threading
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TemplatePropuesta:
     """Estructura de un template de propuesta técnica"""
 
@@ -16,12 +28,26 @@ class TemplatePropuesta:
     problema_base: str
     solucion_base: str
     arquitectura_base: str
-    riesgos_base: List[str]
-    tecnologias: List[str]
-    palabras_clave: List[str]
+    riesgos_base: Tuple[str, ...]
+    tecnologias: Tuple[str, ...]
+    palabras_clave: Tuple[str, ...]
+    # Ruta del padre en la taxonomía de taxonomia.py (None en los sectores)
+    padre: Optional[str] = None
 
+    def __post_init__(self):
+        # Listas a tuplas inmutables e internado de los nombres que se
+        # repiten entre templates, overlays y resultados
+        object.__setattr__(self, "area", sys.intern(self.area))
+        object.__setattr__(self, "riesgos_base", tuple(self.riesgos_base))
+        object.__setattr__(
+            self, "tecnologias", tuple(sys.intern(t) for t in self.tecnologias)
+        )
+        object.__setattr__(
+            self, "palabras_clave", tuple(sys.intern(p) for p in self.palabras_clave)
+        )
 
-TEMPLATES: Dict[str, TemplatePropuesta] = {
+
+_TEMPLATES_BASE: Dict[str, TemplatePropuesta] = {
     "fintech": TemplatePropuesta(
         area="Fintech",
         descripcion="Soluciones financieras tecnológicas",
@@ -327,31 +353,223 @@ TEMPLATES: Dict[str, TemplatePropuesta] = {
     ),
 }
 
+# Vista de solo lectura: los templates son inmutables y el catálogo solo
+# cambia con actualizar_template() y restaurar_catalogo(), bajo
+# _LOCK_OVERLAYS. Consultar un área (get, in) no toma lock, pero recorrer
+# TEMPLATES mientras un escritor agrega o quita áreas puede fallar; la
+# detección recorre en cambio la tupla de palabras_clave_por_area(), que los
+# escritores reemplazan entera.
+TEMPLATES: Mapping[str, TemplatePropuesta] = MappingProxyType(_TEMPLATES_BASE)
+_PALABRAS_POR_AREA: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+    (area, t.palabras_clave) for area, t in _TEMPLATES_BASE.items()
+)
+# Aumenta con cada cambio de los templates base (no de los overlays)
+_VERSION_CATALOGO = 0
 
-def detectar_area(necesidad: str) -> str:
+
+def palabras_clave_por_area() -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """(área, palabras_clave) de cada sector, en el orden de TEMPLATES"""
+    return _PALABRAS_POR_AREA
+
+
+def version_catalogo() -> int:
+    """Versión de los templates base, para invalidar lo derivado de ellos"""
+    return _VERSION_CATALOGO
+
+
+class CoincidenciaPalabra(NamedTuple):
+    """Posición [inicio, fin) de una palabra clave de un área en la necesidad"""
+
+    inicio: int
+    fin: int
+    palabra: str
+    area: str
+
+
+def buscar_palabras(
+    necesidad_lower: str,
+    palabras_por_area: Iterable[Tuple[str, Tuple[str, ...]]],
+    posiciones: List[CoincidenciaPalabra],
+) -> Dict[str, List[str]]:
     """
-    Detecta el área más relevante basándose en palabras clave.
-    Retorna el área identificada o 'general' como default.
+    Palabras clave de cada área presentes en el texto (ya en minúsculas);
+    agrega a `posiciones` cada aparición.
     """
-    necesidad_lower = necesidad.lower()
+    coincidencias = {}
+    for area, palabras_clave in palabras_por_area:
+        encontradas = []
+        for palabra in palabras_clave:
+            inicio = necesidad_lower.find(palabra)
+            if inicio < 0:
+                continue
+            encontradas.append(palabra)
+            while inicio >= 0:
+                fin = inicio + len(palabra)
+                posiciones.append(CoincidenciaPalabra(inicio, fin, palabra, area))
+                inicio = necesidad_lower.find(palabra, fin)
+        if encontradas:
+            coincidencias[area] = encontradas
+    return coincidencias
+
 
+def detectar_coincidencias(
+    necesidad: str,
+) -> Tuple[Dict[str, List[str]], Tuple[CoincidenciaPalabra, ...]]:
+    """
+    Una sola pasada por las palabras clave de TEMPLATES que retorna las
+    coincidencias por área (como coincidencias_por_area) y la posición de
+    cada aparición, ordenadas por inicio, para resaltarlas sin re-escanear.
+    Las posiciones son sobre necesidad.lower(), que conserva el largo salvo
+    en caracteres poco comunes (p. ej. "İ").
+    """
+    posiciones: List[CoincidenciaPalabra] = []
+    coincidencias = buscar_palabras(necesidad.lower(), _PALABRAS_POR_AREA, posiciones)
+    posiciones.sort(key=lambda c: (c.inicio, -c.fin))
+    return coincidencias, tuple(posiciones)
+
+
+def coincidencias_por_area(necesidad: str) -> Dict[str, List[str]]:
+    """
+    Retorna las palabras clave de cada área presentes en la necesidad.
+    Solo incluye áreas con al menos una coincidencia, en el orden de TEMPLATES.
+    """
+    return detectar_coincidencias(necesidad)[0]
+
+
+def area_desde_coincidencias(coincidencias: Dict[str, List[str]]) -> str:
+    """Elige el área con más coincidencias; en empate gana la primera"""
     mejor_area = "general"
     max_coincidencias = 0
 
-    for area, template in TEMPLATES.items():
-        coincidencias = sum(
-            1 for palabra in template.palabras_clave if palabra in necesidad_lower
-        )
-        if coincidencias > max_coincidencias:
-            max_coincidencias = coincidencias
+    for area, encontradas in coincidencias.items():
+        if len(encontradas) > max_coincidencias:
+            max_coincidencias = len(encontradas)
             mejor_area = area
 
     return mejor_area
 
 
-def obtener_template(area: str) -> TemplatePropuesta:
-    """Obtiene el template para un área específica"""
-    return TEMPLATES.get(area, TEMPLATES["fintech"])
+def detectar_area(necesidad: str) -> str:
+    """
+    Detecta el área más relevante basándose en palabras clave.
+    Retorna el área identificada o 'general' como default. Solo considera
+    los sectores; taxonomia.detectar_area desciende también a las subáreas.
+    """
+    return area_desde_coincidencias(coincidencias_por_area(necesidad))
+
+
+# Overlays por tenant: solo guardan los campos sobrescritos de cada área.
+# Las vistas combinadas se cachean por (tenant, área) y se invalidan cuando
+# cambia el overlay del tenant o el template base del área. Los overlays de
+# cada tenant se reemplazan en lugar de modificarse, así un lector sin lock
+# nunca ve uno a medio actualizar.
+_OVERLAYS: Dict[str, Dict[str, Dict[str, Any]]] = {}
+_VISTAS_TENANT: Dict[Tuple[str, str], TemplatePropuesta] = {}
+_LOCK_OVERLAYS = threading.Lock()
+_CAMPOS_TEMPLATE = {f.name for f in fields(TemplatePropuesta)}
+
+
+def registrar_overlay(tenant: str, area: str, /, **campos: Any):
+    """
+    Sobrescribe campos del template base de un área para un tenant.
+    Los campos no indicados se siguen resolviendo desde TEMPLATES.
+    """
+    if area not in TEMPLATES:
+        raise ValueError(f"Área desconocida: {area}")
+    invalidos = set(campos) - _CAMPOS_TEMPLATE
+    if invalidos:
+        raise ValueError(f"Campos no válidos: {', '.join(sorted(invalidos))}")
+
+    with _LOCK_OVERLAYS:
+        overlays = _OVERLAYS.get(tenant, {})
+        _OVERLAYS[tenant] = {**overlays, area: {**overlays.get(area, {}), **campos}}
+        _VISTAS_TENANT.pop((tenant, area), None)
+
+
+def eliminar_overlay(tenant: str, area: Optional[str] = None):
+    """Elimina el overlay de un área del tenant, o todos si no se indica área"""
+    with _LOCK_OVERLAYS:
+        overlays = _OVERLAYS.get(tenant, {})
+        areas = [area] if area else list(overlays)
+        restantes = {a: c for a, c in overlays.items() if a not in areas}
+        if restantes:
+            _OVERLAYS[tenant] = restantes
+        else:
+            _OVERLAYS.pop(tenant, None)
+        for a in areas:
+            _VISTAS_TENANT.pop((tenant, a), None)
+
+
+def actualizar_template(area: str, template: TemplatePropuesta):
+    """Reemplaza el template base de un área e invalida las vistas derivadas"""
+    global _PALABRAS_POR_AREA, _VERSION_CATALOGO
+    with _LOCK_OVERLAYS:
+        _TEMPLATES_BASE[area] = template
+        _PALABRAS_POR_AREA = tuple(
+            (a, t.palabras_clave) for a, t in _TEMPLATES_BASE.items()
+        )
+        _VERSION_CATALOGO += 1
+        for clave in [c for c in _VISTAS_TENANT if c[1] == area]:
+            del _VISTAS_TENANT[clave]
+
+
+def instantanea_catalogo() -> Tuple[Dict[str, TemplatePropuesta], Dict[str, Dict]]:
+    """Copia de los templates base y de los overlays (p. ej. para otros procesos)"""
+    with _LOCK_OVERLAYS:
+        return dict(_TEMPLATES_BASE), {t: dict(o) for t, o in _OVERLAYS.items()}
+
+
+def restaurar_catalogo(
+    templates: Dict[str, TemplatePropuesta], overlays: Dict[str, Dict]
+):
+    """Reemplaza templates y overlays por los de una instantánea"""
+    global _PALABRAS_POR_AREA, _VERSION_CATALOGO
+    with _LOCK_OVERLAYS:
+        # Sin clear(): un lector concurrente nunca ve el catálogo vacío, solo
+        # cada área con su template anterior o con el nuevo
+        _TEMPLATES_BASE.update(templates)
+        for area in [a for a in _TEMPLATES_BASE if a not in templates]:
+            del _TEMPLATES_BASE[area]
+        _PALABRAS_POR_AREA = tuple(
+            (a, t.palabras_clave) for a, t in _TEMPLATES_BASE.items()
+        )
+        _VERSION_CATALOGO += 1
+        _OVERLAYS.update({t: dict(o) for t, o in overlays.items()})
+        for tenant in [t for t in _OVERLAYS if t not in overlays]:
+            del _OVERLAYS[tenant]
+        _VISTAS_TENANT.clear()
+
+
+def listar_tenants() -> List[str]:
+    """Lista los tenants con overlays registrados"""
+    return list(_OVERLAYS.keys())
+
+
+def obtener_template(area: str, tenant: Optional[str] = None) -> TemplatePropuesta:
+    """Obtiene el template para un área específica, con el overlay del tenant"""
+    base = TEMPLATES.get(area)
+    if base is None:
+        area = "fintech"
+        base = TEMPLATES[area]
+
+    if not tenant or not _OVERLAYS.get(tenant, {}).get(area):
+        return base
+
+    vista = _VISTAS_TENANT.get((tenant, area))
+    if vista is None:
+        # Base, overlay, combinación y cache bajo el mismo lock que usan
+        # eliminar_overlay() y actualizar_template() para invalidar
+        with _LOCK_OVERLAYS:
+            vista = _VISTAS_TENANT.get((tenant, area))
+            if vista is None:
+                base = TEMPLATES.get(area, base)
+                campos = _OVERLAYS.get(tenant, {}).get(area)
+                if not campos:
+                    return base
+                # replace() comparte con la base las referencias no sobrescritas
+                vista = replace(base, **campos)
+                _VISTAS_TENANT[(tenant, area)] = vista
+    return vista
 
 
 def listar_areas() -> List[str]: